@@ -1,3 +1,6 @@
+import os
+import sys
+import joblib
 import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
@@ -5,6 +8,18 @@ from sklearn.metrics import classification_report, confusion_matrix
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
+import sklearn
+from src import forest_compression, forest_export
+from src.forest_export import write_header, predict_flat
+from src.threshold_calibration import calibrate_thresholds, save_thresholds
+from src.forest_compression import (search_compressed_forests, pareto_frontier, select_model, frontier_table,
+                                    sklearn_agreement)
+
+# model_cache.py and lite_runtime are shared with the serial scripts one directory up
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+from model_cache import ModelCache
+from lite_runtime.trees import TreeEnsemble
+from firmware_parity import check_forest_header, host_compiler, print_result
 
 # Step 1: Load the dataset
 def load_dataset(file_path):
@@ -58,27 +73,52 @@ def train_model(X, y):
     return clf
 
 # Step 3: Derive thresholds based on predictions
-def derive_thresholds(clf, X, y):
+def derive_thresholds(clf, X, y, method='percentile'):
     """
     Derive the thresholds for each gas type based on the classifier's predictions.
-    
+
+    The forest is evaluated once; each gas then uses its own probability column.
+
     :param clf: The trained classifier.
     :param X: Features (sensor readings).
     :param y: True labels (gas types).
+    :param method: 'percentile' (95th percentile) or 'false_alarm' (5% false-alarm rate).
     :return: Dictionary containing thresholds for each gas type.
     """
-    # Convert y to a Pandas Series to use the unique() method
-    unique_gases = pd.Series(y).unique()
+    # Packed NumPy evaluator; identical probabilities to clf.predict_proba
+    probs = TreeEnsemble.from_sklearn(clf).predict_proba(X)
+    return calibrate_thresholds(probs, clf.classes_, y, method=method)
 
-    thresholds = {}
 
-    # Calculate the threshold for each unique gas type
-    for gas in unique_gases:
-        # Get the predicted probabilities for the current gas type
-        probs = clf.predict_proba(X)[:, 1]  # Assuming binary classification
-        thresholds[gas] = np.percentile(probs, 95)  # Set threshold at 95th percentile
+# Step 4: Search for a compressed forest that fits the microcontroller
+def compress_model(clf, X, y, tolerance=0.02):
+    """
+    Search smaller, quantized forests and pick the smallest one that stays within tolerance.
 
-    return thresholds
+    :param clf: The trained (uncompressed) classifier, used as the accuracy baseline.
+    :param X: Features (sensor readings).
+    :param y: True labels (gas types).
+    :param tolerance: Largest allowed per-class F1 drop relative to the baseline.
+    :return: Tuple of (chosen candidate or None if no candidate fits within tolerance,
+             Pareto frontier table).
+    """
+    # Same split as train_model so the baseline is measured on the same test rows
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
+    baseline = classification_report(y_test, clf.predict(X_test), output_dict=True)
+
+    candidates = search_compressed_forests(X_train, y_train, X_test, y_test)
+    frontier = frontier_table(pareto_frontier(candidates))
+
+    chosen = select_model(candidates, baseline, tolerance=tolerance)
+    if chosen is None:
+        print(f"No compressed forest fits the ATmega328P within an F1 tolerance of {tolerance}")
+    else:
+        print(f"Selected {chosen['n_estimators']} trees, max_depth={chosen['max_depth']}, "
+              f"min_samples_leaf={chosen['min_samples_leaf']}, features={chosen['features']}, "
+              f"{chosen['bits']}-bit thresholds")
+        print("Classification Report (compressed):\n",
+              classification_report(y_test, np.asarray(chosen['flat']['classes'])[predict_flat(chosen['flat'], X_test)]))
+    return chosen, frontier
 
 
 # Main function
@@ -91,11 +131,41 @@ def main():
     # Step 1: Load and preprocess the data
     X, y = load_dataset(file_path)
 
-    # Step 2: Train the model and classify gas types
-    clf = train_model(X, y)
-
-    # Step 3: Derive thresholds for each gas type
-    thresholds = derive_thresholds(clf, X, y)
+    # Step 2: Train the model and classify gas types (reused from the cache unless the data or code changed)
+    cache = ModelCache()
+    training_inputs = {'dataset': file_path, 'load': load_dataset, 'train': train_model,
+                       'sklearn': sklearn.__version__}
+    clf = cache.get_or_train('eda-forest', lambda: train_model(X, y), training_inputs)
+
+    # Step 3: Derive thresholds for each gas type and save them next to the model
+    thresholds = derive_thresholds(clf, X, y, method='percentile')
+    print("Thresholds:", thresholds)
+
+    os.makedirs("outputs", exist_ok=True)
+    model_path = "outputs/gas_classifier.joblib"
+    joblib.dump(clf, model_path)
+    saved_path = save_thresholds(thresholds, model_path, method='percentile')
+    print(f"Saved model to {model_path} and thresholds to {saved_path}")
+
+    # Step 4: Compress the forest until it fits the microcontroller
+    # The compression modules are hashed as files, so their cost constants count as well as their functions
+    chosen, frontier = cache.get_or_train('eda-compressed-forest', lambda: compress_model(clf, X, y),
+                                          {**training_inputs, 'compress': compress_model,
+                                           'modules': [forest_compression.__file__, forest_export.__file__]})
+    print("Pareto Frontier (flash, SRAM, cycles, accuracy):\n", frontier.to_string(index=False))
+    frontier.to_csv("outputs/compression_frontier.csv", index=False)
+
+    # Step 5: Export the compressed forest as a PROGMEM header for the Arduino
+    if chosen is not None:
+        agreement, mismatches = sklearn_agreement(chosen, X)
+        print(f"Exported soft vote agrees with scikit-learn's predict on {100 * agreement:.2f}% of {len(X)} rows")
+        if mismatches:
+            raise SystemExit(f"Not writing the header: {mismatches} rows disagree with the trained forest")
+        write_header(chosen['flat'], "outputs/RandomForestModel.h")
+        if host_compiler():
+            # Build the header with host gcc and replay every dataset row through it and predict_flat
+            print_result(check_forest_header("outputs/RandomForestModel.h",
+                                             lambda X: predict_flat(chosen['flat'], X), X))
 
 if __name__ == "__main__":
     main()
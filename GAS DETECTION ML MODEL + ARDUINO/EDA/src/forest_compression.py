@@ -0,0 +1,211 @@
+import copy
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import classification_report
+
+from src.forest_export import flatten_forest, predict_flat, estimate_memory
+
+ADC_BITS = 10
+AVR_CLOCK_HZ = 16000000
+
+# Approximate AVR cycle costs of the generated predict routine
+TREE_CYCLES = 30     # root/depth reads and the leaf row lookup
+LEAF_CYCLES = 8      # per class: one leaf probability read and add into its score
+LEVEL_CYCLES = 45    # feature, threshold and child reads plus the comparison
+SHIFT_CYCLES = 2     # per bit of int16 right shift when thresholds are quantized
+CLASS_CYCLES = 8     # final argmax over the vote counters
+
+
+def estimate_cycles(flat):
+    """
+    Estimate AVR cycles for one call of the generated predict routine.
+
+    :param flat: Flattened forest from flatten_forest.
+    :return: Estimated cycle count per inference.
+    """
+    level = LEVEL_CYCLES + SHIFT_CYCLES * flat['feature_shift']
+    depth = flat['depth'].astype(np.int64)
+    n_classes = len(flat['classes'])
+    return int(np.sum(TREE_CYCLES + LEAF_CYCLES * n_classes + depth * level) + CLASS_CYCLES * n_classes)
+
+
+def _truncate(forest, n_estimators):
+    """Return a shallow copy of a fitted forest that keeps only its first n trees."""
+    smaller = copy.copy(forest)
+    smaller.estimators_ = forest.estimators_[:n_estimators]
+    smaller.n_estimators = n_estimators
+    return smaller
+
+
+def _remap_features(flat, subset, n_inputs):
+    """Point node features at the full sensor vector instead of the trained subset."""
+    flat['feature'] = np.asarray(subset, dtype=np.uint8)[flat['feature']]
+    flat['n_features'] = n_inputs
+    return flat
+
+
+def pareto_frontier(candidates):
+    """
+    Keep the candidates that no other candidate beats on every axis.
+
+    Candidates with identical metrics (e.g. a leaf size that changes no split) appear
+    once, as the simplest configuration: fewest trees, shallowest, fewest sensors,
+    largest leaves, then full threshold resolution.
+
+    :param candidates: List of candidate dictionaries from search_compressed_forests.
+    :return: Non-dominated candidates sorted by flash size.
+    """
+    def dominates(a, b):
+        no_worse = (a['flash_bytes'] <= b['flash_bytes'] and a['sram_bytes'] <= b['sram_bytes']
+                    and a['cycles'] <= b['cycles'] and a['accuracy'] >= b['accuracy'])
+        better = (a['flash_bytes'] < b['flash_bytes'] or a['sram_bytes'] < b['sram_bytes']
+                  or a['cycles'] < b['cycles'] or a['accuracy'] > b['accuracy'])
+        return no_worse and better
+
+    def simplicity(c):
+        depth = c['max_depth'] if c['max_depth'] is not None else np.inf
+        return c['n_estimators'], depth, len(c['features']), -c['min_samples_leaf'], -c['bits']
+
+    unique = {}
+    for c in sorted(candidates, key=simplicity):
+        unique.setdefault((c['flash_bytes'], c['sram_bytes'], c['cycles'], c['accuracy']), c)
+    candidates = list(unique.values())
+
+    frontier = [c for c in candidates if not any(dominates(other, c) for other in candidates)]
+    return sorted(frontier, key=lambda c: (c['flash_bytes'], c['cycles']))
+
+
+def search_compressed_forests(X_train, y_train, X_test, y_test,
+                              n_estimators=(1, 3, 5, 10, 20, 50),
+                              max_depths=(3, 4, 6, 8, None),
+                              min_samples_leafs=(1, 10),
+                              n_features=(7, 5, 3),
+                              bits=(10, 8, 6),
+                              random_state=42):
+    """
+    Search estimator count, depth, leaf size, feature subset and threshold bit-width.
+
+    One forest is fitted per (feature subset, depth, leaf size); smaller ensembles
+    reuse its first trees and every bit-width reuses the same fit, so the grid
+    costs far fewer fits than it has points. Accuracy is measured with the
+    quantized integer evaluation that the generated C header performs.
+
+    :param X_train: Training ADC codes for the seven MQ sensors.
+    :param y_train: Training gas labels.
+    :param X_test: Held-out ADC codes.
+    :param y_test: Held-out gas labels.
+    :param n_estimators: Ensemble sizes to evaluate.
+    :param max_depths: Maximum tree depths to evaluate (None for unlimited).
+    :param min_samples_leafs: Minimum samples per leaf; larger values merge leaves.
+    :param n_features: Numbers of sensors to keep, chosen by reference importance.
+    :param bits: Threshold quantization bit-widths (10 is the full ADC resolution).
+    :param random_state: Seed shared by every forest.
+    :return: List of candidate dictionaries. Forests with more nodes than the header can
+             index (forest_export.MAX_NODES) are left out and reported.
+    """
+    n_inputs = X_train.shape[1]
+    largest = max(n_estimators)
+
+    reference = RandomForestClassifier(n_estimators=largest, random_state=random_state, n_jobs=-1)
+    reference.fit(X_train, y_train)
+    ranking = np.argsort(reference.feature_importances_)[::-1]
+
+    candidates = []
+    for k in n_features:
+        subset = sorted(int(i) for i in ranking[:k])
+        for depth in max_depths:
+            for leaf in min_samples_leafs:
+                forest = RandomForestClassifier(n_estimators=largest, max_depth=depth, min_samples_leaf=leaf,
+                                                random_state=random_state, n_jobs=-1)
+                forest.fit(X_train[:, subset], y_train)
+
+                for n in n_estimators:
+                    smaller = _truncate(forest, n)
+                    for b in bits:
+                        try:
+                            flat = flatten_forest(smaller, feature_shift=ADC_BITS - b, merge_leaves=True)
+                        except ValueError as e:
+                            print(f"Skipping {n} trees, max_depth={depth}, min_samples_leaf={leaf}, "
+                                  f"features={subset}, {b}-bit thresholds: {e}")
+                            continue
+                        flat = _remap_features(flat, subset, n_inputs)
+
+                        y_pred = np.asarray(flat['classes'])[predict_flat(flat, X_test)]
+                        report = classification_report(y_test, y_pred, output_dict=True, zero_division=0)
+                        memory = estimate_memory(flat)
+
+                        candidates.append({
+                            'n_estimators': n,
+                            'max_depth': depth,
+                            'min_samples_leaf': leaf,
+                            'features': subset,
+                            'bits': b,
+                            'flash_bytes': memory['flash_bytes'],
+                            'sram_bytes': memory['sram_bytes'],
+                            'cycles': estimate_cycles(flat),
+                            'accuracy': report['accuracy'],
+                            'fits': memory['fits'],
+                            'report': report,
+                            'flat': flat,
+                            'forest': smaller,
+                        })
+
+    return candidates
+
+
+def sklearn_agreement(candidate, X):
+    """
+    Fraction of rows on which the candidate's flattened forest, at full ADC resolution,
+    predicts the same class as the sklearn forest it was flattened from.
+
+    Threshold quantization is left out: it changes predictions by design and is already
+    part of the candidate's accuracy. What remains is the export itself, the soft vote
+    over rounded leaf probabilities, which should agree on every row.
+
+    :param candidate: Candidate from search_compressed_forests.
+    :param X: ADC codes of all sensors.
+    :return: Tuple of (agreement fraction, number of disagreeing rows).
+    """
+    subset = candidate['features']
+    flat = _remap_features(flatten_forest(candidate['forest'], merge_leaves=True), subset, X.shape[1])
+    exported = np.asarray(flat['classes'])[predict_flat(flat, X)]
+    reference = candidate['forest'].predict(X[:, subset])
+    same = exported == reference
+    return float(same.mean()), int((~same).sum())
+
+
+def select_model(candidates, baseline_report, tolerance=0.02):
+    """
+    Pick the smallest fitting candidate whose per-class F1 stays within tolerance.
+
+    :param candidates: Candidates from search_compressed_forests (or its frontier).
+    :param baseline_report: classification_report(output_dict=True) of the uncompressed forest.
+    :param tolerance: Largest allowed drop in F1 for any class.
+    :return: Chosen candidate, or None if nothing qualifies.
+    """
+    classes = [key for key, value in baseline_report.items() if isinstance(value, dict) and 'support' in value
+               and key not in ('macro avg', 'weighted avg')]
+
+    def within_tolerance(candidate):
+        return all(candidate['report'][c]['f1-score'] >= baseline_report[c]['f1-score'] - tolerance
+                   for c in classes)
+
+    eligible = [c for c in candidates if c['fits'] and within_tolerance(c)]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda c: (c['flash_bytes'], c['cycles']))
+
+
+def frontier_table(frontier):
+    """
+    Tabulate a frontier for printing or saving as CSV.
+
+    :param frontier: Candidates from pareto_frontier.
+    :return: DataFrame with one row per candidate.
+    """
+    columns = ['n_estimators', 'max_depth', 'min_samples_leaf', 'features', 'bits',
+               'flash_bytes', 'sram_bytes', 'cycles', 'accuracy', 'fits']
+    table = pd.DataFrame([{key: c[key] for key in columns} for c in frontier], columns=columns)
+    table['us_at_16MHz'] = table['cycles'] * 1e6 / AVR_CLOCK_HZ
+    return table
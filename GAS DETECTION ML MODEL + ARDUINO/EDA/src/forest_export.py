@@ -0,0 +1,288 @@
+import os
+import re
+import numpy as np
+
+# ATmega328P (Arduino Uno): 32 KB flash minus the 512-byte Optiboot bootloader, 2 KB SRAM
+ATMEGA328P_FLASH_BYTES = 32256
+ATMEGA328P_SRAM_BYTES = 2048
+
+# Rough size of the generated predict() routine on AVR, on top of the node tables
+PREDICT_CODE_BYTES = 220
+
+LEAF_THRESHOLD = np.iinfo(np.int16).max
+# Leaf class probabilities are uint16 fractions of SCORE_MAX / n_trees, so their sum fits a uint16
+SCORE_MAX = np.iinfo(np.uint16).max
+# children is indexed with 2 * node + 1, which has to fit a uint16 index on AVR
+MAX_NODES = 32767
+
+
+def _estimators(model):
+    """Return the list of fitted trees in a forest, or the tree itself."""
+    return list(model.estimators_) if hasattr(model, 'estimators_') else [model]
+
+
+def flatten_forest(model, feature_shift=0, merge_leaves=False):
+    """
+    Flatten a fitted sklearn forest or decision tree into contiguous node arrays.
+
+    Every node stores a feature index, an integer threshold and two child slots.
+    Leaves use the largest int16 threshold so the comparison always selects the
+    left slot, which points back at the leaf itself; the right slot holds the
+    leaf's row in leaf_proba, its class probabilities scaled to proba_scale. A tree
+    can then be walked for exactly max_depth steps with no branch on the node type.
+    Summing the rows over the trees reproduces sklearn's soft vote (the average of
+    the trees' probabilities) up to the rounding of the rows; identical rows, such
+    as the one-hot rows of pure leaves, are stored once.
+
+    :param model: Fitted RandomForestClassifier or DecisionTreeClassifier trained on raw ADC codes.
+    :param feature_shift: Right shift applied to inputs and thresholds (10-bit ADC -> 10 - shift bits).
+    :param merge_leaves: Collapse subtrees whose leaves all have the same probability row.
+    :return: Dictionary of flattened arrays and metadata.
+    """
+    features, thresholds, children, roots, depths = [], [], [], [], []
+    rows = {}  # Quantized probability row -> index in leaf_proba
+    estimators = _estimators(model)
+    proba_scale = SCORE_MAX // len(estimators)
+
+    for estimator in estimators:
+        tree = estimator.tree_
+        value = tree.value[:, 0, :]
+        proba = np.rint(value / value.sum(axis=1, keepdims=True) * proba_scale).astype(np.uint16)
+        is_leaf = tree.children_left == -1
+        leaf_row = np.full(tree.node_count, -1)
+        leaf_row[is_leaf] = [rows.setdefault(row.tobytes(), len(rows)) for row in proba[is_leaf]]
+
+        # Probability row shared by every leaf below each node, or -1 if they differ
+        uniform = leaf_row.copy()
+        if merge_leaves:
+            for node in range(tree.node_count - 1, -1, -1):
+                left, right = tree.children_left[node], tree.children_right[node]
+                if left != -1:
+                    uniform[node] = uniform[left] if uniform[left] == uniform[right] else -1
+
+        base = len(features)
+        mapping = {}
+        order = [0]
+        # Breadth-first renumbering keeps each tree's nodes contiguous
+        while order:
+            node = order.pop(0)
+            mapping[node] = base + len(mapping)
+            if uniform[node] == -1:
+                order.extend([tree.children_left[node], tree.children_right[node]])
+
+        def node_depth(node):
+            if uniform[node] != -1:
+                return 0
+            return 1 + max(node_depth(tree.children_left[node]), node_depth(tree.children_right[node]))
+
+        for node, index in sorted(mapping.items(), key=lambda item: item[1]):
+            if uniform[node] != -1:
+                features.append(0)
+                thresholds.append(LEAF_THRESHOLD)
+                children.extend([index, int(uniform[node])])
+            else:
+                threshold = int(np.floor(tree.threshold[node])) >> feature_shift
+                features.append(int(tree.feature[node]))
+                thresholds.append(int(np.clip(threshold, -LEAF_THRESHOLD, LEAF_THRESHOLD - 1)))
+                children.extend([mapping[tree.children_left[node]], mapping[tree.children_right[node]]])
+
+        roots.append(base)
+        depths.append(node_depth(0))
+
+    n_nodes = len(features)
+    if n_nodes > MAX_NODES:
+        raise ValueError(f"Forest has {n_nodes} nodes; the generated header indexes at most {MAX_NODES}")
+    index_dtype = np.uint8 if n_nodes <= 256 and len(rows) <= 256 else np.uint16
+    leaf_proba = np.frombuffer(b''.join(rows), dtype=np.uint16).reshape(len(rows), len(model.classes_))
+
+    return {
+        'feature': np.array(features, dtype=np.uint8),
+        'threshold': np.array(thresholds, dtype=np.int16),
+        'children': np.array(children, dtype=index_dtype),
+        'root': np.array(roots, dtype=index_dtype),
+        'depth': np.array(depths, dtype=np.uint8),
+        'leaf_proba': leaf_proba.copy(),
+        'proba_scale': proba_scale,
+        'classes': [str(c) for c in model.classes_],
+        'n_features': int(model.n_features_in_),
+        'feature_shift': feature_shift,
+    }
+
+
+def predict_flat(flat, X):
+    """
+    Emulate the generated C predict routine on the host, including integer quantization.
+
+    :param flat: Flattened forest from flatten_forest.
+    :param X: Integer ADC features, shape (n_samples, n_features).
+    :return: Array of predicted class indices.
+    """
+    X = np.asarray(X, dtype=np.int16) >> flat['feature_shift']
+    rows = np.arange(len(X))
+    children = flat['children'].astype(np.int64)
+    leaf_proba = flat['leaf_proba'].astype(np.int64)
+    scores = np.zeros((len(X), len(flat['classes'])), dtype=np.int64)
+
+    for root, depth in zip(flat['root'], flat['depth']):
+        node = np.full(len(X), root, dtype=np.int64)
+        for _ in range(depth):
+            go_right = X[rows, flat['feature'][node]] > flat['threshold'][node]
+            node = children[2 * node + go_right]
+        scores += leaf_proba[children[2 * node + 1]]
+
+    # First maximum on ties, like np.argmax over sklearn's averaged probabilities
+    return np.argmax(scores, axis=1)
+
+
+def estimate_memory(flat):
+    """
+    Estimate flash and SRAM usage of the generated header on an ATmega328P.
+
+    :param flat: Flattened forest from flatten_forest.
+    :return: Dictionary with byte counts, budgets and whether the model fits.
+    """
+    n_trees = len(flat['root'])
+    table_bytes = sum(flat[key].nbytes for key in ('feature', 'threshold', 'children', 'root', 'depth', 'leaf_proba'))
+    flash = table_bytes + PREDICT_CODE_BYTES
+    # Score accumulators plus the caller's int16 feature vector
+    sram = len(flat['classes']) * 2 + flat['n_features'] * 2
+
+    return {
+        'n_trees': n_trees,
+        'n_nodes': len(flat['feature']),
+        'flash_bytes': flash,
+        'sram_bytes': sram,
+        'flash_budget': ATMEGA328P_FLASH_BYTES,
+        'sram_budget': ATMEGA328P_SRAM_BYTES,
+        'fits': flash <= ATMEGA328P_FLASH_BYTES and sram <= ATMEGA328P_SRAM_BYTES,
+    }
+
+
+def _c_array(ctype, name, size, values, per_line=16):
+    """Format a PROGMEM array definition."""
+    lines = []
+    for start in range(0, len(values), per_line):
+        lines.append("  " + ", ".join(str(int(v)) for v in values[start:start + per_line]))
+    body = ",\n".join(lines)
+    return f"static const {ctype} {name}[{size}] PROGMEM = {{\n{body}\n}};\n"
+
+
+def render_header(flat, prefix='rf'):
+    """
+    Render a flattened forest as a self-contained C header.
+
+    :param flat: Flattened forest from flatten_forest.
+    :param prefix: Prefix for every generated symbol.
+    :return: Header source as a string.
+    """
+    upper = prefix.upper()
+    if len(flat['feature']) > MAX_NODES:
+        raise ValueError(f"Forest has {len(flat['feature'])} nodes; the generated header indexes at most {MAX_NODES}")
+    wide = flat['children'].dtype == np.uint16
+    index_type = 'uint16_t' if wide else 'uint8_t'
+    read_index = 'pgm_read_word' if wide else 'pgm_read_byte'
+
+    class_defines = "".join(
+        f"#define {upper}_CLASS_{re.sub(r'[^A-Za-z0-9]', '_', name).upper()} {i}\n"
+        for i, name in enumerate(flat['classes'])
+    )
+
+    return f"""/* Generated by EDA/src/forest_export.py -- do not edit by hand. */
+#ifndef {upper}_MODEL_H
+#define {upper}_MODEL_H
+
+#include <stdint.h>
+#ifdef __AVR__
+#include <avr/pgmspace.h>
+#else
+#define PROGMEM
+#define pgm_read_byte(addr) (*(const uint8_t *)(addr))
+#define pgm_read_word(addr) (*(const uint16_t *)(addr))
+#endif
+
+#define {upper}_N_FEATURES {flat['n_features']}
+#define {upper}_N_CLASSES {len(flat['classes'])}
+#define {upper}_N_TREES {len(flat['root'])}
+#define {upper}_N_NODES {len(flat['feature'])}
+#define {upper}_N_LEAF_ROWS {len(flat['leaf_proba'])}
+#define {upper}_PROBA_SCALE {flat['proba_scale']}
+#define {upper}_FEATURE_SHIFT {flat['feature_shift']}
+
+{class_defines}
+{_c_array('uint8_t', f'{prefix}_feature', f'{upper}_N_NODES', flat['feature'])}
+{_c_array('int16_t', f'{prefix}_threshold', f'{upper}_N_NODES', flat['threshold'])}
+{_c_array(index_type, f'{prefix}_children', f'2 * {upper}_N_NODES', flat['children'])}
+{_c_array(index_type, f'{prefix}_root', f'{upper}_N_TREES', flat['root'])}
+{_c_array('uint8_t', f'{prefix}_depth', f'{upper}_N_TREES', flat['depth'])}
+{_c_array('uint16_t', f'{prefix}_leaf_proba', f'{upper}_N_LEAF_ROWS * {upper}_N_CLASSES', flat['leaf_proba'].ravel())}
+/* x holds the raw ADC code of every feature; returns the class with the largest summed
+ * leaf probability, i.e. the forest's soft vote as in sklearn's predict(). */
+static inline uint8_t {prefix}_predict(const int16_t *x) {{
+  uint16_t scores[{upper}_N_CLASSES] = {{0}};  /* At most {upper}_PROBA_SCALE per tree */
+  for (uint16_t t = 0; t < {upper}_N_TREES; t++) {{
+    uint16_t node = {read_index}(&{prefix}_root[t]);
+    uint8_t depth = pgm_read_byte(&{prefix}_depth[t]);
+    for (uint8_t d = 0; d < depth; d++) {{
+      int16_t value = x[pgm_read_byte(&{prefix}_feature[node])] >> {upper}_FEATURE_SHIFT;
+      int16_t threshold = (int16_t)pgm_read_word(&{prefix}_threshold[node]);
+      node = {read_index}(&{prefix}_children[2 * node + (value > threshold)]);
+    }}
+    const uint16_t *proba = &{prefix}_leaf_proba[{read_index}(&{prefix}_children[2 * node + 1]) * {upper}_N_CLASSES];
+    for (uint8_t c = 0; c < {upper}_N_CLASSES; c++) scores[c] += pgm_read_word(&proba[c]);
+  }}
+  uint8_t best = 0;
+  for (uint8_t c = 1; c < {upper}_N_CLASSES; c++) {{
+    if (scores[c] > scores[best]) best = c;
+  }}
+  return best;
+}}
+
+#endif /* {upper}_MODEL_H */
+"""
+
+
+def print_memory_report(report):
+    """Print flash/SRAM usage against the ATmega328P budget."""
+    print(f"Trees: {report['n_trees']}, nodes: {report['n_nodes']}")
+    print(f"Flash: {report['flash_bytes']} / {report['flash_budget']} bytes "
+          f"({100.0 * report['flash_bytes'] / report['flash_budget']:.1f}%)")
+    print(f"SRAM:  {report['sram_bytes']} / {report['sram_budget']} bytes "
+          f"({100.0 * report['sram_bytes'] / report['sram_budget']:.1f}%)")
+    if not report['fits']:
+        print("WARNING: model does not fit on an ATmega328P")
+
+
+def write_header(flat, path, prefix='rf'):
+    """
+    Write an already flattened forest to a PROGMEM C header and report its memory use.
+
+    :param flat: Flattened forest from flatten_forest.
+    :param path: Output header path.
+    :param prefix: Prefix for every generated symbol.
+    :return: Memory report from estimate_memory.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as file:
+        file.write(render_header(flat, prefix=prefix))
+
+    report = estimate_memory(flat)
+    print(f"Exported {path}")
+    print_memory_report(report)
+    return report
+
+
+def export_forest_header(model, path, prefix='rf', feature_shift=0, merge_leaves=True):
+    """
+    Write a fitted forest or tree to a PROGMEM C header and report its memory use.
+
+    :param model: Fitted RandomForestClassifier or DecisionTreeClassifier trained on raw ADC codes.
+    :param path: Output header path.
+    :param prefix: Prefix for every generated symbol.
+    :param feature_shift: Right shift used to quantize inputs and thresholds.
+    :param merge_leaves: Collapse subtrees whose leaves all have the same probability row.
+    :return: Memory report from estimate_memory.
+    """
+    flat = flatten_forest(model, feature_shift=feature_shift, merge_leaves=merge_leaves)
+    return write_header(flat, path, prefix=prefix)
@@ -0,0 +1,59 @@
+import os
+import json
+import numpy as np
+
+
+def calibrate_thresholds(probs, classes, y, method='percentile', percentile=95, false_alarm_rate=0.05):
+    """
+    Derive one alarm threshold per class from a single matrix of predicted probabilities.
+
+    'percentile' takes the given percentile of each class's own probability column.
+    'false_alarm' picks the threshold that at most false_alarm_rate of the rows
+    belonging to other classes exceed.
+
+    :param probs: Output of clf.predict_proba(X), shape (n_samples, n_classes).
+    :param classes: clf.classes_, in the same order as the probability columns.
+    :param y: True labels for the rows of probs.
+    :param method: 'percentile' or 'false_alarm'.
+    :param percentile: Percentile used by the 'percentile' method.
+    :param false_alarm_rate: Target false-alarm rate used by the 'false_alarm' method.
+    :return: Dictionary mapping class to threshold.
+    """
+    classes = np.asarray(classes)
+
+    if method == 'percentile':
+        values = np.percentile(probs, percentile, axis=0)
+    elif method == 'false_alarm':
+        # Hide each class's own rows so the quantile only sees the other classes
+        own_rows = np.asarray(y)[:, None] == classes[None, :]
+        values = np.nanquantile(np.where(own_rows, np.nan, probs), 1.0 - false_alarm_rate, axis=0)
+    else:
+        raise ValueError(f"Unknown calibration method: {method}")
+
+    return {str(gas): float(value) for gas, value in zip(classes, values)}
+
+
+def thresholds_path(model_path):
+    """Return the thresholds file that sits next to a saved model."""
+    return f"{os.path.splitext(model_path)[0]}_thresholds.json"
+
+
+def save_thresholds(thresholds, model_path, method):
+    """
+    Persist thresholds next to the saved model.
+
+    :param thresholds: Dictionary mapping class to threshold.
+    :param model_path: Path of the saved model.
+    :param method: Calibration method used, stored for reference.
+    :return: Path of the written JSON file.
+    """
+    path = thresholds_path(model_path)
+    with open(path, 'w') as file:
+        json.dump({'method': method, 'thresholds': thresholds}, file, indent=2)
+    return path
+
+
+def load_thresholds(model_path):
+    """Load the thresholds saved next to a model."""
+    with open(thresholds_path(model_path), 'r') as file:
+        return json.load(file)['thresholds']
@@ -1,12 +1,107 @@
  
-from flask import Flask, request 
+import gzip 
+import json 
+import os 
+import sys 
+import time 
+import numpy as np 
+from flask import Flask, request, jsonify 
+from ring_buffer import DeviceStore, to_records 
 app = Flask(__name__) 
  
+# Bounded per-device history: at most 64 devices x 4096 readings each 
+store = DeviceStore(capacity=4096, max_devices=64) 
+ 
+# Optional label models for /predict, served by the NumPy-only lite_runtime (two directories up) 
+# so the server never imports scikit-learn; enabled with GAS_LITE_MODEL=<exported .npz> 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')) 
+import lite_runtime 
+models = lite_runtime.load(os.environ['GAS_LITE_MODEL']) if os.environ.get('GAS_LITE_MODEL') else None 
+ 
+def device_of(reading): 
+    # Devices key the ring buffers; numbers are stored as text so /gas_data/recent?device=<n> finds them 
+    device = reading.get('device', 'default') 
+    if isinstance(device, bool) or not isinstance(device, (str, int)): 
+        raise TypeError(f"device must be a string or an integer, got {type(device).__name__}") 
+    return str(device) 
+ 
 @app.route('/gas_data', methods=['POST']) 
 def receive_gas_data(): 
-    data = request.json 
+    data = request.get_json(silent=True) 
+    if not isinstance(data, dict): 
+        return "Expected a JSON object with gas_level", 400 
+    try: 
+        device = device_of(data) 
+        records = to_records([data], time.time()) 
+        store.append(device, records) 
+    except (KeyError, TypeError, ValueError) as e: 
+        return f"Invalid reading: {e}", 400 
     print(f"Received gas data: {data['gas_level']}") 
     return "Data received", 200 
  
+@app.route('/gas_data/bulk', methods=['POST']) 
+def receive_gas_data_bulk(): 
+    # Batched uploads: a JSON array of readings, optionally gzip-compressed 
+    body = request.get_data() 
+    try: 
+        if request.headers.get('Content-Encoding') == 'gzip': 
+            body = gzip.decompress(body) 
+        readings = json.loads(body) 
+    except (OSError, EOFError, ValueError) as e: 
+        return f"Invalid body: {e}", 400 
+    if not isinstance(readings, list): 
+        return "Expected a JSON array of readings", 400 
+ 
+    # Group by device so each ring buffer takes one vectorized write 
+    by_device = {} 
+    try: 
+        for reading in readings: 
+            if not isinstance(reading, dict): 
+                raise TypeError(f"expected an object, got {type(reading).__name__}") 
+            by_device.setdefault(device_of(reading), []).append(reading) 
+        # Every device's readings are converted before any is stored, so a bad reading rejects the whole upload 
+        now = time.time() 
+        records = {device: to_records(device_readings, now) for device, device_readings in by_device.items()} 
+    except (KeyError, TypeError, ValueError) as e: 
+        return f"Invalid reading: {e}", 400 
+    for device, device_records in records.items(): 
+        store.append(device, device_records) 
+ 
+    print(f"Received {len(readings)} gas readings from {len(by_device)} device(s)") 
+    return f"{len(readings)} readings received", 200 
+ 
+@app.route('/gas_data/recent', methods=['GET']) 
+def recent_gas_data(): 
+    device = request.args.get('device', 'default') 
+    n = request.args.get('n', 100, type=int) 
+    readings = store.recent(device, n) 
+    if readings is None: 
+        return f"Unknown device: {device}", 404 
+    return jsonify({ 
+        'device': device, 
+        'timestamp': readings['timestamp'].tolist(), 
+        'raw': readings['raw'].tolist(), 
+        'ppm': [p if p == p else None for p in readings['ppm'].tolist()], 
+    }) 
+ 
+@app.route('/predict', methods=['POST']) 
+def predict(): 
+    # Score a batch of [sensor_reading, ppm] rows with every loaded model 
+    if models is None: 
+        return "No model loaded; start the server with GAS_LITE_MODEL=<model.npz>", 503 
+    try: 
+        rows = np.asarray(request.json.get('readings', []), dtype=np.float64).reshape(-1, next(iter(models.values())).n_features) 
+    except (AttributeError, TypeError, ValueError) as e: 
+        return f"Expected readings as [[sensor_reading, ppm], ...]: {e}", 400 
+ 
+    predictions = {} 
+    for name, model in models.items(): 
+        output = model.predict(rows) 
+        if len(model.outputs) == 1: 
+            predictions[name] = output.tolist() 
+        else: 
+            predictions.update({label: output[:, i].tolist() for i, label in enumerate(model.outputs)}) 
+    return jsonify(predictions) 
+ 
 if __name__ == '__main__': 
     app.run(debug=True) 
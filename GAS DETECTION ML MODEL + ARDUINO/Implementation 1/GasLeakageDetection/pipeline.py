@@ -0,0 +1,172 @@
+import queue
+import threading
+import time
+
+POLICIES = ('drop_oldest', 'drop_newest', 'coalesce')
+
+
+class StageQueue:
+    """
+    Bounded hand-off between two pipeline stages that never blocks the producer.
+
+    When the queue is full the overflow policy decides what is lost:
+    'drop_oldest' discards the oldest queued item, 'drop_newest' discards the
+    incoming one, and 'coalesce' collapses the whole backlog into the incoming
+    (most recent) item.
+    """
+
+    def __init__(self, name, maxsize=256, policy='drop_oldest'):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overflow policy: {policy}")
+        self.name = name
+        self.policy = policy
+        self._queue = queue.Queue(maxsize)
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.high_water = 0
+
+    def put(self, item):
+        """
+        Enqueue an item without blocking, applying the overflow policy when full.
+
+        :param item: Item for the next stage.
+        """
+        with self._lock:
+            try:
+                self._queue.put_nowait(item)
+            except queue.Full:
+                if self.policy == 'drop_newest':
+                    self.dropped += 1
+                    return
+                if self.policy == 'drop_oldest':
+                    self._discard(1)
+                    self.dropped += 1
+                else:
+                    self.coalesced += self._discard(self._queue.qsize())
+                self._queue.put_nowait(item)
+
+            self.enqueued += 1
+            self.high_water = max(self.high_water, self._queue.qsize())
+
+    def _discard(self, count):
+        """Remove up to count queued items; return how many were removed."""
+        removed = 0
+        for _ in range(count):
+            try:
+                self._queue.get_nowait()
+                removed += 1
+            except queue.Empty:
+                break
+        return removed
+
+    def get(self, timeout):
+        """Return the next item, or raise queue.Empty after timeout seconds."""
+        return self._queue.get(timeout=timeout)
+
+    def metrics(self):
+        """Return a snapshot of the queue's backpressure counters."""
+        return {
+            'depth': self._queue.qsize(),
+            'high_water': self.high_water,
+            'enqueued': self.enqueued,
+            'dropped': self.dropped,
+            'coalesced': self.coalesced,
+        }
+
+
+class SerialPipeline:
+    """
+    Serial read -> parse -> infer -> publish, each stage on its own thread.
+
+    Stages are joined by bounded StageQueues, so a slow HTTP publisher fills
+    (and sheds from) its own queue instead of stalling the serial reader and
+    overflowing the UART buffer.
+    """
+
+    def __init__(self, read_line, parse, publish, infer=None, idle=None, maxsize=256, policy='drop_oldest'):
+        """
+        :param read_line: Blocking callable returning the next raw line from the serial port,
+                          or a batch of values (anything with a length; empty items are skipped).
+        :param parse: Callable turning a raw line into a reading, or None to skip the line.
+        :param publish: Callable sending one inferred reading to the server.
+        :param infer: Optional callable applied to each parsed reading before publishing.
+        :param idle: Optional callable run by the publish stage whenever its queue is empty
+                     (e.g. a batching publisher's time-based flush).
+        :param maxsize: Capacity of each inter-stage queue.
+        :param policy: Overflow policy shared by the queues ('drop_oldest', 'drop_newest', 'coalesce').
+        """
+        self.read_line = read_line
+        self.parse = parse
+        self.infer = infer if infer is not None else (lambda reading: reading)
+        self.publish = publish
+        self.idle = idle
+
+        self.queues = [StageQueue(name, maxsize, policy) for name in ('parse', 'infer', 'publish')]
+        self.errors = {'read': 0, 'parse': 0, 'infer': 0, 'publish': 0}
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        """Start one daemon thread per stage."""
+        parse_queue, infer_queue, publish_queue = self.queues
+        workers = [
+            ('read', self._read_loop, (parse_queue,)),
+            ('parse', self._stage_loop, ('parse', parse_queue, self.parse, infer_queue)),
+            ('infer', self._stage_loop, ('infer', infer_queue, self.infer, publish_queue)),
+            ('publish', self._stage_loop, ('publish', publish_queue, self.publish, None, self.idle)),
+        ]
+        for name, target, args in workers:
+            thread = threading.Thread(target=target, args=args, name=f"pipeline-{name}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self, timeout=2.0):
+        """Ask every stage to finish and wait for them."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _read_loop(self, output):
+        while not self._stop.is_set():
+            try:
+                line = self.read_line()
+            except Exception as e:
+                self.errors['read'] += 1
+                print(f"Serial read error: {e}")
+                time.sleep(0.1)
+                continue
+            if line is not None and len(line):
+                output.put(line)
+
+    def _stage_loop(self, name, source, work, output, idle=None):
+        while not self._stop.is_set():
+            try:
+                item = source.get(timeout=0.1)
+            except queue.Empty:
+                if idle is not None:
+                    try:
+                        idle()
+                    except Exception as e:
+                        self.errors[name] += 1
+                        print(f"{name} stage error: {e}")
+                continue
+            try:
+                result = work(item)
+            except Exception as e:
+                self.errors[name] += 1
+                print(f"{name} stage error: {e}")
+                continue
+            if output is not None and result is not None:
+                output.put(result)
+
+    def metrics(self):
+        """
+        Return backpressure metrics for every queue plus per-stage error counts.
+
+        :return: Dictionary keyed by queue name, with an 'errors' entry.
+        """
+        snapshot = {q.name: q.metrics() for q in self.queues}
+        snapshot['errors'] = dict(self.errors)
+        return snapshot
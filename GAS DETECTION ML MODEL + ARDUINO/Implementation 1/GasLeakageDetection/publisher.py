@@ -0,0 +1,113 @@
+import gzip
+import json
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class BatchPublisher:
+    """
+    Upload readings in batches over one pooled, keep-alive HTTP session.
+
+    Readings are buffered and sent as a single JSON array once max_batch
+    readings are waiting or flush_interval seconds have passed since the last
+    upload, optionally gzip-compressed.
+    """
+
+    def __init__(self, url, max_batch=100, flush_interval=1.0, compress=False, pool_size=4, timeout=5.0):
+        """
+        :param url: Bulk endpoint, e.g. http://localhost:5000/gas_data/bulk
+        :param max_batch: Upload as soon as this many readings are buffered.
+        :param flush_interval: Upload buffered readings at least this often, in seconds.
+        :param compress: Gzip the JSON body and send Content-Encoding: gzip.
+        :param pool_size: Maximum number of pooled connections to the server.
+        :param timeout: Request timeout in seconds.
+        """
+        self.url = url
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.compress = compress
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size,
+                              # Only connection failures are retried, so a batch is never posted twice
+                              max_retries=Retry(total=2, connect=2, read=0, status=0, backoff_factor=0.2,
+                                                allowed_methods=None))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._batch = []
+        self._last_flush = time.monotonic()
+        self.sent_batches = 0
+        self.sent_readings = 0
+        self.sent_bytes = 0
+        self.failed_readings = 0
+
+    def publish(self, reading):
+        """
+        Buffer one reading and upload the batch if it is full or overdue.
+
+        :param reading: JSON-serializable reading.
+        """
+        self._batch.append(reading)
+        if len(self._batch) >= self.max_batch:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def publish_many(self, readings):
+        """
+        Buffer several readings at once and upload if the batch is full or overdue.
+
+        :param readings: List of JSON-serializable readings.
+        """
+        self._batch.extend(readings)
+        if len(self._batch) >= self.max_batch:
+            self.flush()
+        else:
+            self.flush_if_due()
+
+    def flush_if_due(self):
+        """Upload the buffered readings if flush_interval has elapsed."""
+        if self._batch and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """
+        Upload every buffered reading as one JSON array.
+
+        :return: The server response, or None if nothing was buffered.
+        """
+        self._last_flush = time.monotonic()
+        if not self._batch:
+            return None
+
+        batch, self._batch = self._batch, []
+        body = json.dumps(batch).encode('utf-8')
+        headers = {'Content-Type': 'application/json'}
+        if self.compress:
+            body = gzip.compress(body)
+            headers['Content-Encoding'] = 'gzip'
+
+        try:
+            response = self.session.post(self.url, data=body, headers=headers, timeout=self.timeout)
+            response.raise_for_status()
+        except requests.RequestException:
+            # Drop the batch rather than let the buffer grow while the server is down
+            self.failed_readings += len(batch)
+            raise
+
+        self.sent_batches += 1
+        self.sent_readings += len(batch)
+        self.sent_bytes += len(body)
+        return response
+
+    def close(self):
+        """Upload anything still buffered and release pooled connections."""
+        try:
+            self.flush()
+        finally:
+            self.session.close()
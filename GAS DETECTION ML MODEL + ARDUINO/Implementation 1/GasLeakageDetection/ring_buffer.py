@@ -0,0 +1,128 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+READING_DTYPE = np.dtype([('timestamp', 'f8'), ('raw', 'u2'), ('ppm', 'f4')])
+
+
+class RingBuffer:
+    """
+    Fixed-capacity buffer of readings backed by one preallocated structured array.
+
+    Once full, new readings overwrite the oldest ones, so memory use never grows.
+    """
+
+    def __init__(self, capacity):
+        self._data = np.zeros(capacity, dtype=READING_DTYPE)
+        self._head = 0  # Index of the next slot to write
+        self._size = 0
+
+    @property
+    def capacity(self):
+        return len(self._data)
+
+    def __len__(self):
+        return self._size
+
+    def extend(self, records):
+        """
+        Append readings in at most two slice assignments.
+
+        :param records: Structured array with READING_DTYPE fields.
+        """
+        records = records[-self.capacity:]
+        n = len(records)
+        first = min(n, self.capacity - self._head)
+        self._data[self._head:self._head + first] = records[:first]
+        self._data[:n - first] = records[first:]
+
+        self._head = (self._head + n) % self.capacity
+        self._size = min(self._size + n, self.capacity)
+
+    def recent(self, n):
+        """
+        Return the newest n readings as views into the buffer, oldest first.
+
+        :param n: Number of readings wanted.
+        :return: List of one or two structured-array views (two when the range wraps).
+        """
+        n = min(n, self._size)
+        start = self._head - n
+        if start >= 0:
+            return [self._data[start:self._head]]
+        return [self._data[start:], self._data[:self._head]]
+
+
+class DeviceStore:
+    """
+    One RingBuffer per device, with at most max_devices devices kept.
+
+    When a new device arrives and the store is full, the device that has gone
+    longest without a reading is evicted, so memory stays bounded at roughly
+    max_devices * capacity * READING_DTYPE.itemsize bytes.
+    """
+
+    def __init__(self, capacity=4096, max_devices=64):
+        self.capacity = capacity
+        self.max_devices = max_devices
+        self._buffers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def append(self, device, records):
+        """
+        Store readings for a device.
+
+        :param device: Device identifier.
+        :param records: Structured array with READING_DTYPE fields.
+        """
+        with self._lock:
+            buffer = self._buffers.get(device)
+            if buffer is None:
+                if len(self._buffers) >= self.max_devices:
+                    self._buffers.popitem(last=False)
+                buffer = self._buffers[device] = RingBuffer(self.capacity)
+            else:
+                self._buffers.move_to_end(device)
+            buffer.extend(records)
+
+    def recent(self, device, n):
+        """
+        Return a copy of the newest n readings of a device, oldest first.
+
+        The copy is taken under the lock: views would be overwritten by appends
+        from other request threads while the caller is still reading them.
+
+        :param device: Device identifier.
+        :param n: Number of readings wanted.
+        :return: Structured array with READING_DTYPE fields, or None for an unknown device.
+        """
+        with self._lock:
+            buffer = self._buffers.get(device)
+            return None if buffer is None else np.concatenate(buffer.recent(n))
+
+    def devices(self):
+        """Return the known device identifiers, least recently updated first."""
+        with self._lock:
+            return list(self._buffers)
+
+
+def to_records(readings, default_timestamp):
+    """
+    Convert a list of reading dictionaries into a structured array.
+
+    :param readings: Dictionaries with 'gas_level' and optional 'ppm' and 'timestamp'.
+    :param default_timestamp: Timestamp used for readings that do not carry one.
+    :return: Structured array with READING_DTYPE fields.
+    :raises ValueError: If a gas_level is not a number within the uint16 range of 'raw'.
+    """
+    raw = np.array([float(r['gas_level']) for r in readings], dtype=np.float64)
+    limit = np.iinfo(READING_DTYPE['raw']).max
+    if not np.all((raw >= 0) & (raw <= limit)):
+        raise ValueError(f"gas_level must be between 0 and {limit}")
+
+    records = np.empty(len(readings), dtype=READING_DTYPE)
+    records['timestamp'] = [r.get('timestamp', default_timestamp) for r in readings]
+    records['raw'] = raw.astype(READING_DTYPE['raw'])
+    records['ppm'] = [r.get('ppm', np.nan) for r in readings]
+    return records
@@ -1,13 +1,42 @@
  
+import os 
+import sys 
 import serial 
-import requests 
 import time 
+from pipeline import SerialPipeline 
+from publisher import BatchPublisher 
  
-arduino = serial.Serial('/dev/ttyUSB0', 9600) 
-server_url = "http://localhost:5000/gas_data" 
+# serial_reader.py lives with the other host-side helpers two directories up 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')) 
+from serial_reader import SerialValueReader 
  
-while True: 
-    gas_data = arduino.readline().decode('utf-8').strip() 
-    response = requests.post(server_url, json={"gas_level": gas_data}) 
-    print(f"Sent gas data: {gas_data}, Server Response: {response.text}") 
-    time.sleep(1) 
+arduino = serial.Serial('/dev/ttyUSB0', 9600, timeout=0.5) 
+server_url = "http://localhost:5000/gas_data/bulk" 
+ 
+# One pooled keep-alive session; readings go up as one gzip'd JSON array per second or per 100 readings 
+publisher = BatchPublisher(server_url, max_batch=100, flush_interval=1.0, compress=True) 
+ 
+# Drains everything the port has buffered per read and parses all complete lines at once 
+reader = SerialValueReader(arduino) 
+ 
+ 
+def parse_gas_levels(values): 
+    timestamp = time.time() 
+    return [{"gas_level": int(value), "timestamp": timestamp} for value in values] 
+ 
+ 
+# Serial reading, parsing and HTTP publishing run on separate threads joined by 
+# bounded queues, so a slow server never stalls the serial reader 
+pipeline = SerialPipeline(reader.read_values, parse_gas_levels, publisher.publish_many, 
+                          idle=publisher.flush_if_due, policy='drop_oldest') 
+pipeline.start() 
+ 
+try: 
+    while True: 
+        time.sleep(10) 
+        print(f"Pipeline metrics: {pipeline.metrics()}, " 
+              f"sent {publisher.sent_readings} readings in {publisher.sent_batches} batches, " 
+              f"{reader.discarded_bytes} serial bytes discarded") 
+except KeyboardInterrupt: 
+    pipeline.stop() 
+    publisher.close() 
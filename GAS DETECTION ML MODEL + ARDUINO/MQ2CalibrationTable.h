@@ -0,0 +1,87 @@
+/* Generated by mq2_calibration.py -- do not edit by hand.
+ * LPG concentration (PPM, rounded up and saturated to 65535) for every 10-bit ADC code.
+ * re_implementation.c's curve: 10^((log10((1023 - x) / x) - 0.6) / -0.4)
+ */
+#ifndef MQ2_CALIBRATION_TABLE_H
+#define MQ2_CALIBRATION_TABLE_H
+
+#include <stdint.h>
+#ifdef __AVR__
+#include <avr/pgmspace.h>
+#else
+#define PROGMEM
+#define pgm_read_word(addr) (*(const uint16_t *)(addr))
+#endif
+
+static const uint16_t MQ2_PPM_LPG[1024] PROGMEM = {
+  0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
+  1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
+  1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
+  1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
+  1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
+  1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
+  1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
+  1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
+  1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
+  1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
+  1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
+  1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1,
+  1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 2, 2,
+  2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2,
+  2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2,
+  2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 2, 3,
+  3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3,
+  3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 3, 4,
+  4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4, 4,
+  4, 4, 4, 4, 4, 4, 4, 4, 5, 5, 5, 5, 5, 5, 5, 5,
+  5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 5, 6, 6, 6, 6, 6,
+  6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 6, 7, 7, 7, 7,
+  7, 7, 7, 7, 7, 7, 7, 7, 7, 7, 8, 8, 8, 8, 8, 8,
+  8, 8, 8, 8, 8, 8, 8, 9, 9, 9, 9, 9, 9, 9, 9, 9,
+  9, 9, 10, 10, 10, 10, 10, 10, 10, 10, 10, 10, 11, 11, 11, 11,
+  11, 11, 11, 11, 11, 11, 12, 12, 12, 12, 12, 12, 12, 12, 13, 13,
+  13, 13, 13, 13, 13, 13, 14, 14, 14, 14, 14, 14, 14, 15, 15, 15,
+  15, 15, 15, 15, 16, 16, 16, 16, 16, 16, 16, 17, 17, 17, 17, 17,
+  17, 18, 18, 18, 18, 18, 18, 19, 19, 19, 19, 19, 20, 20, 20, 20,
+  20, 21, 21, 21, 21, 21, 22, 22, 22, 22, 22, 23, 23, 23, 23, 24,
+  24, 24, 24, 24, 25, 25, 25, 25, 26, 26, 26, 26, 27, 27, 27, 27,
+  28, 28, 28, 28, 29, 29, 29, 30, 30, 30, 30, 31, 31, 31, 32, 32,
+  32, 33, 33, 33, 34, 34, 34, 35, 35, 35, 36, 36, 36, 37, 37, 37,
+  38, 38, 38, 39, 39, 40, 40, 40, 41, 41, 41, 42, 42, 43, 43, 44,
+  44, 44, 45, 45, 46, 46, 47, 47, 48, 48, 48, 49, 49, 50, 50, 51,
+  51, 52, 52, 53, 53, 54, 54, 55, 56, 56, 57, 57, 58, 58, 59, 60,
+  60, 61, 61, 62, 63, 63, 64, 64, 65, 66, 66, 67, 68, 68, 69, 70,
+  70, 71, 72, 73, 73, 74, 75, 76, 76, 77, 78, 79, 79, 80, 81, 82,
+  83, 83, 84, 85, 86, 87, 88, 89, 90, 91, 91, 92, 93, 94, 95, 96,
+  97, 98, 99, 100, 101, 102, 103, 104, 106, 107, 108, 109, 110, 111, 112, 113,
+  115, 116, 117, 118, 120, 121, 122, 123, 125, 126, 127, 129, 130, 131, 133, 134,
+  136, 137, 138, 140, 141, 143, 145, 146, 148, 149, 151, 152, 154, 156, 157, 159,
+  161, 163, 164, 166, 168, 170, 172, 174, 175, 177, 179, 181, 183, 185, 187, 190,
+  192, 194, 196, 198, 200, 203, 205, 207, 210, 212, 214, 217, 219, 222, 224, 227,
+  229, 232, 235, 237, 240, 243, 246, 248, 251, 254, 257, 260, 263, 266, 269, 273,
+  276, 279, 282, 286, 289, 292, 296, 299, 303, 307, 310, 314, 318, 322, 326, 330,
+  334, 338, 342, 346, 350, 354, 359, 363, 368, 372, 377, 382, 386, 391, 396, 401,
+  406, 411, 416, 422, 427, 433, 438, 444, 449, 455, 461, 467, 473, 479, 485, 492,
+  498, 505, 512, 518, 525, 532, 539, 546, 554, 561, 569, 576, 584, 592, 600, 608,
+  617, 625, 634, 643, 652, 661, 670, 679, 689, 699, 708, 718, 729, 739, 750, 760,
+  771, 782, 794, 805, 817, 829, 841, 854, 866, 879, 892, 906, 919, 933, 947, 962,
+  976, 991, 1006, 1022, 1038, 1054, 1070, 1087, 1104, 1121, 1139, 1157, 1175, 1194, 1213, 1233,
+  1253, 1273, 1294, 1315, 1337, 1359, 1381, 1404, 1428, 1452, 1476, 1502, 1527, 1553, 1580, 1607,
+  1635, 1664, 1693, 1722, 1753, 1784, 1816, 1848, 1882, 1916, 1950, 1986, 2022, 2060, 2098, 2137,
+  2177, 2218, 2260, 2303, 2347, 2392, 2439, 2486, 2535, 2585, 2636, 2688, 2742, 2797, 2854, 2912,
+  2971, 3032, 3095, 3160, 3226, 3294, 3364, 3436, 3510, 3586, 3664, 3744, 3826, 3911, 3999, 4089,
+  4181, 4277, 4375, 4476, 4580, 4688, 4798, 4913, 5030, 5152, 5277, 5406, 5540, 5678, 5820, 5967,
+  6119, 6277, 6439, 6607, 6781, 6961, 7148, 7341, 7541, 7748, 7963, 8185, 8416, 8656, 8905, 9163,
+  9432, 9711, 10000, 10302, 10616, 10943, 11283, 11637, 12006, 12391, 12793, 13212, 13650, 14108, 14586, 15086,
+  15609, 16157, 16731, 17332, 17963, 18625, 19320, 20051, 20819, 21627, 22478, 23375, 24320, 25318, 26372, 27486,
+  28664, 29911, 31233, 32636, 34125, 35707, 37391, 39183, 41095, 43135, 45315, 47648, 50147, 52828, 55707, 58805,
+  62142, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535,
+  65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535,
+  65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535, 65535
+};
+
+static inline uint16_t mq2PPMFromCode(uint16_t code) {
+  return pgm_read_word(&MQ2_PPM_LPG[code > 1023 ? 1023 : code]);
+}
+
+#endif /* MQ2_CALIBRATION_TABLE_H */
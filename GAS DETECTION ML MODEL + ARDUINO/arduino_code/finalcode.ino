@@ -1,5 +1,14 @@
 #include <Servo.h>         // Include the Servo library
 #include <SoftwareSerial.h> // Include SoftwareSerial library
+#include "telemetry_frame.h"    // Binary telemetry frame (decoded by telemetry.py)
+#include "gas_logic.h"          // calculatePPM and the label functions (checked by firmware_parity.py)
+#include "sim800_driver.h"      // Non-blocking SMS / call queue
+
+// 1 = send one 20-byte binary frame per reading (test2.py --binary), 0 = human-readable lines for
+// the serial monitor and test1.py / test2.py
+#ifndef TELEMETRY_BINARY
+#define TELEMETRY_BINARY 0
+#endif
 
 // Pin definitions
 #define SIM800_TX 2
@@ -11,80 +20,65 @@
 // Threshold for gas detection
 int gasThreshold = 150;
 
+const unsigned long SAMPLE_PERIOD = 500;    // One reading every 500 ms, also during an alert
+const unsigned long SERVO_HOLD = 2000;      // Servo stays at 90 degrees at least this long
+const unsigned long ALERT_REPEAT = 60000;   // At most one SMS and one call per minute while the risk lasts
+const unsigned long CALL_DURATION = 20000;
+
 // SIM800C setup
 SoftwareSerial sim800SS(SIM800_TX, SIM800_RX);
+Sim800 modem;
 char PHONE_1[21] = "7004012040"; // Replace with your phone number
 char gasalert[141] = "Gas Leakage Detected";
 
 // Servo setup
 Servo myServo;
 
-// Function to calculate PPM from raw sensor reading
-float calculatePPM(int rawValue) {
-  float voltage = (rawValue / 1024.0) * 5.0; // Convert to voltage (assuming 5V system)
-  float ppm = voltage * 100;                // Example conversion, tune based on calibration
-  return ppm;
-}
-
-// Functions for label determination
-int determineLeakSeverity(float ppm) {
-  if (ppm > 300) return 1; // Low
-  if (ppm > 150) return 2; // Medium
-  return 3;                // High
-}
-
-int determineFireRisk(float ppm) {
-  if (ppm > 250) return 1; // Low
-  return 2;                // High
-}
-
-int determineFlammability(float ppm) {
-  if (ppm > 250) return 1; // Low
-  return 2;                // High
-}
-
 String determineGasType(float ppm) {
-  if (ppm > 150) return "Non-flammable";
+  if (determineGasTypeCode(ppm)) return "Non-flammable";
   return "Flammable";
 }
 
-// Function to send SMS
-void send_sms(String phone, String message) {
-  sim800SS.println("AT+CMGF=1"); // Set SMS mode
-  delay(100);
-  sim800SS.println("AT+CMGS=\"" + phone + "\"");
-  delay(100);
-  sim800SS.print(message);
-  sim800SS.write(26); // Send Ctrl+Z to send SMS
-  delay(5000); // Wait for SMS to send
-  Serial.println("SMS Sent!");
-}
+uint16_t telemetrySeq = 0;
 
-// Function to make a call
-void make_call(String phone) {
-  sim800SS.println("ATD" + phone + ";");
-  delay(20000); // Wait for call duration
-  sim800SS.println("ATH"); // Hang up
-  delay(1000);
-  Serial.println("Call Ended!");
+// Send one binary telemetry frame with the reading and all labels
+void sendTelemetry(int gasLevel, float ppm, int leakSeverity, int fireRisk, int flammability, int gasTypeCode) {
+  uint8_t frame[TELEMETRY_FRAME_LEN];
+  uint8_t len = telemetryEncode(frame, telemetrySeq++, millis(), gasLevel, telemetryPPMx10(ppm),
+                                leakSeverity, fireRisk, flammability, gasTypeCode);
+  Serial.write(frame, len);
 }
 
-// Function to send multiple SMS
-void send_multi_sms() {
-  Serial.println("Sending SMS...");
-  send_sms(PHONE_1, gasalert);
+// Queue the SMS and the call; repeats while they are pending or within ALERT_REPEAT are coalesced
+void send_alerts() {
+  sim800QueueSms(&modem, 0, PHONE_1, gasalert);
+  sim800QueueCall(&modem, 1, PHONE_1);
 }
 
-// Function to make multiple calls
-void make_multi_call() {
-  Serial.println("Making call...");
-  make_call(PHONE_1);
+// Report finished alerts and their latency from the first time they were queued
+// (text only: in TELEMETRY_BINARY builds the serial stream carries nothing but frames)
+void report_alerts() {
+#if !TELEMETRY_BINARY
+  static uint16_t sent = 0;
+  static uint16_t failed = 0;
+  if (modem.sent != sent) {
+    sent = modem.sent;
+    Serial.print("Alert sent in ");
+    Serial.print(modem.lastLatencyMs);
+    Serial.println(" ms");
+  }
+  if (modem.failed != failed) {
+    failed = modem.failed;
+    Serial.println("Alert failed!");
+  }
+#endif
 }
 
 void setup() {
   // Initialize serial communication
   Serial.begin(9600);
   sim800SS.begin(9600);
+  sim800Begin(&modem, &sim800SS, ALERT_REPEAT, CALL_DURATION);
 
   // Initialize Servo
   myServo.attach(10);  // Attach servo to pin 10
@@ -94,25 +88,42 @@ void setup() {
   pinMode(RELAY_PIN, OUTPUT);
   pinMode(BUZZER_PIN, OUTPUT);
 
+#if !TELEMETRY_BINARY
   Serial.println("System Ready!");
+#endif
 }
 
+unsigned long lastSample = 0;
+unsigned long servoMovedAt = 0;
+bool servoClosed = false;
+
 void loop() {
+  // The modem is serviced on every pass, so an SMS or call never stops the sampling
+  sim800Poll(&modem);
+  report_alerts();
+
+  if (millis() - lastSample < SAMPLE_PERIOD) return;
+  lastSample = millis();
+
   int gasLevel = analogRead(GAS_SENSOR_PIN); // Read gas sensor value
   float ppm = calculatePPM(gasLevel);       // Calculate PPM from raw sensor value
 
-  // Print readings to serial monitor
-  Serial.print("Gas Level (Raw): ");
-  Serial.println(gasLevel);
-  Serial.print("Gas Level (PPM): ");
-  Serial.println(ppm);
-
   // Determine labels
   int leakSeverity = determineLeakSeverity(ppm);
   int fireRisk = determineFireRisk(ppm);
   int flammability = determineFlammability(ppm);
+
+#if TELEMETRY_BINARY
+  sendTelemetry(gasLevel, ppm, leakSeverity, fireRisk, flammability, determineGasTypeCode(ppm));
+#else
   String gasType = determineGasType(ppm);
 
+  // Print readings to serial monitor
+  Serial.print("Gas Level (Raw): ");
+  Serial.println(gasLevel);
+  Serial.print("Gas Level (PPM): ");
+  Serial.println(ppm);
+
   // Print labels to serial monitor
   Serial.print("Leak Severity: ");
   Serial.println(leakSeverity);
@@ -122,23 +133,29 @@ void loop() {
   Serial.println(flammability);
   Serial.print("Gas Type: ");
   Serial.println(gasType);
+#endif
 
   // Perform actions based on fire risk
   if (fireRisk == 2) {
-    // High fire risk detected
+    // High fire risk detected (binary frames already carry fireRisk)
+#if !TELEMETRY_BINARY
     Serial.println("High fire risk detected!");
-    myServo.write(90);          // Move servo to 90 degrees
-    delay(2000);                // Keep servo at 90 degrees for 2 seconds
+#endif
+    if (!servoClosed) {
+      myServo.write(90);        // Move servo to 90 degrees
+      servoClosed = true;
+      servoMovedAt = millis();
+    }
     digitalWrite(RELAY_PIN, HIGH);  // Activate relay
     digitalWrite(BUZZER_PIN, HIGH); // Activate buzzer
-    send_multi_sms();           // Send SMS alert
-    make_multi_call();          // Make call alert
-    myServo.write(0);           // Reset servo position
+    send_alerts();              // Queue SMS and call alerts
   } else {
     // No fire risk, reset relay and buzzer
     digitalWrite(RELAY_PIN, LOW);
     digitalWrite(BUZZER_PIN, LOW);
+    if (servoClosed && millis() - servoMovedAt >= SERVO_HOLD) {
+      myServo.write(0);         // Reset servo position
+      servoClosed = false;
+    }
   }
-
-  delay(500); // Delay before next reading
 }
@@ -0,0 +1,55 @@
+// Reading conversion and label logic shared by finalcode.ino and re_implementation.c
+//
+// Everything here is a pure function of the reading, so firmware_parity.py can build
+// it with host gcc (against host/Arduino.h) and replay every ADC code through it and
+// the Python references. Constants are float literals: on AVR double is float anyway,
+// and this way the host build rounds exactly like the board does.
+#ifndef GAS_LOGIC_H
+#define GAS_LOGIC_H
+
+#include <Arduino.h>
+
+// Function to calculate PPM from raw sensor reading
+static float calculatePPM(int rawValue) {
+  float voltage = (rawValue / 1024.0f) * 5.0f; // Convert to voltage (assuming 5V system)
+  float ppm = voltage * 100;                 // Example conversion, tune based on calibration
+  return ppm;
+}
+
+// Functions for label determination
+static int determineLeakSeverity(float ppm) {
+  if (ppm > 300) return 1; // Low
+  if (ppm > 150) return 2; // Medium
+  return 3;                // High
+}
+
+static int determineFireRisk(float ppm) {
+  if (ppm > 250) return 1; // Low
+  return 2;                // High
+}
+
+static int determineFlammability(float ppm) {
+  if (ppm > 250) return 1; // Low
+  return 2;                // High
+}
+
+// Gas type as a label code for telemetry: 0 = Flammable, 1 = Non-flammable
+static int determineGasTypeCode(float ppm) {
+  if (ppm > 150) return 1;
+  return 0;
+}
+
+// Gas type as a label code for telemetry: 0 = LPG/Propane, 1 = Smoke/CO, 2 = Unknown Combustible
+static byte classifyGasTypeCode(float ppm, float rate) {
+  if (rate > 50 && ppm > 1000) return 0;
+  if (rate > 20 && ppm < 1000) return 1;
+  return 2;
+}
+
+// Temperature-compensated reading as an index into MQ2CalibrationTable.h (example formula)
+static int compensatedCode(int raw, float temperature) {
+  float compensated = raw * (1 + (25 - temperature) * 0.02f);
+  return constrain((int)(compensated + 0.5f), 0, 1023);
+}
+
+#endif // GAS_LOGIC_H
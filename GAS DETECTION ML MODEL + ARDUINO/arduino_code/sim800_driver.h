@@ -0,0 +1,292 @@
+// Non-blocking SIM800 driver: a fixed-size queue of SMS and call alerts
+//
+// sim800QueueSms() / sim800QueueCall() only copy an alert into the queue and return.
+// sim800Poll(), called from loop() or a scheduler task every few tens of ms, reads
+// whatever the modem has answered, advances the current AT exchange by one state and
+// gives up on a step the modem does not answer in time, so the sketch keeps sampling
+// while an SMS or call is in progress.
+//
+// Alerts carry a caller-chosen key (0 .. SIM800_KEYS - 1, larger keys wrap). A new alert
+// whose key is already in the queue is coalesced into it (the newer text wins) unless that
+// alert's text is already on the wire, and a key
+// that was delivered less than repeatMs ago waits until then, so a condition that
+// re-triggers every sample produces one message per repeatMs instead of a flood.
+// Delivery latency runs from the first time an alert was queued, or from the end of
+// its key's repeatMs wait if that is later, to the modem's OK.
+#ifndef SIM800_DRIVER_H
+#define SIM800_DRIVER_H
+
+#include <Arduino.h>
+#include <string.h>
+
+#ifndef SIM800_QUEUE_SIZE
+#define SIM800_QUEUE_SIZE 4
+#endif
+#ifndef SIM800_MESSAGE_LEN
+#define SIM800_MESSAGE_LEN 96      // Including the terminating zero
+#endif
+#define SIM800_LINE_LEN 32         // Only the start of a response line is needed to classify it
+#define SIM800_KEYS 8
+
+#define SIM800_COMMAND_TIMEOUT 5000   // OK / prompt after a command
+#define SIM800_SEND_TIMEOUT 60000     // +CMGS after the message; the network can be slow
+#define SIM800_RETRY_DELAY 10000
+#define SIM800_ATTEMPTS 3
+
+enum { SIM800_SMS, SIM800_CALL };
+
+enum {
+  SIM800_IDLE,
+  SIM800_SMS_MODE,     // AT+CMGF=1 sent
+  SIM800_SMS_PROMPT,   // AT+CMGS sent, waiting for '>'
+  SIM800_SMS_BODY,     // Message and Ctrl+Z sent, waiting for +CMGS / OK
+  SIM800_CALL_DIAL,    // ATD sent
+  SIM800_CALL_ACTIVE,  // Ringing / talking until callMs has passed
+  SIM800_CALL_HANGUP,  // ATH sent
+};
+
+enum { SIM800_NONE, SIM800_OK, SIM800_ERROR, SIM800_PROMPT, SIM800_HANGUP };
+
+typedef struct {
+  uint8_t kind;
+  uint8_t key;
+  uint8_t attempts;
+  uint16_t repeats;                  // Alerts coalesced into this one
+  uint32_t queuedMs;
+  uint32_t notBeforeMs;              // Retry delay
+  const char *phone;
+  char message[SIM800_MESSAGE_LEN];  // SMS text, unused for calls
+} Sim800Alert;
+
+typedef struct {
+  Stream *port;
+  uint32_t repeatMs;                 // Least time between two deliveries of the same key
+  uint32_t callMs;                   // How long a call rings before hanging up
+
+  Sim800Alert queue[SIM800_QUEUE_SIZE];
+  uint8_t head;
+  uint8_t count;
+  uint8_t state;
+  uint32_t stateMs;
+  char line[SIM800_LINE_LEN];
+  uint8_t lineLength;
+  uint8_t deliveredKeys;             // Bit per key delivered at least once
+  uint32_t deliveredMs[SIM800_KEYS];
+
+  uint16_t sent;
+  uint16_t failed;                   // Given up after SIM800_ATTEMPTS
+  uint16_t dropped;                  // Queue full
+  uint16_t coalesced;
+  uint32_t lastLatencyMs;
+  uint32_t maxLatencyMs;
+} Sim800;
+
+static void sim800Begin(Sim800 *modem, Stream *port, uint32_t repeatMs, uint32_t callMs) {
+  memset(modem, 0, sizeof(*modem));
+  modem->port = port;
+  modem->repeatMs = repeatMs;
+  modem->callMs = callMs;
+}
+
+static bool sim800Queue(Sim800 *modem, uint8_t kind, uint8_t key, const char *phone, const char *message) {
+  key %= SIM800_KEYS;
+  // The head may be in progress: its text is only read at the '>' prompt, so a newer one
+  // still goes out if it arrives before then. Once the text has been sent it would be lost
+  // uncounted if the send succeeds, so the new alert is queued behind it instead.
+  for (uint8_t i = 0; i < modem->count; i++) {
+    if (i == 0 && modem->state == SIM800_SMS_BODY) continue;
+    Sim800Alert *alert = &modem->queue[(modem->head + i) % SIM800_QUEUE_SIZE];
+    if (alert->kind == kind && alert->key == key && strcmp(alert->phone, phone) == 0) {
+      strncpy(alert->message, message, SIM800_MESSAGE_LEN - 1);
+      alert->repeats++;
+      modem->coalesced++;
+      return true;
+    }
+  }
+  if (modem->count == SIM800_QUEUE_SIZE) {
+    modem->dropped++;
+    return false;
+  }
+
+  Sim800Alert *alert = &modem->queue[(modem->head + modem->count) % SIM800_QUEUE_SIZE];
+  memset(alert, 0, sizeof(*alert));
+  alert->kind = kind;
+  alert->key = key;
+  alert->phone = phone;
+  alert->queuedMs = millis();
+  alert->notBeforeMs = alert->queuedMs;
+  strncpy(alert->message, message, SIM800_MESSAGE_LEN - 1);
+  modem->count++;
+  return true;
+}
+
+static bool sim800QueueSms(Sim800 *modem, uint8_t key, const char *phone, const char *message) {
+  return sim800Queue(modem, SIM800_SMS, key, phone, message);
+}
+
+static bool sim800QueueCall(Sim800 *modem, uint8_t key, const char *phone) {
+  return sim800Queue(modem, SIM800_CALL, key, phone, "");
+}
+
+static void sim800Enter(Sim800 *modem, uint8_t state) {
+  modem->state = state;
+  modem->stateMs = millis();
+}
+
+static void sim800Finish(Sim800 *modem, bool delivered) {
+  Sim800Alert *alert = &modem->queue[modem->head];
+  uint32_t now = millis();
+  modem->state = SIM800_IDLE;
+
+  if (!delivered && ++alert->attempts < SIM800_ATTEMPTS) {
+    alert->notBeforeMs = now + SIM800_RETRY_DELAY;  // Stays at the head
+    return;
+  }
+  if (delivered) {
+    uint32_t since = alert->queuedMs;
+    if (modem->deliveredKeys & (1 << alert->key)) {
+      uint32_t allowed = modem->deliveredMs[alert->key] + modem->repeatMs;
+      if ((int32_t)(allowed - since) > 0) since = allowed;
+    }
+    modem->sent++;
+    modem->lastLatencyMs = now - since;
+    if (modem->lastLatencyMs > modem->maxLatencyMs) modem->maxLatencyMs = modem->lastLatencyMs;
+    modem->deliveredKeys |= 1 << alert->key;
+    modem->deliveredMs[alert->key] = now;
+  }
+  else {
+    modem->failed++;
+  }
+  modem->head = (modem->head + 1) % SIM800_QUEUE_SIZE;
+  modem->count--;
+}
+
+static bool sim800Ready(const Sim800 *modem, const Sim800Alert *alert, uint32_t now) {
+  if ((int32_t)(now - alert->notBeforeMs) < 0) return false;
+  bool delivered = modem->deliveredKeys & (1 << alert->key);
+  return !delivered || now - modem->deliveredMs[alert->key] >= modem->repeatMs;
+}
+
+// Moves the first alert that may go out now to the head and starts it
+static void sim800Start(Sim800 *modem) {
+  uint32_t now = millis();
+  for (uint8_t i = 0; i < modem->count; i++) {
+    uint8_t slot = (modem->head + i) % SIM800_QUEUE_SIZE;
+    if (!sim800Ready(modem, &modem->queue[slot], now)) continue;
+    if (i > 0) {
+      Sim800Alert ready = modem->queue[slot];
+      modem->queue[slot] = modem->queue[modem->head];
+      modem->queue[modem->head] = ready;
+    }
+
+    Sim800Alert *alert = &modem->queue[modem->head];
+    if (alert->kind == SIM800_SMS) {
+      modem->port->print("AT+CMGF=1\r");
+      sim800Enter(modem, SIM800_SMS_MODE);
+    }
+    else {
+      modem->port->print("ATD");
+      modem->port->print(alert->phone);
+      modem->port->print(";\r");
+      sim800Enter(modem, SIM800_CALL_DIAL);
+    }
+    return;
+  }
+}
+
+static uint8_t sim800Classify(const char *line) {
+  if (strcmp(line, "OK") == 0) return SIM800_OK;
+  if (strncmp(line, "ERROR", 5) == 0 || strncmp(line, "+CMS ERROR", 10) == 0 ||
+      strncmp(line, "+CME ERROR", 10) == 0) return SIM800_ERROR;
+  if (strcmp(line, "NO CARRIER") == 0 || strcmp(line, "BUSY") == 0 ||
+      strcmp(line, "NO ANSWER") == 0 || strcmp(line, "NO DIALTONE") == 0) return SIM800_HANGUP;
+  return SIM800_NONE;  // Command echo, +CMGS: <n>, unsolicited result codes
+}
+
+static void sim800Handle(Sim800 *modem, uint8_t response) {
+  Sim800Alert *alert = &modem->queue[modem->head];
+  switch (modem->state) {
+    case SIM800_SMS_MODE:
+      if (response == SIM800_OK) {
+        modem->port->print("AT+CMGS=\"");
+        modem->port->print(alert->phone);
+        modem->port->print("\"\r");
+        sim800Enter(modem, SIM800_SMS_PROMPT);
+      }
+      else if (response == SIM800_ERROR) sim800Finish(modem, false);
+      break;
+    case SIM800_SMS_PROMPT:
+      if (response == SIM800_PROMPT) {
+        modem->port->print(alert->message);
+        modem->port->write(26);  // Ctrl+Z sends
+        sim800Enter(modem, SIM800_SMS_BODY);
+      }
+      else if (response == SIM800_ERROR) sim800Finish(modem, false);
+      break;
+    case SIM800_SMS_BODY:
+      if (response == SIM800_OK) sim800Finish(modem, true);
+      else if (response == SIM800_ERROR) sim800Finish(modem, false);
+      break;
+    case SIM800_CALL_DIAL:
+      if (response == SIM800_OK) sim800Enter(modem, SIM800_CALL_ACTIVE);
+      else if (response == SIM800_ERROR || response == SIM800_HANGUP) sim800Finish(modem, false);
+      break;
+    case SIM800_CALL_ACTIVE:
+      if (response == SIM800_HANGUP) sim800Finish(modem, true);  // Answered and hung up, or rang out
+      break;
+    case SIM800_CALL_HANGUP:
+      if (response == SIM800_OK || response == SIM800_ERROR) sim800Finish(modem, true);
+      break;
+    default:
+      break;  // Idle: a late answer to an exchange that already timed out
+  }
+}
+
+// Reads the modem's answers and advances the current alert; call as often as possible
+static void sim800Poll(Sim800 *modem) {
+  while (modem->port->available() > 0) {
+    char c = modem->port->read();
+    if (c == '\n') {
+      modem->line[modem->lineLength] = 0;
+      uint8_t response = sim800Classify(modem->line);
+      modem->lineLength = 0;
+      if (response != SIM800_NONE) sim800Handle(modem, response);
+    }
+    else if (c == '>' && modem->lineLength == 0) {
+      sim800Handle(modem, SIM800_PROMPT);  // The prompt has no line ending
+    }
+    else if (c != '\r' && modem->lineLength < SIM800_LINE_LEN - 1) {
+      modem->line[modem->lineLength++] = c;
+    }
+  }
+
+  uint32_t elapsed = millis() - modem->stateMs;
+  switch (modem->state) {
+    case SIM800_IDLE:
+      if (modem->count > 0) sim800Start(modem);
+      break;
+    case SIM800_SMS_BODY:
+      if (elapsed >= SIM800_SEND_TIMEOUT) sim800Finish(modem, false);
+      break;
+    case SIM800_CALL_ACTIVE:
+      if (elapsed >= modem->callMs) {
+        modem->port->print("ATH\r");
+        sim800Enter(modem, SIM800_CALL_HANGUP);
+      }
+      break;
+    case SIM800_CALL_HANGUP:
+      if (elapsed >= SIM800_COMMAND_TIMEOUT) sim800Finish(modem, true);  // The call itself went out
+      break;
+    case SIM800_SMS_PROMPT:
+      if (elapsed >= SIM800_COMMAND_TIMEOUT) {
+        modem->port->write(27);  // Esc leaves a prompt the modem may still be showing
+        sim800Finish(modem, false);
+      }
+      break;
+    default:
+      if (elapsed >= SIM800_COMMAND_TIMEOUT) sim800Finish(modem, false);
+      break;
+  }
+}
+
+#endif // SIM800_DRIVER_H
@@ -0,0 +1,52 @@
+// Cooperative millis()-driven task scheduler
+//
+// loop() calls schedulerRun() as often as it can. Every task whose period has
+// elapsed runs once, in table order, and has to return quickly: no delay() and no
+// busy waiting. Anything longer (an alarm pattern, an SMS exchange, a ventilation
+// check) is a small state machine that its task advances one step per run, so the
+// sampling task is never late by more than the slowest single step.
+#ifndef TASK_SCHEDULER_H
+#define TASK_SCHEDULER_H
+
+#include <Arduino.h>
+
+typedef void (*TaskFunction)(void);
+
+typedef struct {
+  const char *name;
+  TaskFunction run;
+  uint32_t periodMs;
+  uint32_t lastRunMs;      // Time the current period started
+  uint32_t runs;
+  uint32_t maxLatenessMs;  // Worst delay past a due time, i.e. the bound on this task's latency
+} Task;
+
+// Task table entry; every task first runs one period after schedulerStart()
+#define TASK(name, function, periodMs) {name, function, periodMs, 0, 0, 0}
+
+// Call at the end of setup(), so time spent there does not count as lateness
+static void schedulerStart(Task *tasks, uint8_t count) {
+  uint32_t now = millis();
+  for (uint8_t i = 0; i < count; i++) tasks[i].lastRunMs = now;
+}
+
+// Runs every due task once and returns how many ran
+static uint8_t schedulerRun(Task *tasks, uint8_t count) {
+  uint8_t ran = 0;
+  for (uint8_t i = 0; i < count; i++) {
+    Task *task = &tasks[i];
+    uint32_t now = millis();
+    uint32_t elapsed = now - task->lastRunMs; // Unsigned, so the 49-day millis() wrap is harmless
+    if (elapsed < task->periodMs) continue;
+
+    if (elapsed - task->periodMs > task->maxLatenessMs) task->maxLatenessMs = elapsed - task->periodMs;
+    // Keep the original phase after a slightly late run; resynchronise after a missed period
+    task->lastRunMs = elapsed < 2 * task->periodMs ? task->lastRunMs + task->periodMs : now;
+    task->runs++;
+    task->run();
+    ran++;
+  }
+  return ran;
+}
+
+#endif // TASK_SCHEDULER_H
@@ -0,0 +1,81 @@
+// Compact binary telemetry frame, decoded on the host by telemetry.py
+//
+// Layout (little-endian, 20 bytes):
+//   0xA5 0x5A | length (15) | type u8 | seq u16 | timestamp_ms u32 | raw u16 | ppm x10 u16 |
+//   4 field bytes | CRC-16/CCITT u16
+// The type says what the field bytes hold:
+//   TELEMETRY_LABELS (finalcode.ino):       leak_severity, fire_risk, flammability, gas_type
+//   TELEMETRY_RISK (re_implementation.c):   explosion risk 0-100 %, gas class 0-2, 0, 0
+// The CRC (polynomial 0x1021, initial value 0xFFFF) covers the length byte and the payload.
+#ifndef TELEMETRY_FRAME_H
+#define TELEMETRY_FRAME_H
+
+#include <stdint.h>
+
+#define TELEMETRY_SYNC_0 0xA5
+#define TELEMETRY_SYNC_1 0x5A
+#define TELEMETRY_PAYLOAD_LEN 15
+#define TELEMETRY_FRAME_LEN (3 + TELEMETRY_PAYLOAD_LEN + 2)
+
+static uint16_t telemetryCrc16(const uint8_t *data, uint8_t len) {
+  uint16_t crc = 0xFFFF;
+  while (len--) {
+    crc ^= (uint16_t)(*data++) << 8;
+    for (uint8_t bit = 0; bit < 8; bit++) {
+      crc = (crc & 0x8000) ? (crc << 1) ^ 0x1021 : crc << 1;
+    }
+  }
+  return crc;
+}
+
+static uint8_t *telemetryPut16(uint8_t *p, uint16_t value) {
+  *p++ = value & 0xFF;
+  *p++ = value >> 8;
+  return p;
+}
+
+enum { TELEMETRY_LABELS = 1, TELEMETRY_RISK = 2 };
+
+// Fills frame (TELEMETRY_FRAME_LEN bytes) and returns its length
+static uint8_t telemetryEncodeFrame(uint8_t *frame, uint8_t type, uint16_t seq, uint32_t timestampMs,
+                                    uint16_t raw, uint16_t ppmX10, uint8_t field0, uint8_t field1,
+                                    uint8_t field2, uint8_t field3) {
+  uint8_t *p = frame;
+  *p++ = TELEMETRY_SYNC_0;
+  *p++ = TELEMETRY_SYNC_1;
+  *p++ = TELEMETRY_PAYLOAD_LEN;
+  *p++ = type;
+  p = telemetryPut16(p, seq);
+  p = telemetryPut16(p, timestampMs & 0xFFFF);
+  p = telemetryPut16(p, timestampMs >> 16);
+  p = telemetryPut16(p, raw);
+  p = telemetryPut16(p, ppmX10);
+  *p++ = field0;
+  *p++ = field1;
+  *p++ = field2;
+  *p++ = field3;
+  telemetryPut16(p, telemetryCrc16(frame + 2, 1 + TELEMETRY_PAYLOAD_LEN));
+  return TELEMETRY_FRAME_LEN;
+}
+
+// finalcode.ino's reading and its four label codes
+static uint8_t telemetryEncode(uint8_t *frame, uint16_t seq, uint32_t timestampMs, uint16_t raw, uint16_t ppmX10,
+                               uint8_t leakSeverity, uint8_t fireRisk, uint8_t flammability, uint8_t gasType) {
+  return telemetryEncodeFrame(frame, TELEMETRY_LABELS, seq, timestampMs, raw, ppmX10,
+                              leakSeverity, fireRisk, flammability, gasType);
+}
+
+// re_implementation.c's reading, explosion risk in percent and gas class
+static uint8_t telemetryEncodeRisk(uint8_t *frame, uint16_t seq, uint32_t timestampMs, uint16_t raw, uint16_t ppmX10,
+                                   uint8_t explosionRisk, uint8_t gasClass) {
+  return telemetryEncodeFrame(frame, TELEMETRY_RISK, seq, timestampMs, raw, ppmX10, explosionRisk, gasClass, 0, 0);
+}
+
+// PPM is sent in tenths, saturated to the uint16 range (float literals: same rounding on AVR and host)
+static uint16_t telemetryPPMx10(float ppm) {
+  if (ppm <= 0) return 0;
+  if (ppm >= 6553.5f) return 0xFFFF;
+  return (uint16_t)(ppm * 10 + 0.5f);
+}
+
+#endif // TELEMETRY_FRAME_H
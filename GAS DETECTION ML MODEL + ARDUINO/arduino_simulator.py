@@ -0,0 +1,345 @@
+import argparse
+import errno
+import heapq
+import os
+import select
+import time
+import tty
+
+import numpy as np
+import pandas as pd
+
+from telemetry import FRAME_LEN, LABEL_FIELDS, encode_frames
+
+DATASETS = {
+    'mq2': os.path.join('dataset', 'MQ2_Readings.csv'),
+    'sensors': os.path.join('dataset', 'Gas_Sensors_Measurements.csv'),
+}
+FORMATS = ('mq2_gas_sensor', 'finalcode', 'finalcode_binary', 'plain')
+
+READY_LINE = b"System Ready!\r\n"
+GAS_THRESHOLD = 150  # gasThreshold in both sketches
+# Blocking delay()s of mq2_gas_sensor.ino's alert branch (servo + SMS + call), in seconds
+ALERT_DELAY = (2000 + 100 + 100 + 5000 + 20000 + 1000) / 1000
+ALERT_LINES = b"Sending SMS...\r\nSMS Sent!\r\nMaking call...\r\nCall Ended!\r\n"
+# finalcode.ino queues its SMS and call on the modem driver and keeps sampling; the
+# "Alert sent in ... ms" lines it prints once they go out are not simulated
+FINALCODE_ALERT = b"High fire risk detected!\r\n"
+
+
+def arduino_float(value, digits=2):
+    """
+    Format a float the way Arduino's Print::printFloat does (single precision, rounded then truncated).
+
+    :param value: Value to print.
+    :param digits: Decimal places.
+    :return: Text as bytes.
+    """
+    value = np.float32(value) + np.float32(0.5 / 10 ** digits)
+    integer = int(value)
+    remainder = np.float32(value - np.float32(integer))
+    text = str(integer) + ('.' if digits else '')
+    for _ in range(digits):
+        remainder = np.float32(remainder * np.float32(10))
+        digit = int(remainder)
+        text += str(digit)
+        remainder = np.float32(remainder - np.float32(digit))
+    return text.encode('ascii')
+
+
+def finalcode_labels(raw):
+    """
+    Labels computed by finalcode.ino for each raw ADC code.
+
+    :param raw: Array of raw readings.
+    :return: Dictionary of arrays: ppm (float32), leak_severity, fire_risk, flammability, gas_type.
+    """
+    ppm = (np.asarray(raw, dtype=np.float32) / np.float32(1024.0)) * np.float32(5.0) * np.float32(100)
+    return {
+        'ppm': ppm,
+        'leak_severity': np.select([ppm > 300, ppm > 150], [1, 2], 3),
+        'fire_risk': np.where(ppm > 250, 1, 2),
+        'flammability': np.where(ppm > 250, 1, 2),
+        'gas_type': np.where(ppm > 150, 1, 0),
+    }
+
+
+def build_line_table(output_format):
+    """
+    Precompute the exact bytes a text-mode sketch prints for every ADC code.
+
+    :param output_format: 'mq2_gas_sensor', 'finalcode' or 'plain'.
+    :return: Tuple of (texts, alerts): list of bytes per code, and a bool array
+             marking codes that trigger the sketch's alert branch.
+    """
+    codes = np.arange(1024)
+    if output_format == 'plain':
+        return [b"%d\r\n" % code for code in codes], np.zeros(1024, dtype=bool)
+
+    if output_format == 'mq2_gas_sensor':
+        alerts = codes < GAS_THRESHOLD
+        texts = [b"Gas Level: %d\r\n" % code + (b"Gas detected!\r\n" + ALERT_LINES if alert else b"")
+                 for code, alert in zip(codes, alerts)]
+        return texts, alerts
+
+    labels = finalcode_labels(codes)
+    alerts = labels['fire_risk'] == 2
+    texts = []
+    for code in codes:
+        text = (b"Gas Level (Raw): %d\r\n" % code
+                + b"Gas Level (PPM): " + arduino_float(labels['ppm'][code]) + b"\r\n"
+                + b"Leak Severity: %d\r\n" % labels['leak_severity'][code]
+                + b"Fire Risk: %d\r\n" % labels['fire_risk'][code]
+                + b"Flammability: %d\r\n" % labels['flammability'][code]
+                + b"Gas Type: " + (b"Non-flammable" if labels['gas_type'][code] else b"Flammable") + b"\r\n")
+        if alerts[code]:
+            text += FINALCODE_ALERT
+        texts.append(text)
+    return texts, alerts
+
+
+class VirtualDevice:
+    """One simulated board: a pty pair plus its position in the replayed readings."""
+
+    def __init__(self, name, readings, offset=0):
+        self.name = name
+        self.readings = readings
+        self.position = offset % len(readings)
+        self.seq = 0
+
+        self.master, self._slave = os.openpty()
+        tty.setraw(self._slave)  # No echo or newline translation, like a real USB serial port
+        os.set_blocking(self.master, False)
+        self.port = os.ttyname(self._slave)
+
+        self.sent_readings = 0
+        self.sent_bytes = 0
+        self.dropped_bytes = 0
+        self.corrupted_readings = 0
+
+    def take(self, count):
+        """Return the next count raw readings, wrapping around the dataset."""
+        index = (self.position + np.arange(count)) % len(self.readings)
+        self.position = (self.position + count) % len(self.readings)
+        return self.readings[index]
+
+    def close(self):
+        os.close(self.master)
+        os.close(self._slave)
+
+
+class ArduinoSimulator:
+    """
+    Replay dataset readings into pseudo-terminals in a sketch's exact serial format.
+
+    Each virtual device gets its own pty; point test2.py, send_gas_data.py or
+    serial_hub.py at the printed port names. Like a real UART, bytes the
+    reader does not take in time are dropped (or, with block=True, the
+    simulator waits), so the drop counters show where a reader falls behind.
+    """
+
+    def __init__(self, readings, output_format='mq2_gas_sensor', devices=1, rate=2.0, jitter=0.0,
+                 corrupt=0.0, alert_delay=False, block=False, chunk=256, seed=None):
+        """
+        :param readings: Array of raw MQ-2 readings to replay.
+        :param output_format: One of FORMATS.
+        :param devices: Number of virtual boards.
+        :param rate: Readings per second per board; 0 sends as fast as the readers take them.
+        :param jitter: Standard deviation of the reading interval, as a fraction of it.
+        :param corrupt: Probability that a reading's bytes are corrupted (bit flip, lost byte or lost newline).
+        :param alert_delay: Pause a board for mq2_gas_sensor.ino's blocking alert delays when it raises an alert.
+        :param block: Wait for slow readers instead of dropping bytes.
+        :param chunk: Readings written at once at the maximum rate.
+        :param seed: Random seed for jitter and corruption.
+        """
+        if output_format not in FORMATS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        self.output_format = output_format
+        self.rate = rate
+        self.jitter = jitter
+        self.corrupt = corrupt
+        self.alert_delay = alert_delay
+        self.block = block
+        self.chunk = chunk
+        self.rng = np.random.default_rng(seed)
+
+        readings = np.clip(np.asarray(readings, dtype=np.int64), 0, 1023)
+        if output_format == 'finalcode_binary':
+            self._texts = None
+            self._alerts = finalcode_labels(np.arange(1024))['fire_risk'] == 2
+        else:
+            self._texts, self._alerts = build_line_table(output_format)
+
+        # Boards start at different points of the recording so they are not in lockstep
+        self.devices = [VirtualDevice(f"dev{i}", readings, offset=i * len(readings) // devices)
+                        for i in range(devices)]
+        self.started = time.monotonic()
+
+    def _render(self, device, raw):
+        if self._texts is None:
+            labels = finalcode_labels(raw)
+            millis = int((time.monotonic() - self.started) * 1000)
+            data = encode_frames(device.seq + np.arange(len(raw)), millis, raw, labels['ppm'],
+                                 **{field: labels[field] for field in LABEL_FIELDS})
+            device.seq += len(raw)
+            # TELEMETRY_BINARY builds of finalcode.ino send frames only, no alert text
+            pieces = [data[i:i + FRAME_LEN] for i in range(0, len(data), FRAME_LEN)]
+        else:
+            pieces = [self._texts[code] for code in raw]
+
+        if self.corrupt:
+            pieces = self._corrupt(device, pieces)
+        return b"".join(pieces)
+
+    def _corrupt(self, device, pieces):
+        hit = np.flatnonzero(self.rng.random(len(pieces)) < self.corrupt)
+        for i in hit:
+            piece = bytearray(pieces[i])
+            kind = self.rng.integers(3)
+            position = int(self.rng.integers(len(piece)))
+            if kind == 0:
+                piece[position] ^= 1 << int(self.rng.integers(8))
+            elif kind == 1:
+                del piece[position]
+            else:
+                piece = piece.replace(b"\n", b"", 1)
+            pieces[i] = bytes(piece)
+        device.corrupted_readings += len(hit)
+        return pieces
+
+    def _write(self, device, data):
+        view = memoryview(data)
+        while view:
+            try:
+                written = os.write(device.master, view)
+            except BlockingIOError:
+                written = 0
+            except OSError as e:
+                if e.errno != errno.EIO:
+                    raise
+                written = 0
+            device.sent_bytes += written
+            view = view[written:]
+            if not view:
+                break
+            if not self.block:
+                # The reader is behind: the rest is lost, like a UART overrun
+                device.dropped_bytes += len(view)
+                break
+            select.select([], [device.master], [], 0.1)
+
+    def _interval(self):
+        interval = 1.0 / self.rate
+        if self.jitter:
+            interval *= max(1.0 + self.jitter * self.rng.standard_normal(), 0.0)
+        return interval
+
+    def send(self, device, count):
+        """
+        Write the device's next count readings to its pty.
+
+        :return: Seconds the board stays busy in its alert branch (0 without alert_delay).
+        """
+        raw = device.take(count)
+        self._write(device, self._render(device, raw))
+        device.sent_readings += count
+        if self.alert_delay and self.output_format == 'mq2_gas_sensor':
+            return ALERT_DELAY * int(self._alerts[raw].sum())
+        return 0.0
+
+    def run(self, duration=None, report_every=5.0):
+        """
+        Replay until duration seconds have passed (forever if None), printing throughput reports.
+        """
+        start = last_report = time.monotonic()
+        for device in self.devices:
+            self._write(device, READY_LINE)
+        schedule = [(start, i) for i in range(len(self.devices))]
+        heapq.heapify(schedule)
+
+        while duration is None or time.monotonic() - start < duration:
+            now = time.monotonic()
+            if report_every and now - last_report >= report_every:
+                self.report(now - start)
+                last_report = now
+
+            if self.rate <= 0:
+                for device in self.devices:
+                    self.send(device, self.chunk)
+                continue
+
+            due, index = heapq.heappop(schedule)
+            if due > now:
+                time.sleep(min(due - now, 0.05))
+                heapq.heappush(schedule, (due, index))
+                continue
+            busy = self.send(self.devices[index], 1)
+            heapq.heappush(schedule, (max(due, now - 1.0) + self._interval() + busy, index))
+
+    def report(self, elapsed):
+        """Print per-device counters and the aggregate send rate."""
+        total = sum(device.sent_readings for device in self.devices)
+        print(f"[{elapsed:7.1f}s] {total} readings, {total / max(elapsed, 1e-9):.0f} readings/s")
+        for device in self.devices:
+            print(f"  {device.name} {device.port}: {device.sent_readings} readings, "
+                  f"{device.sent_bytes} bytes sent, {device.dropped_bytes} bytes dropped, "
+                  f"{device.corrupted_readings} corrupted")
+
+    def close(self):
+        for device in self.devices:
+            device.close()
+
+
+def load_readings(dataset):
+    """
+    Load the MQ2 column of one of the bundled datasets.
+
+    :param dataset: Key of DATASETS or a CSV path with an MQ2 column.
+    :return: Array of raw readings in recorded order.
+    """
+    path = DATASETS.get(dataset, dataset)
+    if not os.path.isabs(path) and not os.path.exists(path):
+        path = os.path.join(os.path.dirname(os.path.abspath(__file__)), path)
+    return pd.read_csv(path, usecols=['MQ2'])['MQ2'].to_numpy()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay the gas datasets over pseudo-terminals as virtual Arduinos.")
+    parser.add_argument('--dataset', default='mq2', help="'mq2', 'sensors' or a CSV path with an MQ2 column")
+    parser.add_argument('--format', choices=FORMATS, default='mq2_gas_sensor',
+                        help="Serial output of mq2_gas_sensor.ino, finalcode.ino (text or TELEMETRY_BINARY), "
+                             "or bare numbers as in Implementation 1")
+    parser.add_argument('--devices', type=int, default=1, help="Number of virtual boards")
+    parser.add_argument('--rate', type=float, default=2.0,
+                        help="Readings per second per board (2 = the sketches' delay(500)); 0 = maximum")
+    parser.add_argument('--jitter', type=float, default=0.0, help="Interval jitter as a fraction of the interval")
+    parser.add_argument('--corrupt', type=float, default=0.0, help="Probability a reading is corrupted")
+    parser.add_argument('--alert-delay', action='store_true', help="Reproduce mq2_gas_sensor.ino's blocking alert delays")
+    parser.add_argument('--block', action='store_true', help="Wait for slow readers instead of dropping bytes")
+    parser.add_argument('--duration', type=float, help="Stop after this many seconds")
+    parser.add_argument('--report', type=float, default=5.0, help="Seconds between throughput reports")
+    parser.add_argument('--link', metavar='PREFIX', help="Also create symlinks PREFIX0, PREFIX1, ... to the ports")
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+
+    simulator = ArduinoSimulator(load_readings(args.dataset), args.format, args.devices, args.rate, args.jitter,
+                                 args.corrupt, args.alert_delay, args.block, seed=args.seed)
+    links = []
+    for i, device in enumerate(simulator.devices):
+        print(f"{device.name}: {device.port}")
+        if args.link:
+            link = f"{args.link}{i}"
+            if os.path.islink(link):
+                os.remove(link)
+            os.symlink(device.port, link)
+            links.append(link)
+
+    try:
+        simulator.run(args.duration, args.report)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.report(time.monotonic() - simulator.started)
+        simulator.close()
+        for link in links:
+            os.remove(link)
@@ -0,0 +1,186 @@
+import time
+import numpy as np
+import lite_runtime
+
+
+class BatchPredictor:
+    """
+    Buffer sensor readings and score every label model once per micro-batch.
+
+    Readings are written into a preallocated NumPy array instead of a one-row
+    DataFrame per line, so a batch of N readings costs one ``predict`` call per
+    label model rather than N DataFrame constructions and 4 * N predictions.
+    """
+
+    def __init__(self, models, n_features=2, max_batch_size=32, max_wait=0.5, clock=time.monotonic):
+        """
+        :param models: Dictionary mapping label name to a fitted classifier
+                       (see from_multi_output for a single multi-output model).
+        :param n_features: Number of features per reading (sensor_reading, ppm).
+        :param max_batch_size: Flush as soon as this many readings are buffered.
+        :param max_wait: Flush once the oldest buffered reading is this many seconds old.
+        :param clock: Monotonic clock used to age the buffer.
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+
+        self.models = models
+        self.labels = list(models)
+        self.multi_output_model = None
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.clock = clock
+
+        self._buffer = np.empty((max_batch_size, n_features), dtype=np.float64)
+        self._tags = np.zeros(max_batch_size, dtype=np.int32)  # e.g. device index per reading
+        self._count = 0
+        self._first_time = None
+
+    @classmethod
+    def from_multi_output(cls, model, labels, **kwargs):
+        """
+        Build a predictor around one estimator fitted on a 2-D target.
+
+        :param model: Fitted multi-output classifier whose predict returns one column per label.
+        :param labels: Label names in the column order used for training.
+        :param kwargs: Remaining BatchPredictor options.
+        :return: BatchPredictor that walks a single model per batch.
+        """
+        predictor = cls({}, **kwargs)
+        predictor.labels = list(labels)
+        predictor.multi_output_model = model
+        return predictor
+
+    @classmethod
+    def from_lite(cls, path, **kwargs):
+        """
+        Build a predictor from a lite_runtime model file, without importing scikit-learn.
+
+        :param path: .npz file written by lite_runtime.export.export_models.
+        :param kwargs: Remaining BatchPredictor options.
+        :return: BatchPredictor over the exported models.
+        """
+        models = lite_runtime.load(path)
+        if len(models) == 1:
+            model = next(iter(models.values()))
+            if len(model.outputs) > 1:
+                return cls.from_multi_output(model, model.outputs, n_features=model.n_features, **kwargs)
+        n_features = next(iter(models.values())).n_features
+        return cls(models, n_features=n_features, **kwargs)
+
+    def __len__(self):
+        return self._count
+
+    def add(self, *features, tag=0):
+        """
+        Append one reading to the buffer.
+
+        :param features: Feature values in training column order.
+        :param tag: Integer carried alongside the reading, e.g. the index of the device it came from.
+        :return: True if the batch is ready to be flushed.
+        """
+        if self._count == self.max_batch_size:
+            raise OverflowError("Batch buffer is full; call flush() first")
+
+        if self._count == 0:
+            self._first_time = self.clock()
+        self._buffer[self._count] = features
+        self._tags[self._count] = tag
+        self._count += 1
+        return self.due()
+
+    def extend(self, rows, tags=0):
+        """
+        Append as many readings as fit in the buffer with one slice assignment.
+
+        :param rows: 2-D array of readings, one row per reading in training column order.
+        :param tags: Integer tag per row (or one tag for all rows).
+        :return: Number of rows taken; flush and call again with the rest if it is short.
+        """
+        taken = min(len(rows), self.max_batch_size - self._count)
+        if taken == 0:
+            return 0
+
+        if self._count == 0:
+            self._first_time = self.clock()
+        self._buffer[self._count:self._count + taken] = rows[:taken]
+        self._tags[self._count:self._count + taken] = tags if np.isscalar(tags) else tags[:taken]
+        self._count += taken
+        return taken
+
+    def due(self):
+        """
+        Check whether the buffered readings should be scored now.
+
+        :return: True if the batch is full or the oldest reading has waited max_wait.
+        """
+        if self._count == 0:
+            return False
+        if self._count >= self.max_batch_size:
+            return True
+        return self.clock() - self._first_time >= self.max_wait
+
+    def flush(self):
+        """
+        Score all buffered readings in one vectorized pass per label model.
+
+        :return: Tuple of (readings, predictions) where readings is a copy of the
+                 buffered rows and predictions maps label name to an array of
+                 predicted classes, one per row.
+        """
+        _, readings, predictions = self.flush_tagged()
+        return readings, predictions
+
+    def flush_tagged(self):
+        """
+        Like flush, but also return the tag of every reading.
+
+        :return: Tuple of (tags, readings, predictions).
+        """
+        tags = self._tags[:self._count].copy()
+        readings = self._buffer[:self._count].copy()
+        self._count = 0
+        self._first_time = None
+
+        if len(readings) == 0:
+            return tags, readings, {label: np.empty(0, dtype=object) for label in self.labels}
+
+        if self.multi_output_model is not None:
+            outputs = self.multi_output_model.predict(readings)
+            predictions = {label: outputs[:, i] for i, label in enumerate(self.labels)}
+        else:
+            predictions = {label: model.predict(readings) for label, model in self.models.items()}
+        return tags, readings, predictions
+
+
+def print_predictions(readings, predictions, devices=None):
+    """
+    Print one block per reading in the same format as the per-line loop.
+
+    :param readings: Array of scored readings (sensor_reading, ppm).
+    :param predictions: Dictionary mapping label name to predicted classes.
+    :param devices: Optional device name per reading, printed as a prefix.
+    """
+    for i, (sensor_value, ppm_value) in enumerate(readings):
+        prefix = f"[{devices[i]}] " if devices is not None else ""
+        print(f"{prefix}Sensor Reading: {int(sensor_value)}, PPM: {ppm_value}")
+        for label, predicted in predictions.items():
+            print(f"{label} Prediction: {predicted[i]}")
+
+
+def predict_rows(predictor, rows):
+    """
+    Feed a block of readings through the predictor, printing each batch as it becomes due.
+
+    :param predictor: BatchPredictor to fill.
+    :param rows: 2-D array of readings (sensor_reading, ppm), possibly longer than one batch.
+    """
+    taken = 0
+    while taken < len(rows):
+        taken += predictor.extend(rows[taken:])
+        if predictor.due():
+            print_predictions(*predictor.flush())
+
+    # Also flushes a partial batch that has waited max_wait while no data arrived
+    if predictor.due():
+        print_predictions(*predictor.flush())
@@ -0,0 +1,344 @@
+import ctypes
+import os
+import re
+import time
+
+import numpy as np
+
+from firmware_parity import build_library
+from sim800_mock import MockSim800
+
+# Top-level function definitions; the Arduino builder generates prototypes for these
+DEFINITION = re.compile(r'^([A-Za-z_][\w \t\*&<>]*?[ \t\*&]+)([A-Za-z_]\w*)[ \t]*\(([^()]*)\)[ \t]*\{', re.MULTILINE)
+INCLUDE = re.compile(r'^[ \t]*#include[^\n]*\n', re.MULTILINE)
+
+SERVICE = ctypes.CFUNCTYPE(None, ctypes.c_uint32)
+MODEM_STATS = ('sent', 'failed', 'dropped', 'coalesced', 'last_latency_ms', 'max_latency_ms', 'queued')
+
+DRIVER = """#include <Arduino.h>
+#include <time.h>
+#line 1 "{sketch}"
+{source}
+
+static double hostNowNs() {{
+  struct timespec now;
+  clock_gettime(CLOCK_MONOTONIC, &now);
+  return now.tv_sec * 1e9 + now.tv_nsec;
+}}
+
+static HostStream *hostPort(int port) {{
+#ifdef HOST_SOFTWARE_SERIAL_H
+  if (port > 0 && port <= hostSoftwareSerialCount) return hostSoftwareSerials[port - 1];
+#endif
+  return port == 0 ? &Serial : 0;
+}}
+
+extern "C" {{
+
+void hostSetup(void) {{ setup(); }}
+
+void hostSetAnalog(int pin, int value) {{ hostAnalog[pin] = value; }}
+
+/* Calls loop() until durationMs of simulated time have passed, advancing the clock tickMs
+ * per call on top of the sketch's own delay()s, and service (if set) every serviceMs.
+ * stats: loop() calls, total ns, slowest ns. */
+void hostRun(const int16_t *trace, int32_t traceLength, uint32_t tracePeriodMs, uint8_t tracePin,
+             uint32_t durationMs, uint32_t tickMs, double *stats,
+             uint32_t serviceMs, void (*service)(uint32_t)) {{
+  hostTrace = trace;
+  hostTraceLength = traceLength;
+  hostTracePeriodMs = tracePeriodMs;
+  hostTracePin = tracePin;
+  uint32_t end = hostMillis + durationMs;
+  uint32_t serviced = hostMillis;
+  while ((int32_t)(end - hostMillis) > 0) {{
+    double start = hostNowNs();
+    loop();
+    double elapsed = hostNowNs() - start;
+    stats[0] += 1;
+    stats[1] += elapsed;
+    if (elapsed > stats[2]) stats[2] = elapsed;
+    hostMillis += tickMs;
+    if (service != 0 && hostMillis - serviced >= serviceMs) {{
+      service(hostMillis);
+      serviced = hostMillis;
+    }}
+  }}
+  hostTrace = 0;
+}}
+
+uint32_t hostMillisNow(void) {{ return hostMillis; }}
+
+void hostAnalogStats(int pin, uint32_t *stats) {{
+  stats[0] = hostAnalogReads[pin];
+  stats[1] = hostAnalogMaxGap[pin];
+}}
+
+/* Bytes written to a port (0 = Serial, 1.. = SoftwareSerial instances in construction order) */
+int32_t hostOutput(int port, char *buffer, int32_t size) {{
+  HostStream *stream = hostPort(port);
+  if (stream == 0) return -1;
+  int32_t length = (int32_t)stream->output.size();
+  if (buffer != 0) stream->output.copy(buffer, length < size ? length : size);
+  return length;
+}}
+
+/* Connect a port to a file descriptor, e.g. the slave side of a pty */
+int hostAttach(int port, int fd) {{
+  HostStream *stream = hostPort(port);
+  if (stream == 0) return -1;
+  stream->fd = fd;
+  return 0;
+}}
+
+#ifdef SIM800_DRIVER_H
+/* stats: sent, failed, dropped, coalesced, last and longest latency (ms), alerts still queued */
+int hostModem(uint32_t *stats) {{
+  stats[0] = modem.sent;
+  stats[1] = modem.failed;
+  stats[2] = modem.dropped;
+  stats[3] = modem.coalesced;
+  stats[4] = modem.lastLatencyMs;
+  stats[5] = modem.maxLatencyMs;
+  stats[6] = modem.count;
+  return 0;
+}}
+#endif
+
+#ifdef HOST_RANDOM_FOREST_MODEL_H
+void hostSetExplosionRisk(float risk) {{ hostExplosionRisk = risk; }}
+#endif
+
+#ifdef TASK_COUNT
+int32_t hostTaskCount(void) {{ return TASK_COUNT; }}
+
+const char *hostTask(int32_t index, uint32_t *stats) {{
+  stats[0] = tasks[index].periodMs;
+  stats[1] = tasks[index].runs;
+  stats[2] = tasks[index].maxLatenessMs;
+  return tasks[index].name;
+}}
+#endif
+}}
+"""
+
+
+def _with_prototypes(source):
+    """Insert a prototype for every function after the sketch's includes, as the Arduino builder does."""
+    prototypes = [f"{kind.strip()} {name}({params.strip()});" for kind, name, params in DEFINITION.findall(source)
+                  if kind.split()[0] not in ('else', 'return')]
+    includes = list(INCLUDE.finditer(source))
+    at = includes[-1].end() if includes else 0
+    return source[:at] + '\n'.join(prototypes) + '\n' + source[at:]
+
+
+class HostSketch:
+    """
+    A whole sketch built with host g++ against host/ (Arduino.h, Servo, SoftwareSerial, ...)
+    and run on a simulated clock.
+
+    loop() is called back to back and the clock advances tick_ms per call plus whatever
+    the sketch delay()s, so blocking code shows up as long gaps between sensor reads while
+    the wall-clock cost of each loop() call is measured on the host. Sketches whose
+    scheduler table is called tasks (arduino_code/task_scheduler.h) also report per-task
+    run counts and lateness, and sketches whose arduino_code/sim800_driver.h instance is
+    called modem report its delivery counters and latency.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Sketch source (.ino or .c compiled as C++).
+        """
+        self.path = os.path.abspath(path)
+        with open(self.path) as file:
+            source = _with_prototypes(file.read())
+        self._library = build_library(DRIVER.format(sketch=self.path, source=source),
+                                      [os.path.dirname(self.path)], cplusplus=True)
+        self._library.hostRun.argtypes = [ctypes.c_void_p, ctypes.c_int32, ctypes.c_uint32, ctypes.c_uint8,
+                                          ctypes.c_uint32, ctypes.c_uint32, ctypes.c_void_p,
+                                          ctypes.c_uint32, SERVICE]
+        self._library.hostMillisNow.restype = ctypes.c_uint32
+        self._library.hostAnalogStats.argtypes = [ctypes.c_int, ctypes.c_void_p]
+        self._library.hostOutput.restype = ctypes.c_int32
+        self._library.hostOutput.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_int32]
+        if hasattr(self._library, 'hostTask'):
+            self._library.hostTask.restype = ctypes.c_char_p
+            self._library.hostTask.argtypes = [ctypes.c_int32, ctypes.c_void_p]
+        if hasattr(self._library, 'hostSetExplosionRisk'):
+            self._library.hostSetExplosionRisk.argtypes = [ctypes.c_float]
+        if hasattr(self._library, 'hostModem'):
+            self._library.hostModem.argtypes = [ctypes.c_void_p]
+        self._services = []
+
+    def setup(self):
+        self._library.hostSetup()
+
+    def set_analog(self, pin, value):
+        self._library.hostSetAnalog(pin, value)
+
+    def set_explosion_risk(self, risk):
+        """Value returned by the stub RandomForestModel, if the sketch uses it."""
+        if hasattr(self._library, 'hostSetExplosionRisk'):
+            self._library.hostSetExplosionRisk(risk)
+
+    def attach(self, port, fd):
+        """
+        Connect a serial port to a file descriptor: the sketch's writes go to it and its reads come from it.
+
+        :param port: 0 = Serial, 1.. = SoftwareSerial instances in construction order.
+        :param fd: Non-blocking descriptor, e.g. MockSim800.slave.
+        """
+        if self._library.hostAttach(port, fd) < 0:
+            raise ValueError(f"The sketch has no serial port {port}")
+
+    def attach_modem(self, modem, port=1):
+        """
+        Attach a MockSim800 to a port; run() then services it every 10 ms of simulated time.
+        """
+        self.attach(port, modem.slave)
+        self._services.append(modem.service)
+
+    def run(self, readings, duration_ms, reading_period_ms=1000, sensor_pin=14, tick_ms=1, service_ms=10):
+        """
+        :param readings: Raw ADC readings the sensor pin returns, one per reading_period_ms (repeated).
+        :param duration_ms: Simulated time to run loop() for.
+        :param reading_period_ms: How long each reading stays on the pin.
+        :param sensor_pin: Pin the readings are fed to (14 = A0).
+        :param tick_ms: Simulated time each loop() call takes on top of its delay()s.
+        :param service_ms: Simulated time between calls to the attached mock modems.
+        :return: Dictionary with simulated_ms, loop_calls, mean and max ns per loop() call on
+                 this host, wall_s, and the sensor pin's reads and longest gap between reads (ms).
+        """
+        trace = np.ascontiguousarray(readings, dtype=np.int16)
+        stats = np.zeros(3)
+        start_ms = self._library.hostMillisNow()
+        services = self._services
+
+        def service(now_ms):
+            for callback in services:
+                callback(now_ms)
+
+        callback = SERVICE(service) if services else SERVICE()
+        start = time.perf_counter()
+        self._library.hostRun(trace.ctypes.data, len(trace), reading_period_ms, sensor_pin,
+                              duration_ms, tick_ms, stats.ctypes.data, service_ms, callback)
+        wall = time.perf_counter() - start
+        reads = np.zeros(2, dtype=np.uint32)
+        self._library.hostAnalogStats(sensor_pin, reads.ctypes.data)
+        return {
+            'simulated_ms': self._library.hostMillisNow() - start_ms,
+            'loop_calls': int(stats[0]),
+            'loop_mean_ns': stats[1] / max(stats[0], 1),
+            'loop_max_ns': stats[2],
+            'wall_s': wall,
+            'sensor_reads': int(reads[0]),
+            'max_read_gap_ms': int(reads[1]),
+        }
+
+    def output(self, port=0):
+        """
+        :param port: 0 = Serial, 1.. = SoftwareSerial instances in construction order.
+        :return: Everything the sketch wrote to the port, as bytes.
+        """
+        length = self._library.hostOutput(port, None, 0)
+        if length < 0:
+            return b''
+        buffer = ctypes.create_string_buffer(length)
+        self._library.hostOutput(port, buffer, length)
+        return buffer.raw
+
+    def modem(self):
+        """
+        :return: Dictionary of the modem driver's counters (MODEM_STATS), None without one.
+        """
+        if not hasattr(self._library, 'hostModem'):
+            return None
+        stats = np.zeros(len(MODEM_STATS), dtype=np.uint32)
+        self._library.hostModem(stats.ctypes.data)
+        return dict(zip(MODEM_STATS, stats.tolist()))
+
+    def tasks(self):
+        """
+        :return: List of dictionaries (name, period_ms, runs, max_lateness_ms), empty without a scheduler.
+        """
+        if not hasattr(self._library, 'hostTask'):
+            return []
+        result = []
+        for index in range(self._library.hostTaskCount()):
+            stats = np.zeros(3, dtype=np.uint32)
+            name = self._library.hostTask(index, stats.ctypes.data)
+            result.append({'name': name.decode(), 'period_ms': int(stats[0]), 'runs': int(stats[1]),
+                           'max_lateness_ms': int(stats[2])})
+        return result
+
+
+def leak_scenario(clean=555, leak=950, seconds=(60, 300, 240)):
+    """
+    One reading per second: clean air, a leak well above the emergency threshold, clean air again.
+
+    :param clean: Raw reading of clean air (the datasets' NoGas level).
+    :param leak: Raw reading during the leak (950 is about 38,000 ppm LPG).
+    :param seconds: Durations of the three phases.
+    :return: Array of raw readings.
+    """
+    before, during, after = seconds
+    return np.concatenate((np.full(before, clean), np.full(during, leak), np.full(after, clean))).astype(np.int16)
+
+
+def print_run(name, result, sketch, mock=None):
+    print(f"{name}: {result['simulated_ms'] / 1000:.1f} s simulated in {result['wall_s']:.2f} s, "
+          f"{result['loop_calls']} loop() calls, {result['loop_mean_ns'] / 1000:.2f} us mean / "
+          f"{result['loop_max_ns'] / 1000:.1f} us max per call")
+    print(f"  gas sensor: {result['sensor_reads']} reads, longest gap between reads {result['max_read_gap_ms']} ms")
+    modem = sketch.output(1)
+    print(f"  serial: {len(sketch.output(0))} bytes, SIM800: {len(modem)} bytes, "
+          f"{modem.count(b'AT+CMGS')} SMS, {modem.count(b'ATD')} calls")
+    modem = sketch.modem()
+    if modem is not None:
+        print(f"  modem driver: {modem['sent']} sent, {modem['failed']} failed, {modem['dropped']} dropped, "
+              f"{modem['coalesced']} coalesced, {modem['queued']} queued, latency last "
+              f"{modem['last_latency_ms']} ms / longest {modem['max_latency_ms']} ms")
+    if mock is not None:
+        accepted = [message for message in mock.messages if message['accepted_ms'] is not None]
+        print(f"  mock SIM800: {mock.commands} commands, {len(accepted)}/{len(mock.messages)} SMS accepted, "
+              f"{len(mock.calls)} calls")
+        for message in mock.messages:
+            print(f"    {message['sent_ms'] / 1000:7.1f} s  SMS to {message['phone']}: {message['text']!r}")
+    for task in sketch.tasks():
+        print(f"  task {task['name']}: every {task['period_ms']} ms, {task['runs']} runs, "
+              f"at most {task['max_lateness_ms']} ms late")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from arduino_simulator import load_readings
+
+    parser = argparse.ArgumentParser(description="Build a sketch with host g++ against the stub HAL "
+                                                 "and run it on a simulated clock.")
+    parser.add_argument('--sketch', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                         're_implementation.c'))
+    parser.add_argument('--dataset', default='mq2', help="'mq2', 'sensors' or a CSV path with an MQ2 column")
+    parser.add_argument('--leak', action='store_true',
+                        help="Replay a 10-minute leak scenario instead of the dataset")
+    parser.add_argument('--minutes', type=float, default=10, help="Simulated run time")
+    parser.add_argument('--reading-period', type=int, default=1000, help="Milliseconds each reading stays on A0")
+    parser.add_argument('--risk', type=float, default=0.0, help="Explosion risk returned by the stub RandomForestModel")
+    parser.add_argument('--tick', type=int, default=1, help="Simulated milliseconds per loop() call")
+    parser.add_argument('--modem', action='store_true',
+                        help="Answer the SIM800 port with a mock modem (sim800_mock.py) over a pty")
+    parser.add_argument('--send-ms', type=int, default=3000, help="Mock modem's time to accept an SMS")
+    parser.add_argument('--fail-every', type=int, default=0, help="Mock modem fails every n-th SMS")
+    args = parser.parse_args()
+
+    sketch = HostSketch(args.sketch)
+    sketch.set_analog(15, 1023)  # A1: power supply present
+    sketch.set_explosion_risk(args.risk)
+    mock = None
+    if args.modem:
+        mock = MockSim800(send_ms=args.send_ms, fail_every=args.fail_every)
+        sketch.attach_modem(mock)
+    sketch.setup()
+    readings = leak_scenario() if args.leak else load_readings(args.dataset)
+    result = sketch.run(readings, int(args.minutes * 60000), args.reading_period, tick_ms=args.tick)
+    print_run(os.path.basename(args.sketch), result, sketch, mock)
@@ -0,0 +1,278 @@
+import atexit
+import ctypes
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+HOST_DIR = os.path.join(ROOT, 'host')  # Stub Arduino.h, found before any real core
+ARDUINO_DIR = os.path.join(ROOT, 'arduino_code')
+# No FMA contraction: AVR has none, and it would change float rounding on the host
+CFLAGS = ['-O2', '-std=c99', '-fPIC', '-shared', '-ffp-contract=off']
+CXXFLAGS = ['-O2', '-std=c++11', '-fPIC', '-shared', '-ffp-contract=off']
+C_TYPES = {np.dtype(np.uint8): 'uint8_t', np.dtype(np.int16): 'int16_t', np.dtype(np.uint16): 'uint16_t',
+           np.dtype(np.int32): 'int32_t', np.dtype(np.float32): 'float'}
+
+SHIM = """#include <stddef.h>
+#include <Arduino.h>
+{includes}
+
+void hostReplay(const {in_type} *inputs, int32_t n, {out_type} *outputs) {{
+  for (int32_t i = 0; i < n; i++) {{
+    const {in_type} *x = inputs + (size_t)i * {in_width};
+    {out_type} *out = outputs + (size_t)i * {out_width};
+    {statement};
+  }}
+}}
+"""
+
+
+def host_compiler(cplusplus=False):
+    """
+    :param cplusplus: Look for the C++ compiler ($CXX or g++) instead of the C compiler ($CC or gcc).
+    :return: Path of the host compiler, or None if there is none.
+    """
+    if cplusplus:
+        return shutil.which(os.environ.get('CXX', 'g++'))
+    return shutil.which(os.environ.get('CC', 'gcc'))
+
+
+def build_library(source, include_dirs=(), cplusplus=False):
+    """
+    Compile C source against the stub Arduino HAL into a shared library and load it.
+
+    :param source: C source; <Arduino.h> resolves to host/Arduino.h.
+    :param include_dirs: Extra include directories (after host/, arduino_code/ and the project root).
+    :param cplusplus: Compile as C++ (whole sketches, which use String, Serial and libraries).
+    :return: ctypes.CDLL.
+    """
+    compiler = host_compiler(cplusplus)
+    if compiler is None:
+        raise RuntimeError(f"No host {'C++' if cplusplus else 'C'} compiler found; install gcc "
+                           f"or set {'CXX' if cplusplus else 'CC'}")
+
+    build_dir = tempfile.mkdtemp(prefix='firmware_parity_')
+    atexit.register(shutil.rmtree, build_dir, ignore_errors=True)
+    source_path = os.path.join(build_dir, 'shim.cpp' if cplusplus else 'shim.c')
+    library_path = os.path.join(build_dir, 'shim.so')
+    with open(source_path, 'w') as file:
+        file.write(source)
+
+    includes = [HOST_DIR, ARDUINO_DIR, ROOT] + list(include_dirs)
+    flags = CXXFLAGS if cplusplus else CFLAGS
+    command = [compiler, *flags, *(f'-I{d}' for d in includes), source_path, '-o', library_path, '-lm']
+    result = subprocess.run(command, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"Host build failed:\n{result.stderr}")
+    return ctypes.CDLL(library_path)
+
+
+def _best_time(function, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def check(name, headers, statement, X, reference, out_dtype=np.uint8, out_width=1, repeat=20):
+    """
+    Replay every row through one C statement built with host gcc and through a Python reference.
+
+    :param name: Name shown in the report.
+    :param headers: Headers to include, as paths or names on the include path.
+    :param statement: C code run once per row. x points at the row (in X's dtype), out at its
+                      out_width results and i is the row index.
+    :param X: 2-D array of inputs, one row per call.
+    :param reference: Callable mapping X to the expected results, shape (n_rows, out_width).
+    :param out_dtype: Type of the results.
+    :param out_width: Results per row.
+    :param repeat: Replays of the C batch; the fastest one is timed.
+    :return: Dictionary with calls, mismatches, the first mismatching row (input, expected, actual)
+             and the time per call of the C code and of the Python reference in nanoseconds.
+    """
+    X = np.ascontiguousarray(X)
+    if X.ndim == 1:
+        X = X[:, None]
+    out_dtype = np.dtype(out_dtype)
+
+    # Files are included by absolute path: by name, a generated outputs/RandomForestModel.h
+    # would resolve to the sketch library stub in host/ instead
+    includes = [f'#include "{os.path.abspath(header) if os.path.isfile(header) else header}"' for header in headers]
+    library = build_library(SHIM.format(includes='\n'.join(includes), in_type=C_TYPES[X.dtype],
+                                        in_width=X.shape[1], out_type=C_TYPES[out_dtype],
+                                        out_width=out_width, statement=statement))
+
+    actual = np.zeros((len(X), out_width), dtype=out_dtype)
+    replay = library.hostReplay
+    replay.restype = None
+    replay.argtypes = [ctypes.c_void_p, ctypes.c_int32, ctypes.c_void_p]
+    c_seconds = _best_time(lambda: replay(X.ctypes.data, len(X), actual.ctypes.data), repeat)
+
+    start = time.perf_counter()
+    expected = np.asarray(reference(X)).reshape(len(X), out_width)
+    python_seconds = time.perf_counter() - start
+
+    wrong = np.flatnonzero(np.any(expected != actual, axis=1))
+    first = None if len(wrong) == 0 else {
+        'input': X[wrong[0]].tolist(), 'expected': expected[wrong[0]].tolist(), 'actual': actual[wrong[0]].tolist()}
+    return {
+        'name': name,
+        'calls': len(X),
+        'mismatches': len(wrong),
+        'first_mismatch': first,
+        'c_ns': c_seconds / len(X) * 1e9,
+        'python_ns': python_seconds / len(X) * 1e9,
+    }
+
+
+def check_prediction_table(path, table, X=None):
+    """
+    Compare the predictLabel lookup of a prediction_table.export_header header with the table.
+
+    :param path: Header written by export_header.
+    :param table: PredictionTable it was written from.
+    :param X: Raw readings to replay; every ADC code by default.
+    :return: Result of check.
+    """
+    from mq2_calibration import ADC_CODES
+
+    raw = np.arange(ADC_CODES) if X is None else np.asarray(X)
+    raw = raw.astype(np.uint16)
+    return check('prediction table', [path],
+                 'for (uint8_t label = 0; label < PREDICTION_LABELS; label++) out[label] = predictLabel(x[0], label)',
+                 raw, lambda X: table.codes[X[:, 0]], out_width=len(table.labels))
+
+
+def check_forest_header(path, predict, X, prefix='rf'):
+    """
+    Compare the <prefix>_predict routine of a forest_export header with its Python emulation.
+
+    :param path: Header written by EDA/src/forest_export.py.
+    :param predict: Callable mapping X to class indices (e.g. predict_flat with the exported forest).
+    :param X: Raw ADC features, one row per reading.
+    :param prefix: Symbol prefix the header was written with.
+    :return: Result of check.
+    """
+    return check('forest', [path], f'out[0] = {prefix}_predict(x)', np.asarray(X).astype(np.int16), predict)
+
+
+def check_network_header(path, network, function, X):
+    """
+    Compare a keras_to_c header with the FixedPointNetwork it was exported from.
+
+    :param path: Header written by keras_to_c.export_c_header.
+    :param network: FixedPointNetwork, whose predict_codes emulates the generated code.
+    :param function: Name of the generated predict function.
+    :param X: Float features, one row per reading.
+    :return: Result of check.
+    """
+    return check(function, [path], f'{function}(x, out)', np.asarray(X).astype(np.float32),
+                 network.predict_codes, out_width=len(network.outputs))
+
+
+def check_firmware(raw, temperature=25.0):
+    """
+    Replay raw readings through the sketches' conversion and label code and their Python references.
+
+    :param raw: Raw ADC readings.
+    :param temperature: Temperature fed to re_implementation.c's compensation (25 = none).
+    :return: List of check results: finalcode.ino's calculatePPM, its labels and telemetry
+             frames against arduino_simulator/telemetry.py, re_implementation.c's risk frames, and its
+             getCalibratedPPM against the sketch's original pow/log10 curve.
+    """
+    from arduino_simulator import finalcode_labels
+    from mq2_calibration import ppm_to_uint16
+    from telemetry import FRAME_LEN, FRAME_RISK, LABEL_FIELDS, encode_frames
+
+    raw = np.asarray(raw).astype(np.int16)
+
+    def labels(X):
+        result = finalcode_labels(X[:, 0])
+        return np.column_stack([result[field] for field in LABEL_FIELDS])
+
+    def frames(X):
+        result = finalcode_labels(X[:, 0])
+        n = len(X)
+        data = encode_frames(np.arange(n), np.arange(n) * 500, X[:, 0], result['ppm'],
+                             **{field: result[field] for field in LABEL_FIELDS})
+        return np.frombuffer(data, dtype=np.uint8).reshape(n, FRAME_LEN)
+
+    def risk_frames(X):
+        # re_implementation.c's frame, with the risk and gas class made up from the reading
+        n = len(X)
+        data = encode_frames(np.arange(n), np.arange(n) * 1000, X[:, 0], X[:, 0] * 2.5, FRAME_RISK,
+                             explosion_risk=X[:, 0] % 101, gas_class=X[:, 0] % 3)
+        return np.frombuffer(data, dtype=np.uint8).reshape(n, FRAME_LEN)
+
+    def calibrated_ppm(X):
+        # The conversion re_implementation.c used before the lookup table, written out here
+        # rather than taken from mq2_calibration so that a change of curve shows up as mismatches
+        with np.errstate(divide='ignore'):
+            x = X[:, 0].astype(np.float64)
+            rs_ro = (1023.0 - x) / x
+            ppm = np.power(10.0, (np.log10(rs_ro) - 0.6) / -0.4)
+        # MQ2CalibrationTable.h stores it rounded up and saturated to uint16
+        return ppm_to_uint16(ppm)
+
+    compensated = f'compensatedCode(analogRead(A0), {float(temperature)!r}f)'
+    return [
+        check('calculatePPM', ['gas_logic.h'], 'out[0] = calculatePPM(x[0])',
+              raw, lambda X: finalcode_labels(X[:, 0])['ppm'], out_dtype=np.float32),
+        check('finalcode labels', ['gas_logic.h'],
+              'float ppm = calculatePPM(x[0]); out[0] = determineLeakSeverity(ppm); '
+              'out[1] = determineFireRisk(ppm); out[2] = determineFlammability(ppm); '
+              'out[3] = determineGasTypeCode(ppm)',
+              raw, labels, out_width=len(LABEL_FIELDS)),
+        check('telemetry frames', ['gas_logic.h', 'telemetry_frame.h'],
+              'float ppm = calculatePPM(x[0]); '
+              'telemetryEncode(out, (uint16_t)i, (uint32_t)i * 500, x[0], telemetryPPMx10(ppm), '
+              'determineLeakSeverity(ppm), determineFireRisk(ppm), determineFlammability(ppm), '
+              'determineGasTypeCode(ppm))',
+              raw, frames, out_width=FRAME_LEN),
+        check('risk telemetry frames', ['telemetry_frame.h'],
+              'telemetryEncodeRisk(out, (uint16_t)i, (uint32_t)i * 1000, x[0], telemetryPPMx10(x[0] * 2.5f), '
+              'x[0] % 101, x[0] % 3)',
+              raw, risk_frames, out_width=FRAME_LEN),
+        check('getCalibratedPPM', ['gas_logic.h', 'MQ2CalibrationTable.h'],
+              f'hostAnalog[A0] = x[0]; out[0] = mq2PPMFromCode({compensated})',
+              raw, calibrated_ppm, out_dtype=np.uint16),
+    ]
+
+
+def print_result(result):
+    print(f"{result['name']}: {result['calls']} calls, {result['mismatches']} mismatches, "
+          f"C {result['c_ns']:.1f} ns/call, Python {result['python_ns']:.1f} ns/call")
+    first = result['first_mismatch']
+    if first is not None:
+        print(f"  first mismatch: input {first['input']}, Python {first['expected']}, C {first['actual']}")
+
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+
+    from arduino_simulator import DATASETS, load_readings
+    from mq2_calibration import ADC_CODES
+
+    parser = argparse.ArgumentParser(description="Build the firmware conversion and label code with host gcc "
+                                                 "and compare it with the Python references.")
+    parser.add_argument('--dataset', nargs='*', default=list(DATASETS),
+                        help="Datasets whose MQ2 rows are replayed after the ADC sweep ('mq2', 'sensors' or CSV paths)")
+    args = parser.parse_args()
+
+    sweeps = {'every ADC code': np.arange(ADC_CODES)}
+    sweeps.update({f'{dataset} rows': load_readings(dataset) for dataset in args.dataset})
+
+    mismatches = 0
+    for title, raw in sweeps.items():
+        print(f"== {title} ({len(raw)} readings)")
+        for result in check_firmware(raw):
+            print_result(result)
+            mismatches += result['mismatches']
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,171 @@
+/* Stub Arduino HAL for building firmware code with host gcc.
+ *
+ * Just enough of the Arduino core for arduino_code/gas_logic.h, the generated
+ * headers and, compiled as C++, whole sketches: fixed-width types, constrain/min/max
+ * and a simulated board whose clock, pins and serial ports live in plain variables
+ * the host can set and read. delay() advances the simulated clock instead of
+ * sleeping, so a blocking sketch shows up as long gaps between sensor reads.
+ *
+ * Everything is static, so the harness builds firmware and stub as one translation unit.
+ */
+#ifndef HOST_ARDUINO_H
+#define HOST_ARDUINO_H
+
+#include <stdint.h>
+#include <stddef.h>
+#include <stdbool.h>
+#include <stdio.h>
+#include <math.h>
+#ifdef __cplusplus
+#include <string>
+#include <unistd.h>
+#endif
+
+typedef uint8_t byte;
+typedef bool boolean;
+
+#define HIGH 1
+#define LOW 0
+#define INPUT 0
+#define OUTPUT 1
+#define INPUT_PULLUP 2
+
+#define HOST_PINS 20
+#define A0 14
+#define A1 15
+#define A2 16
+#define A3 17
+#define A4 18
+#define A5 19
+
+#ifndef constrain
+#define constrain(amt, low, high) ((amt) < (low) ? (low) : ((amt) > (high) ? (high) : (amt)))
+#endif
+#ifndef min
+#define min(a, b) ((a) < (b) ? (a) : (b))
+#endif
+#ifndef max
+#define max(a, b) ((a) > (b) ? (a) : (b))
+#endif
+
+/* Simulated board state */
+static uint32_t hostMillis = 0;
+static int hostAnalog[HOST_PINS];
+static uint8_t hostPinMode[HOST_PINS];
+static uint8_t hostDigital[HOST_PINS];
+
+/* Optional reading trace: analogRead(hostTracePin) returns one entry per hostTracePeriodMs */
+static const int16_t *hostTrace = 0;
+static int32_t hostTraceLength = 0;
+static uint32_t hostTracePeriodMs = 1000;
+static uint8_t hostTracePin = A0;
+
+/* Per-pin analogRead statistics: count, time of the last read and longest gap between reads */
+static uint32_t hostAnalogReads[HOST_PINS];
+static uint32_t hostAnalogLastRead[HOST_PINS];
+static uint32_t hostAnalogMaxGap[HOST_PINS];
+
+static inline uint32_t millis(void) { return hostMillis; }
+static inline uint32_t micros(void) { return hostMillis * 1000UL; }
+static inline void delay(uint32_t ms) { hostMillis += ms; }
+
+static inline void pinMode(uint8_t pin, uint8_t mode) { if (pin < HOST_PINS) hostPinMode[pin] = mode; }
+static inline void digitalWrite(uint8_t pin, uint8_t value) { if (pin < HOST_PINS) hostDigital[pin] = value; }
+static inline int digitalRead(uint8_t pin) { return pin < HOST_PINS ? hostDigital[pin] : LOW; }
+
+static inline int analogRead(uint8_t pin) {
+  if (pin >= HOST_PINS) return 0;
+  if (hostAnalogReads[pin] > 0 && hostMillis - hostAnalogLastRead[pin] > hostAnalogMaxGap[pin]) {
+    hostAnalogMaxGap[pin] = hostMillis - hostAnalogLastRead[pin];
+  }
+  hostAnalogReads[pin]++;
+  hostAnalogLastRead[pin] = hostMillis;
+  if (pin == hostTracePin && hostTrace != 0) {
+    return hostTrace[(hostMillis / hostTracePeriodMs) % (uint32_t)hostTraceLength];
+  }
+  return hostAnalog[pin];
+}
+
+#ifdef __cplusplus
+
+/* Arduino String on top of std::string; numbers print with two decimals like the core */
+class String {
+ public:
+  String(const char *text = "") : text_(text) {}
+  String(const std::string &text) : text_(text) {}
+  String(char c) : text_(1, c) {}
+  String(int value) : text_(std::to_string(value)) {}
+  String(unsigned int value) : text_(std::to_string(value)) {}
+  String(long value) : text_(std::to_string(value)) {}
+  String(unsigned long value) : text_(std::to_string(value)) {}
+  String(double value, int digits = 2) {
+    char buffer[32];
+    snprintf(buffer, sizeof(buffer), "%.*f", digits, value);
+    text_ = buffer;
+  }
+
+  const char *c_str() const { return text_.c_str(); }
+  unsigned int length() const { return (unsigned int)text_.size(); }
+  bool operator==(const String &other) const { return text_ == other.text_; }
+  bool operator!=(const String &other) const { return text_ != other.text_; }
+  String &operator+=(const String &other) { text_ += other.text_; return *this; }
+  friend String operator+(const String &a, const String &b) { return String(a.text_ + b.text_); }
+  friend String operator+(const char *a, const String &b) { return String(a + b.text_); }
+  friend String operator+(const String &a, const char *b) { return String(a.text_ + b); }
+
+ private:
+  std::string text_;
+};
+
+/* Serial port: writes are captured in output, reads come from input.
+ * With fd set (a non-blocking pty, see sim800_mock.py) writes also go to it and reads drain it into input. */
+class HostStream {
+ public:
+  std::string output;
+  std::string input;
+  int fd = -1;
+
+  void begin(long) {}
+  int available() {
+    if (fd >= 0) {
+      char buffer[256];
+      ssize_t length;
+      while ((length = ::read(fd, buffer, sizeof(buffer))) > 0) input.append(buffer, (size_t)length);
+    }
+    return (int)input.size();
+  }
+  int read() {
+    if (available() == 0) return -1;
+    int c = (uint8_t)input[0];
+    input.erase(0, 1);
+    return c;
+  }
+  size_t write(uint8_t c) { return write(&c, 1); }
+  size_t write(const uint8_t *data, size_t len) {
+    output.append((const char *)data, len);
+    if (fd >= 0 && ::write(fd, data, len) < 0) return 0;
+    return len;
+  }
+  size_t print(const String &text) { return write((const uint8_t *)text.c_str(), text.length()); }
+  size_t print(const char *text) { return print(String(text)); }
+  size_t print(char c) { return write((uint8_t)c); }
+  size_t print(int value) { return print(String(value)); }
+  size_t print(unsigned int value) { return print(String(value)); }
+  size_t print(long value) { return print(String(value)); }
+  size_t print(unsigned long value) { return print(String(value)); }
+  size_t print(double value, int digits = 2) { return print(String(value, digits)); }
+  template <typename T> size_t println(T value) { return print(value) + print("\r\n"); }
+  size_t println(double value, int digits) { return print(value, digits) + print("\r\n"); }
+  size_t println() { return print("\r\n"); }
+};
+
+typedef HostStream Stream;
+
+static HostStream Serial;
+
+#undef abs
+#define abs(x) ((x) > 0 ? (x) : -(x))
+
+#endif /* __cplusplus */
+
+#endif /* HOST_ARDUINO_H */
@@ -0,0 +1,19 @@
+/* Host stand-in for the RandomForestModel library used by re_implementation.c.
+ *
+ * The library is not part of this repository, so the host cannot run its model:
+ * predictWaktu returns hostExplosionRisk, which the harness sets per scenario.
+ */
+#ifndef HOST_RANDOM_FOREST_MODEL_H
+#define HOST_RANDOM_FOREST_MODEL_H
+
+#include <Arduino.h>
+
+static float hostExplosionRisk = 0;
+
+class RandomForestModel {
+ public:
+  RandomForestModel(float, float, float, float) {}
+  float predictWaktu(float ppm, float rate) { return hostExplosionRisk; }
+};
+
+#endif /* HOST_RANDOM_FOREST_MODEL_H */
@@ -0,0 +1,19 @@
+/* Host stand-in for the Servo library: remembers the pin and the last angle written. */
+#ifndef HOST_SERVO_H
+#define HOST_SERVO_H
+
+#include <Arduino.h>
+
+class Servo {
+ public:
+  uint8_t attach(int pin) { pin_ = pin; return 0; }
+  void write(int angle) { angle_ = angle; }
+  int read() { return angle_; }
+  bool attached() { return pin_ >= 0; }
+
+ private:
+  int pin_ = -1;
+  int angle_ = 0;
+};
+
+#endif /* HOST_SERVO_H */
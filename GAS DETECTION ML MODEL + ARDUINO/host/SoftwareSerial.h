@@ -0,0 +1,25 @@
+/* Host stand-in for SoftwareSerial: a HostStream like Serial, one per instance.
+ * Instances register themselves so the harness can reach them without knowing the sketch's names.
+ */
+#ifndef HOST_SOFTWARE_SERIAL_H
+#define HOST_SOFTWARE_SERIAL_H
+
+#include <Arduino.h>
+
+#define HOST_SOFTWARE_SERIALS 4
+
+class SoftwareSerial;
+static SoftwareSerial *hostSoftwareSerials[HOST_SOFTWARE_SERIALS];
+static uint8_t hostSoftwareSerialCount = 0;
+
+class SoftwareSerial : public HostStream {
+ public:
+  SoftwareSerial(uint8_t receivePin, uint8_t transmitPin) : receivePin(receivePin), transmitPin(transmitPin) {
+    if (hostSoftwareSerialCount < HOST_SOFTWARE_SERIALS) hostSoftwareSerials[hostSoftwareSerialCount++] = this;
+  }
+
+  uint8_t receivePin;
+  uint8_t transmitPin;
+};
+
+#endif /* HOST_SOFTWARE_SERIAL_H */
@@ -0,0 +1,347 @@
+import os
+import numpy as np
+
+from lite_runtime.dense import ACTIVATIONS, DenseNetwork
+from lite_runtime.export import flatten_dense
+from tflite_inspector import plan_arena
+
+# Requantization multipliers are 15-bit fixed point: M = mult * 2^-shift, 2^14 <= mult < 2^15
+MULTIPLIER_BITS = 15
+# Inputs and output logits are always int16; hidden activations follow the weight width
+INPUT_MAX = LOGIT_MAX = 32767
+
+
+def _requantize(acc, mult, shift, low, high):
+    # Mirrors nnRequantize in the generated C: round half up, then saturate
+    return np.clip((acc * mult + (np.int64(1) << (shift - 1))) >> shift, low, high)
+
+
+def _multiplier(scale):
+    """Split a positive real scale into (mult, shift) with scale ~= mult * 2^-shift."""
+    fraction, exponent = np.frexp(scale)
+    mult = np.rint(fraction * (1 << MULTIPLIER_BITS)).astype(np.int64)
+    shift = MULTIPLIER_BITS - exponent.astype(np.int64)
+    carry = mult == (1 << MULTIPLIER_BITS)
+    mult, shift = np.where(carry, mult >> 1, mult), np.where(carry, shift - 1, shift)
+    # Scales above 2^(MULTIPLIER_BITS - 1) would need a left shift; fold it into the multiplier
+    low = shift < 1
+    mult, shift = np.where(low, mult << np.maximum(1 - shift, 0), mult), np.maximum(shift, 1)
+    if mult.max() >= 1 << 31:
+        raise ValueError("Requantization scale too large for an int32 multiplier")
+    return mult, shift
+
+
+class FixedPointNetwork:
+    """
+    Integer-only form of a Dense/ReLU/softmax network, bit-exact with the C that export_c_header writes.
+
+    Inputs are scaled per feature by a power of two into int16, and the scale is
+    folded into the first layer's weights, so raw ADC codes and small ppm values
+    both keep their resolution. Weights are int8 or int16 with one scale per
+    output unit; every layer accumulates in integers and requantizes with a
+    15-bit multiplier and a shift. Softmax heads keep their int16 logits and
+    are reduced with argmax, which picks the same class as softmax.
+    """
+
+    def __init__(self, network, calibration_X, bits=8):
+        """
+        :param network: lite_runtime DenseNetwork (see from_keras).
+        :param calibration_X: Samples whose float activations set the input and activation ranges.
+        :param bits: Weight width, 8 or 16; hidden activations use the same width.
+        """
+        if bits not in (8, 16):
+            raise ValueError("bits must be 8 or 16")
+        self.bits = bits
+        self.outputs = list(network.outputs)
+        self.classes = network.classes
+        self.n_features = network.n_features
+        weight_max = (1 << (bits - 1)) - 1
+
+        X = np.asarray(calibration_X, dtype=np.float32)
+        extent = np.abs(X).max(axis=0)
+        self.input_exponent = np.floor(np.log2(INPUT_MAX / np.where(extent > 0, extent, 1))).astype(np.int64)
+        self.input_scale = np.ldexp(np.float32(1), self.input_exponent).astype(np.float32)
+
+        activations = {None: X}
+        scales = {None: None}  # Real value of one step of each integer tensor (None: per-feature inputs)
+        self.layers = []
+        for name, source, activation, kernel, bias in network.layers:
+            head = name in self.outputs
+            relu = activation is ACTIVATIONS['relu']
+            if not head and not relu and activation is not ACTIVATIONS['linear']:
+                raise ValueError(f"Unsupported hidden activation in {name}")
+            if head and activation not in (ACTIVATIONS['softmax'], ACTIVATIONS['linear']):
+                raise ValueError(f"Head {name} must be softmax or linear to be replaced by argmax")
+
+            folded = kernel.astype(np.float64)
+            if scales[source] is None:
+                folded = folded / self.input_scale[:, None]
+                in_scale = 1.0
+            else:
+                in_scale = scales[source]
+            extent = np.abs(folded).max(axis=0)
+            weight_scale = np.where(extent > 0, extent, 1) / weight_max
+            weights = np.rint(folded / weight_scale).astype(np.int64)
+
+            logits = activations[source] @ kernel + bias
+            outputs = logits if head or not relu else np.maximum(logits, 0)
+            out_max = LOGIT_MAX if head else weight_max
+            out_extent = float(np.abs(outputs).max())
+            out_scale = (out_extent if out_extent > 0 else 1.0) / out_max
+
+            mult, shift = _multiplier(in_scale * weight_scale / out_scale)
+            self.layers.append({
+                'name': name, 'source': source, 'head': head, 'relu': relu and not head,
+                'weights': weights, 'bias': np.rint(bias / (in_scale * weight_scale)).astype(np.int64),
+                'mult': mult, 'shift': shift,
+                'low': 0 if relu and not head else -out_max - 1, 'high': out_max,
+                'in_wide': scales[source] is None or self.bits == 16, 'out_wide': head or self.bits == 16,
+            })
+            activations[name], scales[name] = outputs.astype(np.float32), out_scale
+        self._check_ranges()
+
+    @classmethod
+    def from_keras(cls, model, calibration_X, bits=8, classes=None):
+        """
+        :param model: Keras model of Dense layers (Sequential or one softmax head per label).
+        :param calibration_X: Samples that set the input and activation ranges.
+        :param bits: Weight width, 8 or 16.
+        :param classes: Optional class labels per output, as for lite_runtime.export.flatten_dense.
+        :return: FixedPointNetwork.
+        """
+        arrays, meta = flatten_dense(model, classes)
+        return cls(DenseNetwork(arrays, meta), calibration_X, bits=bits)
+
+    def _check_ranges(self):
+        # The C accumulates in int32 for 8-bit weights and int64 for 16-bit ones, and
+        # multiplies the accumulator by the 15-bit multiplier in int64
+        limit = (1 << 31) if self.bits == 8 else (1 << 47)
+        for layer in self.layers:
+            in_max = INPUT_MAX + 1 if layer['in_wide'] else (1 << (self.bits - 1))
+            worst = np.abs(layer['weights']).sum(axis=0) * in_max + np.abs(layer['bias'])
+            if worst.max() >= limit or np.abs(layer['bias']).max() >= 1 << 31:
+                raise ValueError(f"Accumulator of {layer['name']} could overflow")
+
+    def quantize_inputs(self, X):
+        """
+        :param X: 2-D array of float features.
+        :return: int16 inputs as the C computes them (floorf(x * scale + 0.5f), saturated).
+        """
+        scaled = np.floor(np.asarray(X, dtype=np.float32) * self.input_scale + np.float32(0.5))
+        return np.clip(scaled, -INPUT_MAX - 1, INPUT_MAX).astype(np.int64)
+
+    def logits(self, X):
+        """
+        :param X: 2-D array of float features.
+        :return: Dictionary mapping head name to its int16 logits, shape (n_samples, n_classes).
+        """
+        values = {None: self.quantize_inputs(X)}
+        for layer in self.layers:
+            acc = values[layer['source']] @ layer['weights'] + layer['bias']
+            values[layer['name']] = _requantize(acc, layer['mult'], layer['shift'], layer['low'], layer['high'])
+        return {name: values[name] for name in self.outputs}
+
+    def predict_codes(self, X):
+        """
+        :param X: 2-D array of float features.
+        :return: Class index per head, shape (n_samples, n_heads).
+        """
+        logits = self.logits(X)
+        return np.column_stack([np.argmax(logits[name], axis=1) for name in self.outputs])
+
+    def predict(self, X):
+        """
+        :param X: 2-D array of float features.
+        :return: Predicted classes (label names if known), shape (n_samples,) or (n_samples, n_heads).
+        """
+        codes = self.predict_codes(X)
+        columns = [codes[:, i] if classes is None else np.asarray(classes)[codes[:, i]]
+                   for i, classes in enumerate(self.classes)]
+        return columns[0] if len(columns) == 1 else np.column_stack(columns)
+
+    def memory(self):
+        """
+        Data the exported header places in flash and SRAM.
+
+        :return: Dictionary with flash_bytes (weights, biases, multipliers, shifts, input
+                 scales), arena_bytes (static activation buffer) and the arena offsets.
+        """
+        weight_bytes = self.bits // 8
+        flash = 4 * self.n_features
+        for layer in self.layers:
+            n_out = layer['weights'].shape[1]
+            flash += layer['weights'].size * weight_bytes + n_out * (4 + 4 + 1)
+
+        # Input and layer outputs share one buffer, planned over their lifetimes
+        tensors = [None] + [layer['name'] for layer in self.layers]
+        sizes = [2 * self.n_features] + [layer['weights'].shape[1] * (2 if layer['out_wide'] else 1)
+                                         for layer in self.layers]
+        first = list(range(-1, len(self.layers)))
+        last = [max([i for i, layer in enumerate(self.layers) if layer['source'] == tensor] or [first[t]])
+                for t, tensor in enumerate(tensors)]
+        offsets, arena = plan_arena(sizes, first, last, alignment=2)
+        return {'flash_bytes': flash, 'arena_bytes': arena, 'offsets': dict(zip(tensors, offsets))}
+
+
+def _identifier(name):
+    return ''.join(c if c.isalnum() else '_' for c in name).upper()
+
+
+def _function_name(name):
+    return 'nn' + ''.join(part.capitalize() for part in _identifier(name).split('_') if part) + 'Predict'
+
+
+def _c_array(values, per_line=16):
+    values = [str(int(v)) for v in np.ravel(values)]
+    return ",\n".join("  " + ", ".join(values[i:i + per_line]) for i in range(0, len(values), per_line))
+
+
+NN_HELPERS = """#ifndef NN_FIXED_POINT_HELPERS
+#define NN_FIXED_POINT_HELPERS
+/* Shared by every generated network header */
+static int16_t nnRequantize(int64_t acc, int32_t mult, int8_t shift, int16_t low, int16_t high) {
+  int64_t value = (acc * mult + ((int64_t)1 << (shift - 1))) >> shift;
+  return value < low ? low : value > high ? high : (int16_t)value;
+}
+
+/* One Dense layer; weights are [nOut][nIn] in PROGMEM, activations int8 or int16 */
+static void nnDense(const void *weights, uint8_t weightBytes, const int32_t *bias, const int32_t *mult,
+                    const int8_t *shift, const void *in, uint8_t inBytes, uint16_t nIn,
+                    void *out, uint8_t outBytes, uint16_t nOut, int16_t low, int16_t high) {
+  for (uint16_t o = 0; o < nOut; o++) {
+    int64_t acc;
+    if (weightBytes == 1) {
+      int32_t sum = (int32_t)pgm_read_dword(&bias[o]);
+      const int8_t *row = (const int8_t *)weights + (uint32_t)o * nIn;
+      for (uint16_t i = 0; i < nIn; i++) {
+        int16_t x = inBytes == 2 ? ((const int16_t *)in)[i] : ((const int8_t *)in)[i];
+        sum += (int32_t)x * (int8_t)pgm_read_byte(&row[i]);
+      }
+      acc = sum;
+    } else {
+      acc = (int32_t)pgm_read_dword(&bias[o]);
+      const int16_t *row = (const int16_t *)weights + (uint32_t)o * nIn;
+      for (uint16_t i = 0; i < nIn; i++) {
+        int16_t x = inBytes == 2 ? ((const int16_t *)in)[i] : ((const int8_t *)in)[i];
+        acc += (int32_t)x * (int16_t)pgm_read_word(&row[i]);
+      }
+    }
+    int16_t value = nnRequantize(acc, (int32_t)pgm_read_dword(&mult[o]), (int8_t)pgm_read_byte(&shift[o]), low, high);
+    if (outBytes == 2) ((int16_t *)out)[o] = value;
+    else ((int8_t *)out)[o] = (int8_t)value;
+  }
+}
+
+static uint8_t nnArgmax(const int16_t *logits, uint8_t n) {
+  uint8_t best = 0;
+  for (uint8_t i = 1; i < n; i++) {
+    if (logits[i] > logits[best]) best = i;
+  }
+  return best;
+}
+#endif /* NN_FIXED_POINT_HELPERS */
+"""
+
+
+def export_c_header(network, path, name, source='keras_to_c.py'):
+    """
+    Write a FixedPointNetwork as a standalone C header: no TFLite Micro, no float math in the layers.
+
+    :param network: FixedPointNetwork to export.
+    :param path: Output header path.
+    :param name: Model name; prefixes every symbol (e.g. 'leak_severity' -> nnLeakSeverityPredict).
+    :param source: Script named in the generated-file banner.
+    :return: Result of network.memory(), plus the name of the generated predict function.
+    """
+    prefix = f"NN_{_identifier(name)}"
+    memory = network.memory()
+    offsets = memory['offsets']
+    weight_type = 'int8_t' if network.bits == 8 else 'int16_t'
+
+    defines = [f"#define {prefix}_INPUTS {network.n_features}", f"#define {prefix}_HEADS {len(network.outputs)}",
+               f"#define {prefix}_ARENA_BYTES {memory['arena_bytes']}"]
+    for i, (head, classes) in enumerate(zip(network.outputs, network.classes)):
+        defines.append(f"#define {prefix}_HEAD_{_identifier(head)} {i}")
+        if classes is not None:
+            defines += [f"#define {prefix}_{_identifier(head)}_{_identifier(str(c))} {code}"
+                        for code, c in enumerate(classes)]
+
+    arrays, calls = [], []
+    for index, layer in enumerate(network.layers):
+        layer_prefix = f"{prefix}_L{index}"
+        n_in, n_out = layer['weights'].shape
+        arrays.append(f"""/* {layer['name']}: {n_in} -> {n_out}{', ReLU' if layer['relu'] else ''}{', argmax head' if layer['head'] else ''} */
+static const {weight_type} {layer_prefix}_W[{n_out * n_in}] PROGMEM = {{
+{_c_array(layer['weights'].T)}
+}};
+static const int32_t {layer_prefix}_B[{n_out}] PROGMEM = {{
+{_c_array(layer['bias'])}
+}};
+static const int32_t {layer_prefix}_M[{n_out}] PROGMEM = {{
+{_c_array(layer['mult'])}
+}};
+static const int8_t {layer_prefix}_S[{n_out}] PROGMEM = {{
+{_c_array(layer['shift'])}
+}};
+""")
+        calls.append(f"  nnDense({layer_prefix}_W, {network.bits // 8}, {layer_prefix}_B, {layer_prefix}_M, {layer_prefix}_S, "
+                     f"arena + {offsets[layer['source']]}, {2 if layer['in_wide'] else 1}, {n_in}, "
+                     f"arena + {offsets[layer['name']]}, {2 if layer['out_wide'] else 1}, {n_out}, "
+                     f"{layer['low']}, {layer['high']});")
+        if layer['head']:
+            calls.append(f"  classes[{network.outputs.index(layer['name'])}] = "
+                         f"nnArgmax((const int16_t *)(arena + {offsets[layer['name']]}), {n_out});")
+
+    sources = [layer['source'] for layer in network.layers]
+    if sources == [None] + [layer['name'] for layer in network.layers[:-1]]:
+        shape = ' -> '.join([str(network.n_features)] + [str(layer['weights'].shape[1]) for layer in network.layers])
+    else:
+        shape = f"{network.n_features} inputs, {len(network.layers)} Dense layers, {len(network.outputs)} heads"
+    scales = ', '.join(f"{s:.1f}f" for s in network.input_scale)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as file:
+        file.write(f"""/* Generated by {source} -- do not edit by hand.
+ * {name}: {shape}, int{network.bits} weights with per-unit requantization, argmax heads.
+ * Flash: {memory['flash_bytes']} bytes of constants. SRAM: {memory['arena_bytes']} bytes of activations.
+ */
+#ifndef {prefix}_H
+#define {prefix}_H
+
+#include <stdint.h>
+#include <math.h>
+#ifdef __AVR__
+#include <avr/pgmspace.h>
+#else
+#define PROGMEM
+#define pgm_read_byte(addr) (*(const uint8_t *)(addr))
+#define pgm_read_word(addr) (*(const uint16_t *)(addr))
+#define pgm_read_dword(addr) (*(const uint32_t *)(addr))
+#define pgm_read_float(addr) (*(const float *)(addr))
+#endif
+
+{NN_HELPERS}
+{chr(10).join(defines)}
+
+/* Power-of-two scale that brings each feature into int16 */
+static const float {prefix}_INPUT_SCALE[{network.n_features}] PROGMEM = {{ {scales} }};
+
+{chr(10).join(arrays)}
+static int16_t {prefix}_ARENA[({memory['arena_bytes']} + 1) / 2];
+
+/* Classify one reading: features[{prefix}_INPUTS] in, one class index per head out */
+static void {_function_name(name)}(const float *features, uint8_t *classes) {{
+  uint8_t *arena = (uint8_t *){prefix}_ARENA;
+  int16_t *input = (int16_t *)(arena + {offsets[None]});
+  for (uint8_t j = 0; j < {prefix}_INPUTS; j++) {{
+    float scaled = floorf(features[j] * pgm_read_float(&{prefix}_INPUT_SCALE[j]) + 0.5f);
+    input[j] = scaled < -32768.0f ? -32768 : scaled > 32767.0f ? 32767 : (int16_t)scaled;
+  }}
+{chr(10).join(calls)}
+}}
+
+#endif /* {prefix}_H */
+""")
+    return {**memory, 'function': _function_name(name)}
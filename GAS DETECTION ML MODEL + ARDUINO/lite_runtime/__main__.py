@@ -0,0 +1,67 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from . import COLD_START_BUDGET_S, RSS_BUDGET_MB
+
+# Run in a fresh interpreter so the measurement includes importing NumPy and the runtime
+CHILD = """
+import time
+start = time.perf_counter()
+import resource, sys, json
+import numpy as np
+import lite_runtime
+models = lite_runtime.load(sys.argv[1])
+X = np.zeros((1, next(iter(models.values())).n_features))
+for model in models.values():
+    model.predict(X)
+cold_start = time.perf_counter() - start
+
+latency = time.perf_counter()
+for _ in range(1000):
+    for model in models.values():
+        model.predict(X)
+latency = (time.perf_counter() - latency) / 1000
+
+heavy = [name for name in ('pandas', 'sklearn', 'tensorflow', 'keras') if name in sys.modules]
+rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({'cold_start_s': cold_start, 'rss_mb': rss_mb, 'row_latency_ms': latency * 1000,
+                  'models': len(models), 'heavy_imports': heavy}))
+"""
+
+
+def measure(path):
+    """
+    Measure cold start, peak RSS and single-row latency of loading a model file.
+
+    :param path: Exported .npz model file.
+    :return: Dictionary of measurements.
+    """
+    package_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [package_dir, os.environ.get('PYTHONPATH')])))
+    output = subprocess.run([sys.executable, '-c', CHILD, os.path.abspath(path)],
+                            capture_output=True, text=True, check=True, env=env).stdout
+    return json.loads(output)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Check a lite_runtime model against the cold-start and memory budgets.")
+    parser.add_argument('model', help="Exported .npz model file")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters to start; the median is reported")
+    args = parser.parse_args()
+
+    runs = sorted((measure(args.model) for _ in range(args.runs)), key=lambda r: r['cold_start_s'])
+    result = runs[len(runs) // 2]
+    print(f"Models: {result['models']}")
+    print(f"Cold start: {result['cold_start_s'] * 1000:.0f} ms (budget {COLD_START_BUDGET_S * 1000:.0f} ms)")
+    print(f"Peak RSS: {result['rss_mb']:.1f} MB (budget {RSS_BUDGET_MB} MB)")
+    print(f"Single-row latency, all models: {result['row_latency_ms']:.3f} ms")
+    if result['heavy_imports']:
+        print(f"Heavy modules were imported: {', '.join(result['heavy_imports'])}")
+
+    ok = (result['cold_start_s'] <= COLD_START_BUDGET_S and result['rss_mb'] <= RSS_BUDGET_MB
+          and not result['heavy_imports'])
+    print("Within budget" if ok else "Over budget")
+    sys.exit(0 if ok else 1)
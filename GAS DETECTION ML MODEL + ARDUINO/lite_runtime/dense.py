@@ -0,0 +1,64 @@
+import numpy as np
+
+
+def _softmax(z):
+    z = np.exp(z - z.max(axis=1, keepdims=True))
+    return z / z.sum(axis=1, keepdims=True)
+
+
+ACTIVATIONS = {
+    'linear': lambda z: z,
+    'relu': lambda z: np.maximum(z, 0),
+    'sigmoid': lambda z: 1 / (1 + np.exp(-z)),
+    'tanh': np.tanh,
+    'softmax': _softmax,
+}
+
+
+class DenseNetwork:
+    """
+    Keras network of Dense layers rebuilt from its weight matrices.
+
+    Layers are evaluated in saved (topological) order; each one reads the model
+    input or the output of an earlier layer, which covers both the Sequential
+    per-label networks and the shared-trunk network with one softmax head per label.
+    """
+
+    kind = 'dense'
+
+    def __init__(self, arrays, meta):
+        """
+        :param arrays: Dictionary with <layer>/kernel and <layer>/bias per layer and
+                       classes_<i> per output (when label names were exported).
+        :param meta: Dictionary with 'layers' (name, input, activation), 'outputs' and 'n_features'.
+        """
+        self.layers = [(layer['name'], layer['input'], ACTIVATIONS[layer['activation']],
+                        arrays[f"{layer['name']}/kernel"], arrays[f"{layer['name']}/bias"])
+                       for layer in meta['layers']]
+        self.outputs = list(meta['outputs'])
+        self.n_features = meta['n_features']
+        self.classes = [arrays.get(f'classes_{i}') for i in range(len(self.outputs))]
+
+    def predict_proba(self, X):
+        """
+        :param X: 2-D array of samples.
+        :return: One output array per head (a single array for one head).
+        """
+        activations = {None: np.asarray(X, dtype=np.float32)}
+        for name, source, activation, kernel, bias in self.layers:
+            activations[name] = activation(activations[source] @ kernel + bias)
+        probas = [activations[name] for name in self.outputs]
+        return probas[0] if len(probas) == 1 else probas
+
+    def predict(self, X):
+        """
+        :param X: 2-D array of samples.
+        :return: Predicted classes (label names if exported, else indices),
+                 shape (n_samples,) or (n_samples, n_outputs).
+        """
+        probas = self.predict_proba(X)
+        if len(self.outputs) == 1:
+            probas = [probas]
+        predictions = [np.argmax(proba, axis=1) if classes is None else classes[np.argmax(proba, axis=1)]
+                       for classes, proba in zip(self.classes, probas)]
+        return predictions[0] if len(predictions) == 1 else np.column_stack(predictions)
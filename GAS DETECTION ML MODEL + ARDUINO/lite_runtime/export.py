@@ -0,0 +1,122 @@
+import json
+
+import numpy as np
+
+FORMAT_VERSION = 1
+
+
+def _classes_array(classes):
+    # Store labels as plain unicode/numeric arrays so loading never needs pickle
+    classes = np.asarray(classes)
+    return classes.astype(str) if classes.dtype == object else classes
+
+
+def flatten_trees(model):
+    """
+    Flatten a fitted sklearn DecisionTreeClassifier or RandomForestClassifier.
+
+    Only attributes of the fitted model are read, so scikit-learn is not imported here.
+
+    :param model: Fitted tree or forest classifier (single or multi-output).
+    :return: Tuple of (arrays, meta) for TreeEnsemble.
+    """
+    trees = [estimator.tree_ for estimator in getattr(model, 'estimators_', [model])]
+    n_outputs = trees[0].n_outputs
+    max_classes = max(tree.value.shape[2] for tree in trees)
+
+    offsets = np.cumsum([0] + [tree.node_count for tree in trees])
+    n_nodes = offsets[-1]
+    left = np.empty(n_nodes, dtype=np.int32)
+    right = np.empty(n_nodes, dtype=np.int32)
+    feature = np.zeros(n_nodes, dtype=np.int32)
+    threshold = np.full(n_nodes, np.inf)
+    value = np.zeros((n_nodes, n_outputs, max_classes))
+
+    for tree, offset in zip(trees, offsets):
+        nodes = np.arange(tree.node_count)
+        leaf = tree.children_left == -1
+        span = slice(offset, offset + tree.node_count)
+        # Leaves loop back to themselves so a walk can run for the full depth unconditionally
+        left[span] = np.where(leaf, nodes, tree.children_left) + offset
+        right[span] = np.where(leaf, nodes, tree.children_right) + offset
+        feature[span] = np.where(leaf, 0, tree.feature)
+        threshold[span] = np.where(leaf, np.inf, tree.threshold)
+        counts = tree.value
+        totals = counts.sum(axis=2, keepdims=True)
+        value[span, :, :counts.shape[2]] = counts / np.where(totals == 0, 1, totals)
+
+    classes = model.classes_ if n_outputs > 1 else [model.classes_]
+    arrays = {
+        'children_left': left, 'children_right': right, 'feature': feature,
+        'threshold': threshold, 'value': value,
+        'roots': offsets[:-1].astype(np.int32),
+        'depths': np.array([tree.max_depth for tree in trees], dtype=np.int32),
+    }
+    arrays.update({f'classes_{i}': _classes_array(c) for i, c in enumerate(classes)})
+    return arrays, {'n_features': int(model.n_features_in_)}
+
+
+def flatten_dense(model, classes=None):
+    """
+    Flatten a Keras model made of Dense layers (Sequential or functional with several heads).
+
+    :param model: Built Keras model.
+    :param classes: Optional class labels per output, e.g. a LabelEncoder's classes_
+                    (a list for one output, a dictionary keyed by output name for several).
+    :return: Tuple of (arrays, meta) for DenseNetwork.
+    """
+    arrays, layers, producers = {}, [], {}
+    for layer in model.layers:
+        if type(layer).__name__ == 'InputLayer':
+            continue
+        source = producers.get(layer.input.name)  # None means the model input
+        weights = layer.get_weights()
+        if not weights:
+            # Dropout and other weightless layers are identities at inference
+            producers[layer.output.name] = source
+            continue
+        if len(weights) != 2 or weights[0].ndim != 2:
+            raise ValueError(f"Unsupported layer for export: {layer.name}")
+
+        layers.append({'name': layer.name, 'input': source,
+                       'activation': layer.get_config().get('activation', 'linear')})
+        arrays[f'{layer.name}/kernel'] = weights[0].astype(np.float32)
+        arrays[f'{layer.name}/bias'] = weights[1].astype(np.float32)
+        producers[layer.output.name] = layer.name
+
+    outputs = [producers[tensor.name] for tensor in model.outputs]
+    if classes is not None:
+        per_output = [classes[name] for name in outputs] if isinstance(classes, dict) else [classes]
+        arrays.update({f'classes_{i}': _classes_array(c) for i, c in enumerate(per_output)})
+    return arrays, {'layers': layers, 'outputs': outputs, 'n_features': int(model.inputs[0].shape[-1])}
+
+
+def export_models(models, path, classes=None, outputs=None):
+    """
+    Export models for the NumPy-only runtime into a single .npz file.
+
+    :param models: Dictionary mapping a name (e.g. the label) to a fitted sklearn tree/forest
+                   or a Keras Dense model.
+    :param path: Output .npz path.
+    :param classes: Optional dictionary mapping a Keras model's name to its class labels
+                    (see flatten_dense).
+    :param outputs: Optional dictionary mapping a multi-output tree model's name to its
+                    output (label) names, in training column order.
+    :return: Path written.
+    """
+    arrays, meta = {}, {'format': 'lite_runtime', 'version': FORMAT_VERSION, 'models': {}}
+    for name, model in models.items():
+        if hasattr(model, 'tree_') or hasattr(model, 'estimators_'):
+            model_arrays, model_meta = flatten_trees(model)
+            model_meta['kind'] = 'trees'
+            n_outputs = model.n_outputs_
+            names = (outputs or {}).get(name, [name] if n_outputs == 1 else [f'{name}_{i}' for i in range(n_outputs)])
+            model_meta['outputs'] = list(names)
+        else:
+            model_arrays, model_meta = flatten_dense(model, (classes or {}).get(name))
+            model_meta['kind'] = 'dense'
+        meta['models'][name] = model_meta
+        arrays.update({f'{name}/{key}': array for key, array in model_arrays.items()})
+
+    np.savez(path, meta=np.array(json.dumps(meta)), **arrays)
+    return path
@@ -0,0 +1,95 @@
+import argparse
+import os
+import time
+
+import numpy as np
+
+from .trees import TreeEnsemble
+
+
+def _timed(function, X, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        function(X)
+    return (time.perf_counter() - start) / repeat
+
+
+def count_mismatches(model, ensemble, X):
+    """
+    :param model: Fitted sklearn tree or forest.
+    :param ensemble: TreeEnsemble built from it.
+    :param X: 2-D array of samples.
+    :return: Number of samples where any output's predicted class differs.
+    """
+    expected, actual = model.predict(X), ensemble.predict(X)
+    if expected.ndim == 1:
+        expected, actual = expected[:, None], actual[:, None]
+    return int(np.any(expected.astype(str) != actual.astype(str), axis=1).sum())
+
+
+def check_parity(model, X, feature_scale=None, repeat=200):
+    """
+    Compare the packed NumPy evaluator with sklearn on the same inputs and time both.
+
+    :param model: Fitted sklearn DecisionTreeClassifier or RandomForestClassifier.
+    :param X: 2-D array of samples to compare on.
+    :param feature_scale: Optional scale for the int16 evaluator (None compares the float one).
+    :param repeat: Single-row predictions timed per evaluator.
+    :return: Dictionary with mismatches, max_proba_diff, single-row latencies (ms)
+             and bulk throughputs (rows/s) for sklearn and the NumPy evaluator.
+    """
+    ensemble = TreeEnsemble.from_sklearn(model, feature_scale=feature_scale)
+    X = np.asarray(X, dtype=np.float64)
+    mismatches = count_mismatches(model, ensemble, X)
+
+    expected_proba = model.predict_proba(X)
+    actual_proba = ensemble.predict_proba(X)
+    if not isinstance(expected_proba, list):
+        expected_proba, actual_proba = [expected_proba], [actual_proba]
+    max_diff = max(float(np.abs(e - a).max()) for e, a in zip(expected_proba, actual_proba))
+
+    row = X[:1]
+    return {
+        'mismatches': mismatches,
+        'max_proba_diff': max_diff,
+        'sklearn_row_ms': _timed(model.predict, row, repeat) * 1000,
+        'lite_row_ms': _timed(ensemble.predict, row, repeat) * 1000,
+        'sklearn_rows_per_s': len(X) / _timed(model.predict, X, 3),
+        'lite_rows_per_s': len(X) / _timed(ensemble.predict, X, 3),
+    }
+
+
+def _report(name, result):
+    print(f"{name}: {result['mismatches']} mismatches, max probability difference {result['max_proba_diff']:.2e}")
+    print(f"  single row: sklearn {result['sklearn_row_ms']:.3f} ms, numpy {result['lite_row_ms']:.3f} ms")
+    print(f"  bulk: sklearn {result['sklearn_rows_per_s']:,.0f} rows/s, numpy {result['lite_rows_per_s']:,.0f} rows/s")
+
+
+if __name__ == '__main__':
+    # Development check: needs pandas and scikit-learn, unlike the runtime itself
+    import pandas as pd
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    parser = argparse.ArgumentParser(description="Check the NumPy tree evaluator against sklearn on the gas datasets.")
+    parser.add_argument('--dataset', default=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                                          'dataset', 'Gas_Sensors_Measurements.csv'))
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.dataset)
+    X = df[['MQ2', 'MQ3', 'MQ5', 'MQ6', 'MQ7', 'MQ8', 'MQ135']].to_numpy()
+    y = df['Gas'].to_numpy()
+    # Off-grid inputs too, so thresholds are exercised from both sides
+    X_check = np.vstack((X, X + np.random.default_rng(0).integers(-3, 4, X.shape)))
+
+    forest = RandomForestClassifier(n_estimators=100, random_state=42).fit(X, y)
+    _report("EDA forest (100 trees)", check_parity(forest, X_check))
+    _report("EDA forest, int16 ADC thresholds", check_parity(forest, X_check, feature_scale=1))
+
+    # test2.py's single-channel trees: every ADC code with its simulated ppm
+    raw = np.arange(1024)
+    X_adc = np.column_stack((raw, raw * np.select([raw < 150, raw < 500], [0.1, 0.2], 0.3)))
+    labels = np.select([raw < 150, raw < 500], ['Low', 'Moderate'], 'High')
+    tree = DecisionTreeClassifier(random_state=42).fit(X_adc, labels)
+    _report("test2 tree", check_parity(tree, X_adc))
+    _report("test2 tree, int16 thresholds (ppm x10)", check_parity(tree, X_adc, feature_scale=(1, 10)))
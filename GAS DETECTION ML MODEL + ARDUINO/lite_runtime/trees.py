@@ -0,0 +1,172 @@
+import numpy as np
+
+INT16_LEAF = np.iinfo(np.int16).max
+# Samples walked together; keeps the per-level working arrays in cache for archive-sized inputs
+CHUNK_ROWS = 1024
+
+
+def pack_nodes(children_left, children_right, feature, threshold, roots):
+    """
+    Renumber the nodes of all trees breadth-first so that siblings are adjacent.
+
+    With the right child always at left + 1, one step of a walk is a gather of
+    left, feature and threshold plus a comparison: next = left + (x > threshold).
+    Leaves keep pointing at themselves and read a constant zero column
+    (feature index -1 here, remapped by TreeEnsemble) against +inf.
+
+    :param children_left: Left child per node (leaves point at themselves).
+    :param children_right: Right child per node (leaves point at themselves).
+    :param feature: Feature index per node.
+    :param threshold: Split threshold per node (+inf for leaves).
+    :param roots: Root node of every tree.
+    :return: Tuple of (order, left, feature, threshold): old node id per new id,
+             then the packed arrays indexed by new id. Roots become 0..n_trees-1.
+    """
+    order = []
+    frontier = np.asarray(roots)
+    while len(frontier):
+        order.append(frontier)
+        internal = frontier[children_left[frontier] != frontier]
+        # Interleave left/right so each pair of children gets consecutive new ids
+        frontier = np.column_stack((children_left[internal], children_right[internal])).reshape(-1)
+    order = np.concatenate(order)
+
+    new_id = np.empty(len(children_left), dtype=np.int32)
+    new_id[order] = np.arange(len(order), dtype=np.int32)
+    leaf = children_left[order] == order
+    left = np.where(leaf, new_id[order], new_id[children_left[order]]).astype(np.int32)
+    return order, left, np.where(leaf, -1, feature[order]).astype(np.int32), threshold[order]
+
+
+class TreeEnsemble:
+    """
+    Decision tree or random forest classifier rebuilt from flattened sklearn tree_ arrays.
+
+    The nodes of all trees are packed into contiguous arrays (see pack_nodes),
+    and every sample is walked through every tree at once, one level per step,
+    with a handful of vectorized NumPy operations. Probabilities are averaged
+    over trees in the same order as sklearn, so predictions match it exactly.
+
+    With feature_scale set, thresholds are stored as int16 in the ADC domain:
+    inputs are scaled and rounded to integers and compared against
+    floor(threshold * scale), which is exact whenever the scaled inputs are
+    integers (raw ADC codes at scale 1, ppm = raw * 0.1/0.2/0.3 at scale 10).
+    """
+
+    kind = 'trees'
+
+    def __init__(self, arrays, meta, feature_scale=None):
+        """
+        :param arrays: Dictionary with children_left, children_right, feature, threshold,
+                       value (n_nodes, n_outputs, max_classes; normalized per node),
+                       roots, depths and classes_<i> per output.
+        :param meta: Dictionary with 'outputs' (output names) and 'n_features'.
+        :param feature_scale: Optional scale (scalar or one per feature) for int16 thresholds.
+        """
+        self.outputs = list(meta['outputs'])
+        self.n_features = meta['n_features']
+        self.classes = [arrays[f'classes_{i}'] for i in range(len(self.outputs))]
+        self.n_trees = len(arrays['roots'])
+        self.depth = int(arrays['depths'].max())
+
+        order, left, feature, threshold = pack_nodes(arrays['children_left'], arrays['children_right'],
+                                                     arrays['feature'], arrays['threshold'], arrays['roots'])
+        # Leaves read an extra all-zero input column
+        feature[feature < 0] = self.n_features
+        self._left = left
+        self._feature = feature
+        self._internal = feature < self.n_features
+        self.value = arrays['value'][order]
+
+        self.feature_scale = None
+        if feature_scale is None:
+            self._threshold = threshold
+        else:
+            self.feature_scale = np.broadcast_to(np.asarray(feature_scale, dtype=np.float64), (self.n_features,))
+            scale = np.append(self.feature_scale, 1.0)[feature]
+            scaled = np.floor(np.where(np.isinf(threshold), INT16_LEAF, threshold * scale))
+            if scaled[~np.isinf(threshold)].max(initial=0) >= INT16_LEAF or scaled.min(initial=0) < -INT16_LEAF:
+                raise ValueError("Scaled thresholds do not fit in int16")
+            self._threshold = scaled.astype(np.int16)
+
+    @classmethod
+    def from_sklearn(cls, model, outputs=None, feature_scale=None):
+        """
+        Build an ensemble straight from a fitted sklearn tree or forest.
+
+        :param model: Fitted DecisionTreeClassifier or RandomForestClassifier.
+        :param outputs: Output names; defaults to 'output_<i>'.
+        :param feature_scale: Optional scale for int16 thresholds.
+        :return: TreeEnsemble.
+        """
+        from .export import flatten_trees
+        arrays, meta = flatten_trees(model)
+        meta['outputs'] = outputs or [f'output_{i}' for i in range(model.n_outputs_)]
+        return cls(arrays, meta, feature_scale=feature_scale)
+
+    def _inputs(self, X):
+        X = np.asarray(X)
+        if self.feature_scale is None:
+            # sklearn compares float32 features against float64 thresholds
+            inputs = np.zeros((len(X), self.n_features + 1), dtype=np.float32)
+            inputs[:, :-1] = X
+            return inputs
+        inputs = np.zeros((len(X), self.n_features + 1), dtype=np.int16)
+        inputs[:, :-1] = np.clip(np.rint(X * self.feature_scale), -INT16_LEAF, INT16_LEAF - 1)
+        return inputs
+
+    def apply(self, X):
+        """
+        Return the leaf reached in every tree, walking all trees level by level.
+
+        Only (sample, tree) pairs that have not reached a leaf yet are carried to
+        the next level, so the work follows the actual path lengths rather than
+        the depth of the deepest tree.
+
+        :param X: 2-D array of samples.
+        :return: Array of packed node indices, shape (n_samples, n_trees).
+        """
+        inputs = self._inputs(X)
+        width = inputs.shape[1]
+        leaves = np.empty((len(inputs), self.n_trees), dtype=np.int32)
+
+        for start in range(0, len(inputs), CHUNK_ROWS):
+            chunk = inputs[start:start + CHUNK_ROWS]
+            flat = chunk.reshape(-1)
+            node = np.tile(np.arange(self.n_trees, dtype=np.int32), len(chunk))
+            offset = np.repeat(np.arange(len(chunk), dtype=np.int32) * width, self.n_trees)
+            active = np.flatnonzero(self._internal[node])
+            while len(active):
+                current = node[active]
+                step = self._left[current] + (flat[offset[active] + self._feature[current]] > self._threshold[current])
+                node[active] = step
+                active = active[self._internal[step]]
+            leaves[start:start + CHUNK_ROWS] = node.reshape(len(chunk), self.n_trees)
+        return leaves
+
+    def predict_proba(self, X):
+        """
+        :param X: 2-D array of samples.
+        :return: One (n_samples, n_classes) array per output (a single array for one output).
+        """
+        leaves = self.apply(X)
+        probas = []
+        for k, classes in enumerate(self.classes):
+            # One gather for all trees, then accumulate tree by tree like sklearn does
+            value = self.value[:, k, :len(classes)][leaves]
+            proba = np.zeros((len(leaves), len(classes)))
+            for t in range(self.n_trees):
+                proba += value[:, t]
+            probas.append(proba / self.n_trees)
+        return probas[0] if len(probas) == 1 else probas
+
+    def predict(self, X):
+        """
+        :param X: 2-D array of samples.
+        :return: Predicted classes, shape (n_samples,) or (n_samples, n_outputs).
+        """
+        probas = self.predict_proba(X)
+        if len(self.outputs) == 1:
+            return self.classes[0][np.argmax(probas, axis=1)]
+        return np.column_stack([classes[np.argmax(proba, axis=1)]
+                                for classes, proba in zip(self.classes, probas)])
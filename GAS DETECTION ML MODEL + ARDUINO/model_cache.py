@@ -0,0 +1,131 @@
+import hashlib
+import inspect
+import json
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+DEFAULT_ROOT = os.environ.get('GAS_MODEL_CACHE',
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), '.model_cache'))
+
+
+def fingerprint(value, hasher=None):
+    """
+    Hash the content of a training input.
+
+    Arrays and DataFrames are hashed by dtype, shape and bytes, callables by
+    their source code, existing file paths by the file contents, and
+    dictionaries/lists recursively, so the key changes exactly when the data,
+    the feature code or a hyperparameter does.
+
+    :param value: Input to hash.
+    :param hasher: hashlib object to update (a new sha256 if None).
+    :return: Hex digest.
+    """
+    hasher = hasher if hasher is not None else hashlib.sha256()
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        hasher.update(b'frame')
+        hasher.update(repr(list(value.columns) if isinstance(value, pd.DataFrame) else value.name).encode())
+        hasher.update(pd.util.hash_pandas_object(value, index=True).to_numpy().tobytes())
+    elif isinstance(value, np.ndarray):
+        hasher.update(f'array{value.dtype.str}{value.shape}'.encode())
+        if value.dtype == object:
+            hasher.update(repr(value.tolist()).encode())
+        else:
+            hasher.update(np.ascontiguousarray(value).tobytes())
+    elif isinstance(value, dict):
+        hasher.update(b'dict')
+        for key in sorted(value, key=str):
+            hasher.update(str(key).encode())
+            fingerprint(value[key], hasher)
+    elif isinstance(value, (list, tuple)):
+        hasher.update(f'seq{len(value)}'.encode())
+        for item in value:
+            fingerprint(item, hasher)
+    elif callable(value):
+        hasher.update(b'code')
+        hasher.update(inspect.getsource(value).encode())
+    elif isinstance(value, str) and os.path.isfile(value):
+        hasher.update(b'file')
+        with open(value, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                hasher.update(block)
+    else:
+        hasher.update(repr(value).encode())
+    return hasher.hexdigest()
+
+
+class ModelCache:
+    """
+    Content-addressed store of trained models.
+
+    Each artifact is saved under <name>-<sha256 of its inputs>.joblib, so a
+    model is retrained only when its dataset, feature code or hyperparameters
+    change. Artifacts are loaded with mmap_mode='r': NumPy arrays in the
+    pickle (e.g. a flattened forest) are memory-mapped instead of read, while
+    scikit-learn copies its Tree nodes into its own buffers on load.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT, keep=2):
+        """
+        :param root: Cache directory.
+        :param keep: Artifacts kept per name; older ones are deleted when a new one is stored.
+        """
+        self.root = root
+        self.keep = keep
+
+    def path(self, name, key):
+        return os.path.join(self.root, f"{name}-{key[:16]}.joblib")
+
+    def get_or_train(self, name, train, inputs, refresh=False):
+        """
+        Load the artifact for these inputs, or train and store it.
+
+        :param name: Artifact name, e.g. 'test2-trees'.
+        :param train: Callable with no arguments returning the model to cache.
+        :param inputs: Everything the model depends on (data, feature functions,
+                       hyperparameters), hashed with fingerprint.
+        :param refresh: Retrain even if a cached artifact exists.
+        :return: The cached or freshly trained model.
+        """
+        key = fingerprint(inputs)
+        path = self.path(name, key)
+        if os.path.exists(path) and not refresh:
+            start = time.perf_counter()
+            model = joblib.load(path, mmap_mode='r')
+            print(f"Loaded cached {name} in {(time.perf_counter() - start) * 1000:.1f} ms ({path})")
+            return model
+
+        start = time.perf_counter()
+        model = train()
+        elapsed = time.perf_counter() - start
+        self.store(name, key, model, train_seconds=elapsed)
+        print(f"Trained {name} in {elapsed:.2f} s and cached it to {path}")
+        return model
+
+    def store(self, name, key, model, **metadata):
+        """Write an artifact atomically and prune older artifacts of the same name."""
+        os.makedirs(self.root, exist_ok=True)
+        path = self.path(name, key)
+        # Write then rename, so a reboot mid-save never leaves a truncated artifact behind
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(model, tmp_path)
+        os.replace(tmp_path, path)
+        with open(path[:-len('.joblib')] + '.json', 'w') as f:
+            json.dump({'name': name, 'key': key, 'created': time.time(), **metadata}, f, indent=2)
+        self.prune(name)
+
+    def prune(self, name):
+        """Delete all but the newest `keep` artifacts of a name."""
+        prefix = f"{name}-"
+        artifacts = [os.path.join(self.root, f) for f in os.listdir(self.root)
+                     if f.startswith(prefix) and f.endswith('.joblib') and '-' not in f[len(prefix):]]
+        artifacts.sort(key=os.path.getmtime, reverse=True)
+        for path in artifacts[self.keep:]:
+            os.remove(path)
+            meta = path[:-len('.joblib')] + '.json'
+            if os.path.exists(meta):
+                os.remove(meta)
@@ -0,0 +1,337 @@
+import math
+import os
+import numpy as np
+
+# Constants for MQ2 gas sensor
+V_in = 12.0  # Supply voltage in Volts (assumed to be 5V)
+RL = 10.0  # Load resistance in kOhms
+R0 = 0.4388  # R0 value (calculated from fresh air) in kOhms
+
+ADC_CODES = 1024  # 10-bit ADC: every reading is one of 0-1023
+
+# Constants for each gas type
+GAS_CONSTANTS = {
+    'LPG': {'m': -0.473, 'b': 1.413},
+    'Methane': {'m': -0.510, 'b': 1.402},
+    'Smoke': {'m': -0.500, 'b': 1.300},
+    'CO': {'m': -0.430, 'b': 1.500},
+    'Butane': {'m': -0.490, 'b': 1.450},
+    'Alcohol': {'m': -0.490, 'b': 1.550},
+}
+
+# re_implementation.c's own LPG curve: log10(RS/RL) = FIRMWARE_LPG_B + FIRMWARE_LPG_M * log10(PPM),
+# with RS/RL = (1023 - code) / code. Its thresholds (ventilation, LEL) are tuned to this curve.
+FIRMWARE_LPG_M = -0.4
+FIRMWARE_LPG_B = 0.6
+
+# Gas type codes used by the lookup tables, in detect_gas_type's RS order
+GAS_TYPES = ('LPG', 'CO', 'Methane', 'Smoke', 'Butane', 'Alcohol')
+UNKNOWN_GAS_CODE = len(GAS_TYPES)
+
+# Lower RS bound (kOhms) of every gas type after the first, matching detect_gas_type
+RS_BIN_EDGES = np.array([1.0, 5.0, 10.0, 20.0, 30.0])
+GAS_M = np.array([GAS_CONSTANTS[gas]['m'] for gas in GAS_TYPES])
+GAS_B = np.array([GAS_CONSTANTS[gas]['b'] for gas in GAS_TYPES])
+
+
+# Function to calculate RS (sensor resistance) from the analog value
+def calculate_RS(analog_value):
+    """
+    Convert the analog reading to sensor resistance (RS).
+
+    :param analog_value: Analog reading from MQ2 sensor (0-1023)
+    :return: RS (sensor resistance) in kOhms
+    """
+    V_out = (analog_value / 1023.0) * V_in  # Convert analog value to voltage
+
+    if V_out == 0:
+        return float('inf')  # Handle division by zero by setting RS to infinity
+
+    RS = (V_in - V_out) / V_out  # Calculate RS using the formula RS = (Vin - Vout) / Vout
+    return RS
+
+def calculate_PPM(RS, m, b):
+    """
+    Calculate the gas concentration in PPM based on sensor resistance (RS) and the gas-specific constants.
+
+    :param RS: Sensor resistance (RS) in kOhms
+    :param m: Slope (for the specific gas)
+    :param b: Y-intercept (for the specific gas)
+    :return: Gas concentration in PPM
+    """
+    # Calculate the resistance ratio RS/R0
+    RS_R0 = RS / R0
+
+    # Ensure RS_R0 is positive to avoid math domain error
+    if RS_R0 <= 0:
+        print(f"Invalid RS/R0 value: {RS_R0}. Skipping PPM calculation.")
+        return float('inf')  # Return infinity or a placeholder for invalid cases
+
+    # Calculate log(x) using the log-log scale equation
+    log_x = (math.log10(RS_R0) - b) / m
+    # Inverse log to get x (PPM)
+    PPM = 10 ** log_x
+    return PPM
+
+
+# Function to automatically detect gas type based on sensor resistance
+def detect_gas_type(RS):
+    """
+    Detect the gas type based on the sensor resistance (RS).
+
+    :param RS: Sensor resistance (RS) in kOhms
+    :return: Gas type detected
+    """
+    if RS < 1.0:
+        return "LPG"
+    elif 1.0 <= RS < 5.0:
+        return "CO"
+    elif 5.0 <= RS < 10.0:
+        return "Methane"
+    elif 10.0 <= RS < 20.0:
+        return "Smoke"
+    elif 20.0 <= RS < 30.0:
+        return "Butane"
+    elif RS >= 30.0:
+        return "Alcohol"
+    else:
+        return "Unknown"
+
+
+def firmware_ppm_array(analog_values):
+    """
+    The sketch's original conversion, ppm = 10 ^ ((log10((1023 - x) / x) - 0.6) / -0.4).
+
+    :param analog_values: Array of (temperature-compensated) analog readings (0-1023)
+    :return: Array of PPM: 0 for a reading of 0, inf for 1023
+    """
+    x = np.asarray(analog_values, dtype=np.float64)
+    with np.errstate(divide='ignore'):
+        log_ratio = np.log10(1023.0 - x) - np.log10(x)
+    return 10.0 ** ((log_ratio - FIRMWARE_LPG_B) / FIRMWARE_LPG_M)
+
+
+def ppm_to_uint16(ppm):
+    """
+    Round PPM up and saturate it to uint16, as stored in MQ2CalibrationTable.h.
+
+    Rounding up keeps every "ppm > limit" comparison with an integer limit exactly as it was
+    with the float value, so the sketch's thresholds trip at the same readings.
+
+    :param ppm: Array of PPM (inf saturates, NaN becomes 0)
+    :return: uint16 array
+    """
+    return np.clip(np.nan_to_num(np.ceil(ppm), nan=0, posinf=65535), 0, 65535).astype(np.uint16)
+
+
+def calculate_RS_array(analog_values):
+    """
+    Vectorized calculate_RS.
+
+    :param analog_values: Array of analog readings (0-1023)
+    :return: Array of RS in kOhms, inf where the output voltage is 0
+    """
+    V_out = (np.asarray(analog_values, dtype=np.float64) / 1023.0) * V_in
+    RS = np.full(V_out.shape, np.inf)
+    np.divide(V_in - V_out, V_out, out=RS, where=V_out != 0)
+    return RS
+
+
+def calculate_PPM_array(RS, m, b):
+    """
+    Vectorized calculate_PPM; m and b may be scalars or arrays broadcast against RS.
+
+    :param RS: Array of sensor resistance in kOhms
+    :param m: Slope (for the specific gas)
+    :param b: Y-intercept (for the specific gas)
+    :return: Array of PPM, inf wherever RS/R0 <= 0
+    """
+    RS_R0 = np.asarray(RS, dtype=np.float64) / R0
+    invalid = RS_R0 <= 0
+    log_x = np.divide(np.log10(RS_R0, out=np.zeros_like(RS_R0), where=~invalid) - b, m)
+    return np.where(invalid, np.inf, 10.0 ** log_x)
+
+
+def detect_gas_type_array(RS):
+    """
+    Vectorized detect_gas_type.
+
+    :param RS: Array of sensor resistance in kOhms
+    :return: Array of gas type codes (index into GAS_TYPES, UNKNOWN_GAS_CODE for NaN)
+    """
+    RS = np.asarray(RS, dtype=np.float64)
+    codes = np.searchsorted(RS_BIN_EDGES, RS, side='right').astype(np.uint8)
+    return np.where(np.isnan(RS), UNKNOWN_GAS_CODE, codes).astype(np.uint8)
+
+
+def gas_type_names(codes):
+    """Map gas type codes back to names ('Unknown' for UNKNOWN_GAS_CODE)."""
+    return np.array(GAS_TYPES + ('Unknown',))[codes]
+
+
+def calculate_detected_PPM_array(analog_values):
+    """
+    Convert readings to RS, gas type and the PPM of the detected gas in one pass.
+
+    :param analog_values: Array of analog readings (0-1023)
+    :return: Tuple of (RS, gas type codes, PPM)
+    """
+    RS = calculate_RS_array(analog_values)
+    codes = detect_gas_type_array(RS)
+    known = codes != UNKNOWN_GAS_CODE
+    index = np.where(known, codes, 0)
+    PPM = np.where(known, calculate_PPM_array(RS, GAS_M[index], GAS_B[index]), np.nan)
+    return RS, codes, PPM
+
+
+def backfill_csv(input_path, output_path, column='MQ2', chunksize=1000000):
+    """
+    Add RS, gas type and PPM columns to a CSV archive of raw readings, chunk by chunk.
+
+    :param input_path: CSV file with a column of raw analog readings.
+    :param output_path: Destination CSV file.
+    :param column: Name of the raw reading column.
+    :param chunksize: Rows processed per chunk.
+    :return: Number of rows written.
+    """
+    import pandas as pd
+
+    rows = 0
+    for i, chunk in enumerate(pd.read_csv(input_path, chunksize=chunksize)):
+        RS, codes, PPM = calculate_detected_PPM_array(chunk[column].to_numpy())
+        chunk['RS'] = RS
+        chunk['Gas Type'] = gas_type_names(codes)
+        chunk['PPM'] = PPM
+        chunk.to_csv(output_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        rows += len(chunk)
+    return rows
+
+
+class CalibrationTable:
+    """
+    RS, RS/R0, gas type and PPM for every ADC code, indexed directly by the reading.
+
+    ppm has one row per entry of GAS_TYPES; ppm_detected holds the PPM of the gas
+    that detect_gas_type picks for each code.
+    """
+
+    def __init__(self, rs, gas_type_code, ppm):
+        self.rs = rs
+        self.rs_r0 = rs / R0
+        self.gas_type_code = gas_type_code
+        self.ppm = ppm
+        self.ppm_detected = ppm[gas_type_code, np.arange(len(rs))]
+
+    def _index(self, analog_value):
+        # Plain indexing would wrap negative readings and raise IndexError past the end
+        index = np.asarray(analog_value)
+        if not np.issubdtype(index.dtype, np.integer):
+            raise ValueError(f"Analog readings must be integers, got {index.dtype}")
+        if np.any((index < 0) | (index >= len(self.rs))):
+            raise ValueError(f"Analog readings must be between 0 and {len(self.rs) - 1}")
+        return index
+
+    def lookup(self, analog_value):
+        """
+        Look up one reading (or an array of readings) in O(1).
+
+        :param analog_value: Analog reading(s) from the sensor (0-1023)
+        :return: Tuple of (RS, RS/R0, gas type code, PPM of the detected gas)
+        :raises ValueError: If a reading is not an integer ADC code.
+        """
+        index = self._index(analog_value)
+        return self.rs[index], self.rs_r0[index], self.gas_type_code[index], self.ppm_detected[index]
+
+    def gas_type(self, analog_value):
+        """Return the detected gas type name for a single reading."""
+        return GAS_TYPES[self.gas_type_code[self._index(analog_value)]]
+
+    def ppm_for(self, gas):
+        """Return the 1024-entry PPM curve for one gas."""
+        return self.ppm[GAS_TYPES.index(gas)]
+
+
+def build_calibration_table():
+    """
+    Precompute the conversion for all 1024 ADC codes.
+
+    :return: CalibrationTable
+    """
+    rs = calculate_RS_array(np.arange(ADC_CODES))
+    gas_type_code = detect_gas_type_array(rs)
+    ppm = calculate_PPM_array(rs[None, :], GAS_M[:, None], GAS_B[:, None])
+
+    return CalibrationTable(rs, gas_type_code, ppm)
+
+
+def export_progmem_header(path, table=None, gas='LPG'):
+    """
+    Write a PPM curve as a PROGMEM lookup table for the firmware.
+
+    By default this is the sketch's own conversion (firmware_ppm_array), so it replaces
+    its pow/log10 call with a single pgm_read_word without moving any threshold. PPM is
+    rounded up and saturated to uint16 (ppm_to_uint16).
+
+    :param path: Output header path.
+    :param table: CalibrationTable to take the curve of gas from instead (R0/m/b curves).
+                  Their PPM differs from the firmware curve by up to several times, so the
+                  sketch's thresholds would have to be retuned.
+    :param gas: Gas curve to export from table.
+    :return: Size of the table in bytes.
+    """
+    if table is None:
+        values = ppm_to_uint16(firmware_ppm_array(np.arange(ADC_CODES)))
+        curve = f"re_implementation.c's curve: 10^((log10((1023 - x) / x) - {FIRMWARE_LPG_B}) / {FIRMWARE_LPG_M})"
+    else:
+        values = ppm_to_uint16(table.ppm_for(gas))
+        curve = f"R0 = {R0} kOhm, m = {GAS_CONSTANTS[gas]['m']}, b = {GAS_CONSTANTS[gas]['b']}"
+    name = f"MQ2_PPM_{gas.upper()}"
+    rows = ",\n".join("  " + ", ".join(str(v) for v in values[i:i + 16]) for i in range(0, ADC_CODES, 16))
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as file:
+        file.write(f"""/* Generated by mq2_calibration.py -- do not edit by hand.
+ * {gas} concentration (PPM, rounded up and saturated to 65535) for every 10-bit ADC code.
+ * {curve}
+ */
+#ifndef MQ2_CALIBRATION_TABLE_H
+#define MQ2_CALIBRATION_TABLE_H
+
+#include <stdint.h>
+#ifdef __AVR__
+#include <avr/pgmspace.h>
+#else
+#define PROGMEM
+#define pgm_read_word(addr) (*(const uint16_t *)(addr))
+#endif
+
+static const uint16_t {name}[{ADC_CODES}] PROGMEM = {{
+{rows}
+}};
+
+static inline uint16_t mq2PPMFromCode(uint16_t code) {{
+  return pgm_read_word(&{name}[code > {ADC_CODES - 1} ? {ADC_CODES - 1} : code]);
+}}
+
+#endif /* MQ2_CALIBRATION_TABLE_H */
+""")
+    return values.nbytes
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="MQ2 calibration tables and PPM backfill.")
+    parser.add_argument('--backfill', nargs=2, metavar=('INPUT_CSV', 'OUTPUT_CSV'),
+                        help="Add RS, gas type and PPM columns to a CSV archive")
+    parser.add_argument('--column', default='MQ2', help="Raw reading column used by --backfill")
+    args = parser.parse_args()
+
+    if args.backfill:
+        rows = backfill_csv(*args.backfill, column=args.column)
+        print(f"Backfilled {rows} rows into {args.backfill[1]}")
+    else:
+        size = export_progmem_header("MQ2CalibrationTable.h")
+        print(f"Wrote MQ2CalibrationTable.h ({size} bytes of PROGMEM)")
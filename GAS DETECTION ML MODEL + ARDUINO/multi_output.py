@@ -0,0 +1,40 @@
+import numpy as np
+from sklearn.tree import DecisionTreeClassifier
+from sklearn.model_selection import train_test_split
+from sklearn.metrics import accuracy_score
+
+
+def stack_labels(labels):
+    """
+    Stack the per-label target columns into one 2-D target.
+
+    :param labels: Dictionary mapping label name to its target column.
+    :return: Array of shape (n_samples, n_labels) in the dictionary's order.
+    """
+    return np.column_stack([np.asarray(y) for y in labels.values()])
+
+
+def train_multi_output(X, labels, estimator=None, test_size=0.2, random_state=None):
+    """
+    Train one multi-output estimator for every label head over a single shared split.
+
+    :param X: Input features (sensor_reading, ppm).
+    :param labels: Dictionary mapping label name to its target column.
+    :param estimator: Unfitted sklearn tree or forest; defaults to a DecisionTreeClassifier.
+    :param test_size: Fraction of rows held out for evaluation.
+    :param random_state: Seed for the shared train/test split.
+    :return: Fitted estimator whose predict returns one column per label.
+    """
+    Y = stack_labels(labels)
+    X_train, X_test, Y_train, Y_test = train_test_split(X, Y, test_size=test_size, random_state=random_state)
+
+    model = estimator if estimator is not None else DecisionTreeClassifier()
+    model.fit(X_train, Y_train)
+
+    # Evaluate each head against its own column of the shared test split
+    Y_pred = model.predict(X_test)
+    for i, label in enumerate(labels):
+        accuracy = accuracy_score(Y_test[:, i], Y_pred[:, i])
+        print(f"{label} Model Accuracy: {accuracy:.4f}")
+
+    return model
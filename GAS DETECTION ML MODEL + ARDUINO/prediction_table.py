@@ -0,0 +1,172 @@
+import os
+import numpy as np
+
+from mq2_calibration import ADC_CODES
+
+
+class PredictionTable:
+    """
+    Every label model evaluated once over all 1024 ADC codes.
+
+    The single-channel models only see sensor_reading and a ppm derived from it,
+    so their whole input space is the 10-bit ADC range. Predicting a reading is
+    then one index into a (1024, n_labels) table of uint8 class codes, whatever
+    the size of the trees behind it.
+
+    predict returns one column per label, so the table drops into
+    BatchPredictor.from_multi_output like a multi-output model.
+    """
+
+    def __init__(self, codes, classes):
+        """
+        :param codes: uint8 array of shape (ADC_CODES, n_labels); class index per ADC code and label.
+        :param classes: Dictionary mapping label name to its array of class names, in column order.
+        """
+        self.codes = np.asarray(codes, dtype=np.uint8)
+        self.labels = list(classes)
+        self.classes = {label: np.asarray(names) for label, names in classes.items()}
+        # Class names per code, so a prediction is a single gather for all labels
+        self._names = np.column_stack([self.classes[label][self.codes[:, i]]
+                                       for i, label in enumerate(self.labels)]).astype(object)
+
+    @classmethod
+    def from_models(cls, models, to_features):
+        """
+        Tabulate one classifier per label.
+
+        :param models: Dictionary mapping label name to a fitted classifier.
+        :param to_features: Callable turning an array of raw ADC codes into the 2-D feature array.
+        :return: PredictionTable.
+        """
+        features = to_features(np.arange(ADC_CODES))
+        return cls._from_predictions({label: model.predict(features) for label, model in models.items()})
+
+    @classmethod
+    def from_multi_output(cls, model, labels, to_features):
+        """
+        Tabulate one classifier fitted on a 2-D target.
+
+        :param model: Fitted multi-output classifier whose predict returns one column per label.
+        :param labels: Label names in the column order used for training.
+        :param to_features: Callable turning an array of raw ADC codes into the 2-D feature array.
+        :return: PredictionTable.
+        """
+        outputs = model.predict(to_features(np.arange(ADC_CODES)))
+        return cls._from_predictions({label: outputs[:, i] for i, label in enumerate(labels)})
+
+    @classmethod
+    def _from_predictions(cls, predictions):
+        columns, classes = [], {}
+        for label, predicted in predictions.items():
+            names, codes = np.unique(np.asarray(predicted).astype(str), return_inverse=True)
+            if len(names) > 256:
+                raise ValueError(f"{label} has more than 256 classes and does not fit in uint8")
+            classes[label] = names
+            columns.append(codes.astype(np.uint8))
+        return cls(np.column_stack(columns), classes)
+
+    def predict(self, X):
+        """
+        :param X: 2-D array of readings whose first column is the raw ADC code.
+        :return: Array of class names, shape (n_samples, n_labels).
+        """
+        raw = np.clip(np.rint(np.asarray(X)[:, 0]), 0, ADC_CODES - 1).astype(np.intp)
+        return self._names[raw]
+
+    def run_length_encode(self):
+        """
+        Compress the table into runs of consecutive ADC codes with identical predictions.
+
+        :return: Tuple of (starts, codes): uint16 first ADC code of every run and the
+                 uint8 class codes of that run, shape (n_runs, n_labels).
+        """
+        changed = np.any(self.codes[1:] != self.codes[:-1], axis=1)
+        starts = np.concatenate(([0], np.flatnonzero(changed) + 1)).astype(np.uint16)
+        return starts, self.codes[starts]
+
+    @classmethod
+    def run_length_decode(cls, starts, codes, classes):
+        """
+        Rebuild a table from the output of run_length_encode.
+
+        :param starts: First ADC code of every run.
+        :param codes: Class codes per run.
+        :param classes: Dictionary mapping label name to its class names.
+        :return: PredictionTable.
+        """
+        lengths = np.diff(np.append(starts.astype(np.intp), ADC_CODES))
+        return cls(np.repeat(codes, lengths, axis=0), classes)
+
+
+def _identifier(name):
+    return ''.join(c if c.isalnum() else '_' for c in name).upper()
+
+
+def export_header(table, path, source='prediction_table.py'):
+    """
+    Write the run-length compressed table as a PROGMEM header for the firmware.
+
+    Labels are looked up with a binary search over the run starts, so the
+    sketch needs neither the trees nor floating point to classify a reading.
+
+    :param table: PredictionTable to export.
+    :param path: Output header path.
+    :param source: Script named in the generated-file banner.
+    :return: Size of the tables in bytes.
+    """
+    starts, codes = table.run_length_encode()
+    n_runs, n_labels = codes.shape
+
+    defines = []
+    for i, label in enumerate(table.labels):
+        defines.append(f"#define PREDICTION_{_identifier(label)} {i}")
+        defines += [f"#define {_identifier(label)}_{_identifier(name)} {code}"
+                    for code, name in enumerate(table.classes[label])]
+    rows = ",\n".join(f"  {{{', '.join(str(c) for c in run)}}}" for run in codes)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as file:
+        file.write(f"""/* Generated by {source} -- do not edit by hand.
+ * Label predictions for every 10-bit ADC code, run-length compressed:
+ * {n_runs} runs over {ADC_CODES} codes, {n_labels} labels.
+ */
+#ifndef PREDICTION_TABLE_H
+#define PREDICTION_TABLE_H
+
+#include <stdint.h>
+#ifdef __AVR__
+#include <avr/pgmspace.h>
+#else
+#define PROGMEM
+#define pgm_read_word(addr) (*(const uint16_t *)(addr))
+#define pgm_read_byte(addr) (*(const uint8_t *)(addr))
+#endif
+
+#define PREDICTION_RUNS {n_runs}
+#define PREDICTION_LABELS {n_labels}
+{chr(10).join(defines)}
+
+static const uint16_t PREDICTION_RUN_START[PREDICTION_RUNS] PROGMEM = {{
+  {', '.join(str(s) for s in starts)}
+}};
+
+static const uint8_t PREDICTION_RUN_CODES[PREDICTION_RUNS][PREDICTION_LABELS] PROGMEM = {{
+{rows}
+}};
+
+/* Class code of one label (PREDICTION_<LABEL>) for a raw ADC reading */
+static inline uint8_t predictLabel(uint16_t code, uint8_t label) {{
+  uint16_t low = 0, high = PREDICTION_RUNS - 1;
+  while (low < high) {{
+    uint16_t mid = (low + high + 1) / 2;
+    if (pgm_read_word(&PREDICTION_RUN_START[mid]) <= code) low = mid;
+    else high = mid - 1;
+  }}
+  return pgm_read_byte(&PREDICTION_RUN_CODES[low][label]);
+}}
+
+#endif /* PREDICTION_TABLE_H */
+""")
+    return starts.nbytes + codes.nbytes
@@ -1,6 +1,11 @@
 #include <Servo.h>
 #include <SoftwareSerial.h>
 #include <RandomForestModel.h>
+#include "MQ2CalibrationTable.h"
+#include "arduino_code/telemetry_frame.h"
+#include "arduino_code/gas_logic.h"
+#include "arduino_code/task_scheduler.h"
+#include "arduino_code/sim800_driver.h"
 
 // Hardware Definitions
 #define SIM800_TX 2
@@ -11,65 +16,136 @@
 #define FAN_PIN 7
 #define POWER_CHECK_PIN A1
 
+// 1 = binary telemetry frames (telemetry.py, test2.py --binary), 0 = text status lines
+#ifndef TELEMETRY_BINARY
+#define TELEMETRY_BINARY 0
+#endif
+
 // Safety Thresholds
 const int LEL_LPG = 20000;    // Lower Explosive Limit for LPG (ppm)
 const int CALIBRATION_THRESHOLD = 15; // % variation for drift detection
 const unsigned long PERSISTENT_LEAK_TIME = 300000; // 5 minutes
 
+// Task periods (ms)
+const unsigned long SAMPLE_PERIOD = 1000;
+const unsigned long STEP_PERIOD = 50;            // Alarm pattern
+const unsigned long MODEM_PERIOD = 20;           // Drains SoftwareSerial's 64-byte buffer in time at 9600 baud
+const unsigned long VENTILATION_PERIOD = 60000;
+const unsigned long HEALTH_PERIOD = 600000;      // Drift check every 10 minutes
+const unsigned long POWER_PERIOD = 1000;
+const unsigned long VENTILATION_CHECK_TIME = 300000; // 5-minute efficiency monitoring
+const unsigned long ALERT_REPEAT_TIME = 60000;   // At most one SMS per alert kind per minute
+
+// Alert kinds; repeats of a kind are coalesced by the modem driver
+enum { ALERT_EMERGENCY, ALERT_ESCALATION, ALERT_VENTILATION, ALERT_DRIFT, ALERT_POWER };
+
 // Global Variables
 float prevPPM[3] = {0};       // Circular buffer for rate calculation
-unsigned long lastSensorCheck = 0;
 unsigned long persistentLeakStart = 0;
 bool fanActive = false;
+int lastRaw = 0;              // Last raw ADC reading, sent with telemetry
+uint16_t telemetrySeq = 0;
+
+// Latest sample, shared by the tasks
+float currentPPM = 0;
+float currentRate = 0;
+float currentRisk = 0;
 
 // Model Initialization (Trained coefficients)
 RandomForestModel riskModel(0.12, 0.25, 1.8, 0.05);
 
 SoftwareSerial sim800SS(SIM800_TX, SIM800_RX);
+Sim800 modem;
 Servo gasValveServo;
 
 // Phone Configuration
 char PHONE_1[21] = "7004012040";
-String alertMessage = "DANGER! Gas Leak Detected:\n";
+
+void sampleTask();
+void inferenceTask();
+void alarmTask();
+void modemTask();
+void ventilationTask();
+void healthTask();
+void powerTask();
+
+// Sampling comes first so inference in the same pass sees the new reading
+Task tasks[] = {
+  TASK("sample", sampleTask, SAMPLE_PERIOD),
+  TASK("inference", inferenceTask, SAMPLE_PERIOD),
+  TASK("alarm", alarmTask, STEP_PERIOD),
+  TASK("modem", modemTask, MODEM_PERIOD),
+  TASK("ventilation", ventilationTask, VENTILATION_PERIOD),
+  TASK("health", healthTask, HEALTH_PERIOD),
+  TASK("power", powerTask, POWER_PERIOD),
+};
+#define TASK_COUNT (sizeof(tasks) / sizeof(tasks[0]))
 
 void setup() {
   Serial.begin(9600);
   sim800SS.begin(9600);
-  
+  sim800Begin(&modem, &sim800SS, ALERT_REPEAT_TIME, 0);
+
   pinMode(RELAY_PIN, OUTPUT);
   pinMode(BUZZER_PIN, OUTPUT);
   pinMode(FAN_PIN, OUTPUT);
   pinMode(POWER_CHECK_PIN, INPUT);
-  
+
   gasValveServo.attach(10);
   gasValveServo.write(0);
-  
+
   calibrateSensor();
+  schedulerStart(tasks, TASK_COUNT);
 }
 
 void loop() {
-  float ppm = getCalibratedPPM();
-  float rateOfIncrease = calculateRateOfIncrease(ppm);
-  float explosionRisk = predictExplosionRisk(ppm, rateOfIncrease);
-  
-  handleSafetySystems(ppm, rateOfIncrease, explosionRisk);
+  // No delay(): every task runs on its own period, so a reading is never
+  // late by more than the slowest single task step
+  schedulerRun(tasks, TASK_COUNT);
+}
+
+void sampleTask() {
+  currentPPM = getCalibratedPPM();
+  currentRate = calculateRateOfIncrease(currentPPM);
+  recordCalibrationValue(currentPPM);
+}
+
+void inferenceTask() {
+  currentRisk = predictExplosionRisk(currentPPM, currentRate);
+  handleSafetySystems(currentPPM, currentRate, currentRisk);
+}
+
+void ventilationTask() {
+  controlVentilation(currentPPM, currentRisk);
+  checkVentilationEfficiency(currentPPM);
+}
+
+void healthTask() {
+  checkSensorHealth();
+}
+
+void powerTask() {
   monitorPowerSupply();
-  checkSensorHealth(ppm);
-  
-  delay(1000);
 }
 
 float getCalibratedPPM() {
   static float baseline = 0;
   int raw = analogRead(GAS_SENSOR_PIN);
-  
-  // Apply temperature compensation (example formula)
+  lastRaw = raw;
+
+  // Apply temperature compensation, then convert to PPM with the precomputed
+  // MQ-2 LPG curve (generated by mq2_calibration.py)
   float temp = readTemperature(); // Implement temperature sensor reading
-  float compensated = raw * (1 + (25 - temp) * 0.02);
-  
-  // Convert to PPM using sensor characteristics
-  float rs_ro = (1023.0 - compensated) / compensated;
-  return pow(10, (log10(rs_ro) - 0.6) / (-0.4)); // MQ-2 approximation for LPG
+  return mq2PPMFromCode(compensatedCode(raw, temp));
+}
+
+float calculateRateOfIncrease(float ppm) {
+  // PPM per second over the last three samples; prevPPM holds them oldest first
+  float rate = (ppm - prevPPM[0]) / (3 * SAMPLE_PERIOD / 1000.0);
+  prevPPM[0] = prevPPM[1];
+  prevPPM[1] = prevPPM[2];
+  prevPPM[2] = ppm;
+  return rate;
 }
 
 float predictExplosionRisk(float ppm, float rate) {
@@ -80,20 +156,23 @@ float predictExplosionRisk(float ppm, float rate) {
 void handleSafetySystems(float ppm, float rate, float risk) {
   // Gas Type Classification
   String gasType = classifyGasType(ppm, rate);
-  
+
   // Risk Assessment
   String riskAssessment = assessCompositeRisk(ppm, risk);
-  
-  // Ventilation Control
-  controlVentilation(ppm, risk);
-  
+
+  // Ventilation Control runs in ventilationTask
+
   // Emergency Actions
   if(risk > 0.8 || ppm > LEL_LPG * 0.4) {
     triggerEmergencyProtocol(gasType, ppm, risk);
   }
-  
+
   // Data Logging
+#if TELEMETRY_BINARY
+  sendTelemetry(ppm, rate, risk);
+#else
   logSystemStatus(ppm, gasType, riskAssessment);
+#endif
 }
 
 String classifyGasType(float ppm, float rate) {
@@ -103,84 +182,100 @@ String classifyGasType(float ppm, float rate) {
   return "Unknown Combustible";
 }
 
+String assessCompositeRisk(float ppm, float risk) {
+  if(risk > 0.8 || ppm > LEL_LPG * 0.4) return "CRITICAL";
+  if(risk > 0.5 || ppm > 1000) return "HIGH";
+  return "LOW";
+}
+
+void sendTelemetry(float ppm, float rate, float risk) {
+  uint8_t frame[TELEMETRY_FRAME_LEN];
+  byte explosionRisk = constrain((int)(risk * 100 + 0.5), 0, 100); // Percent
+  uint8_t len = telemetryEncodeRisk(frame, telemetrySeq++, millis(), lastRaw, telemetryPPMx10(ppm),
+                                    explosionRisk, classifyGasTypeCode(ppm, rate));
+  Serial.write(frame, len);
+}
+
 void controlVentilation(float ppm, float risk) {
-  // Smart fan control with hysteresis
-  static unsigned long lastVentilationCheck = 0;
-  
-  if(millis() - lastVentilationCheck > 60000) {
-    bool needsVentilation = ppm > 1000 || risk > 0.5;
-    
-    if(needsVentilation && !fanActive) {
-      digitalWrite(FAN_PIN, HIGH);
-      fanActive = true;
-      checkVentilationEfficiency(ppm);
-    }
-    else if(!needsVentilation && fanActive) {
-      digitalWrite(FAN_PIN, LOW);
-      fanActive = false;
-    }
-    
-    lastVentilationCheck = millis();
+  // Smart fan control with hysteresis, evaluated once per VENTILATION_PERIOD
+  bool needsVentilation = ppm > 1000 || risk > 0.5;
+
+  if(needsVentilation && !fanActive) {
+    digitalWrite(FAN_PIN, HIGH);
+    fanActive = true;
+    startVentilationCheck(ppm);
   }
+  else if(!needsVentilation && fanActive) {
+    digitalWrite(FAN_PIN, LOW);
+    fanActive = false;
+  }
+}
+
+// Ventilation efficiency check: started when the fan turns on, advanced once per VENTILATION_PERIOD
+bool ventilationChecking = false;
+unsigned long ventilationCheckStart = 0;
+float ventilationInitialPPM = 0;
+
+void startVentilationCheck(float initialPPM) {
+  ventilationChecking = true;
+  ventilationCheckStart = millis();
+  ventilationInitialPPM = initialPPM;
 }
 
-void checkVentilationEfficiency(float initialPPM) {
-  unsigned long start = millis();
-  while(millis() - start < 300000) { // 5-minute monitoring
-    float currentPPM = getCalibratedPPM();
-    if(currentPPM < initialPPM * 0.7) {
-      logEvent("Ventilation Effective");
-      return;
-    }
-    delay(60000);
+void checkVentilationEfficiency(float currentPPM) {
+  if(!ventilationChecking) return;
+  if(currentPPM < ventilationInitialPPM * 0.7) {
+    logEvent("Ventilation Effective");
+    ventilationChecking = false;
+  }
+  else if(millis() - ventilationCheckStart >= VENTILATION_CHECK_TIME) { // 5-minute monitoring
+    logEvent("Ventilation Ineffective!");
+    sendAlert(ALERT_VENTILATION, "Ventilation System Failure");
+    ventilationChecking = false;
   }
-  logEvent("Ventilation Ineffective!");
-  sendAlert("Ventilation System Failure");
 }
 
 void triggerEmergencyProtocol(String gasType, float ppm, float risk) {
   gasValveServo.write(90); // Close gas valve
   digitalWrite(RELAY_PIN, HIGH); // Cut power
   activateAlarmPattern();
-  
+
   String message = "EMERGENCY! " + gasType + " Leak\n";
   message += "PPM: " + String(ppm) + "\n";
   message += "Explosion Risk: " + String(risk*100) + "%";
-  
-  sendAlert(message);
+
+  sendAlert(ALERT_EMERGENCY, message);
   escalateEmergencyIfNeeded();
 }
 
-void checkSensorHealth(float currentPPM) {
-  static float calibrationValues[10];
-  static byte index = 0;
-  
-  // Store calibration values
-  calibrationValues[index] = currentPPM;
-  index = (index + 1) % 10;
-  
-  // Check drift every 10 minutes
-  if(millis() - lastSensorCheck > 600000) {
-    float avg = 0;
-    for(int i=0; i<10; i++) avg += calibrationValues[i];
-    avg /= 10;
-    
-    if(abs(avg - calibrationValues[0]) > CALIBRATION_THRESHOLD) {
-      sendAlert("Sensor Drift Detected! Needs Calibration");
-    }
-    
-    lastSensorCheck = millis();
+// Sensor drift history, one value per sample
+float calibrationValues[10];
+byte calibrationIndex = 0;
+
+void recordCalibrationValue(float ppm) {
+  calibrationValues[calibrationIndex] = ppm;
+  calibrationIndex = (calibrationIndex + 1) % 10;
+}
+
+void checkSensorHealth() {
+  // Called every HEALTH_PERIOD (10 minutes)
+  float avg = 0;
+  for(int i=0; i<10; i++) avg += calibrationValues[i];
+  avg /= 10;
+
+  if(abs(avg - calibrationValues[0]) > CALIBRATION_THRESHOLD) {
+    sendAlert(ALERT_DRIFT, "Sensor Drift Detected! Needs Calibration");
   }
 }
 
 void escalateEmergencyIfNeeded() {
   static unsigned long emergencyStart = 0;
   static byte escalationLevel = 0;
-  
+
   if(emergencyStart == 0) emergencyStart = millis();
-  
+
   if(millis() - emergencyStart > 300000) { // 5 minutes
-    sendAlert("EMERGENCY ESCALATION: Contacting Fire Department");
+    sendAlert(ALERT_ESCALATION, "EMERGENCY ESCALATION: Contacting Fire Department");
     // Implement additional escalation procedures
     escalationLevel++;
     emergencyStart = millis();
@@ -191,7 +286,7 @@ void escalateEmergencyIfNeeded() {
 void calibrateSensor() {
   logEvent("Starting Sensor Calibration");
   // Implement proper calibration routine
-  delay(2000); // Warm-up time
+  delay(2000); // Warm-up time, before the scheduler starts sampling
 }
 
 float readTemperature() {
@@ -209,33 +304,58 @@ void logSystemStatus(float ppm, String gasType, String risk) {
 }
 
 void logEvent(String message) {
+#if !TELEMETRY_BINARY  // Binary builds keep the serial stream to telemetry frames
   Serial.print("[EVENT] ");
   Serial.println(message);
+#endif
 }
 
-void sendAlert(String message) {
-  sim800SS.println("AT+CMGF=1");
-  delay(100);
-  sim800SS.println("AT+CMGS=\"" + String(PHONE_1) + "\"");
-  delay(100);
-  sim800SS.print(message);
-  sim800SS.write(26);
-  delay(5000);
+// SMS alerts: sendAlert only queues, modemTask runs the AT exchange (arduino_code/sim800_driver.h)
+void sendAlert(byte kind, String message) {
+  sim800QueueSms(&modem, kind, PHONE_1, message.c_str());
 }
 
+void modemTask() {
+  uint16_t sent = modem.sent;
+  sim800Poll(&modem);
+  if(modem.sent != sent) {
+    logEvent("SMS delivered in " + String(modem.lastLatencyMs) + " ms");
+  }
+}
+
+// Alarm pattern: three 1 s beeps with 0.5 s pauses, advanced by alarmTask
+byte alarmBeepsLeft = 0;
+bool buzzerOn = false;
+unsigned long alarmStepStart = 0;
+
 void activateAlarmPattern() {
-  for(int i=0; i<3; i++) {
-    digitalWrite(BUZZER_PIN, HIGH);
-    delay(1000);
+  if(alarmBeepsLeft > 0) return; // Already sounding
+  alarmBeepsLeft = 3;
+  buzzerOn = true;
+  digitalWrite(BUZZER_PIN, HIGH);
+  alarmStepStart = millis();
+}
+
+void alarmTask() {
+  if(alarmBeepsLeft == 0) return;
+  unsigned long elapsed = millis() - alarmStepStart;
+  if(buzzerOn && elapsed >= 1000) {
     digitalWrite(BUZZER_PIN, LOW);
-    delay(500);
+    buzzerOn = false;
+    alarmBeepsLeft--;
+    alarmStepStart = millis();
+  }
+  else if(!buzzerOn && elapsed >= 500) {
+    digitalWrite(BUZZER_PIN, HIGH);
+    buzzerOn = true;
+    alarmStepStart = millis();
   }
 }
 
 void monitorPowerSupply() {
   int powerReading = analogRead(POWER_CHECK_PIN);
   if(powerReading < 500) {
-    sendAlert("WARNING: Power Supply Interrupted");
+    sendAlert(ALERT_POWER, "WARNING: Power Supply Interrupted");
     // Implement battery backup switch
   }
-}
\ No newline at end of file
+}
@@ -0,0 +1,162 @@
+import argparse
+import os
+import selectors
+import time
+
+import numpy as np
+import serial
+
+from batch_inference import BatchPredictor, print_predictions
+from serial_reader import SerialValueReader
+from telemetry import FrameDecoder
+
+
+class SerialHub:
+    """
+    Read many Arduinos from one process and one thread.
+
+    Every port is opened non-blocking and registered with a selector, so a
+    single poll() wakes up for whichever boards have data and drains each of
+    them in bulk. Readings come back as flat arrays tagged with the index of
+    the device they came from, ready for one shared BatchPredictor.
+    """
+
+    def __init__(self, ports, baudrate=9600, prefix=b'Gas Level', binary=False):
+        """
+        :param ports: Serial port names, or a dictionary mapping device name to port name.
+        :param baudrate: Baud rate shared by all boards.
+        :param prefix: Prefix of the text lines carrying the raw reading (ignored when binary).
+        :param binary: Decode binary telemetry frames (telemetry.py) instead of text lines.
+        """
+        if not isinstance(ports, dict):
+            ports = {port: port for port in ports}
+
+        self.devices = list(ports)
+        self.binary = binary
+        self.errors = {device: 0 for device in self.devices}
+        self._ports = []
+        # Serial handles cannot be selected on Windows; there every port is polled instead
+        self._selector = selectors.DefaultSelector() if os.name != 'nt' else None
+
+        for index, (device, port) in enumerate(ports.items()):
+            ser = serial.Serial(port, baudrate, timeout=0)
+            reader = FrameDecoder() if binary else SerialValueReader(ser, prefix=prefix)
+            entry = (index, ser, reader)
+            self._ports.append(entry)
+            if self._selector is not None:
+                self._selector.register(ser.fileno(), selectors.EVENT_READ, entry)
+
+    def _ready(self, timeout):
+        if self._selector is None:
+            ready = [entry for entry in self._ports if entry[1].is_open and entry[1].in_waiting]
+            if not ready:
+                time.sleep(min(timeout, 0.01))
+            return ready
+        return [key.data for key, _ in self._selector.select(timeout)]
+
+    def _read(self, ser, reader):
+        if self.binary:
+            return reader.feed(ser.read(ser.in_waiting or 1))['raw']
+        return reader.read_values()
+
+    def poll(self, timeout=0.1):
+        """
+        Drain every port that has data, waiting up to timeout seconds for one to.
+
+        :param timeout: Longest wait in seconds when no port is ready.
+        :return: Tuple of (tags, raw) int32 arrays: device index and raw reading per value.
+        """
+        tags, raw = [], []
+        for index, ser, reader in self._ready(timeout):
+            try:
+                values = self._read(ser, reader)
+            except (serial.SerialException, OSError) as e:
+                # An unplugged board must not take the others down with it
+                self.errors[self.devices[index]] += 1
+                print(f"Closing {self.devices[index]}: {e}")
+                self._remove(index, ser)
+                continue
+            raw.append(values)
+            tags.append(np.full(len(values), index, dtype=np.int32))
+
+        if not raw:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int32)
+        return np.concatenate(tags), np.concatenate(raw).astype(np.int32)
+
+    def _remove(self, index, ser):
+        if self._selector is not None:
+            self._selector.unregister(ser.fileno())
+        ser.close()
+        self._ports = [entry for entry in self._ports if entry[0] != index]
+
+    def close(self):
+        """Close every port."""
+        for index, ser, _ in list(self._ports):
+            self._remove(index, ser)
+        if self._selector is not None:
+            self._selector.close()
+
+
+def run_hub(hub, predictor, to_features, on_batch=None):
+    """
+    Feed every reading from the hub through one shared batched predictor, forever.
+
+    :param hub: SerialHub to poll.
+    :param predictor: BatchPredictor shared by all devices.
+    :param to_features: Callable turning an array of raw readings into a 2-D feature array.
+    :param on_batch: Callable receiving (devices, readings, predictions) per scored batch;
+                     prints the predictions by default.
+    """
+    if on_batch is None:
+        on_batch = lambda devices, readings, predictions: print_predictions(readings, predictions, devices)
+    device_names = np.array(hub.devices, dtype=object)
+
+    def flush():
+        tags, readings, predictions = predictor.flush_tagged()
+        on_batch(device_names[tags], readings, predictions)
+
+    while True:
+        tags, raw = hub.poll(timeout=predictor.max_wait)
+        rows = to_features(raw)
+
+        taken = 0
+        while taken < len(rows):
+            taken += predictor.extend(rows[taken:], tags[taken:])
+            if predictor.due():
+                flush()
+        if predictor.due():
+            flush()
+
+
+def simulated_ppm(raw):
+    """Vectorized form of the simulated calibration in test2.calibrate_mq2."""
+    raw = np.asarray(raw, dtype=np.float64)
+    return raw * np.select([raw < 150, raw < 500], [0.1, 0.2], 0.3)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Classify live readings from many Arduinos in one process.")
+    parser.add_argument('ports', nargs='+', help="Serial ports, optionally named as NAME=PORT")
+    model = parser.add_mutually_exclusive_group(required=True)
+    model.add_argument('--predictor', help="BatchPredictor saved with test2.py --save-predictor")
+    model.add_argument('--lite', metavar='PATH',
+                       help="Models exported with test2.py --export-lite; runs without scikit-learn")
+    parser.add_argument('--baudrate', type=int, default=9600)
+    parser.add_argument('--binary', action='store_true', help="Boards send binary telemetry frames")
+    args = parser.parse_args()
+
+    ports = dict(p.split('=', 1) if '=' in p else (p, p) for p in args.ports)
+    if args.lite:
+        predictor = BatchPredictor.from_lite(args.lite, max_batch_size=16, max_wait=0.5)
+    else:
+        import joblib  # Unpickling a predictor saved with --sklearn imports scikit-learn
+        predictor = joblib.load(args.predictor)
+    hub = SerialHub(ports, baudrate=args.baudrate, binary=args.binary)
+    print(f"Listening on {len(hub.devices)} ports.")
+    try:
+        run_hub(hub, predictor, lambda raw: np.column_stack((raw, simulated_ppm(raw))))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        hub.close()
+        print(f"Port errors: {hub.errors}")
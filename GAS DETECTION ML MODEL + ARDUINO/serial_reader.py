@@ -0,0 +1,144 @@
+import numpy as np
+
+# Longest digit run accepted: ten digits can overflow int32, so such lines are skipped
+MAX_DIGITS = 9
+POWERS_OF_10 = 10 ** np.arange(MAX_DIGITS, dtype=np.int64)
+
+
+class SerialValueReader:
+    """
+    Read integer sensor values from a serial port in bulk.
+
+    Everything waiting in the port is drained with one readinto() into a
+    reusable bytearray, which parse() then reads in place with np.frombuffer.
+    Lines are found with whole-buffer comparisons, each line's characters are
+    counted by binary search over the positions of digits, '-' and other bytes,
+    and values are summed from digit * 10^place, so no bytes object is created
+    per line or per value. The cost per read is a fixed number of
+    NumPy operations, however many lines have arrived.
+    """
+
+    def __init__(self, ser, prefix=None, buffer_size=1 << 16):
+        """
+        :param ser: Open serial.Serial (anything with in_waiting and readinto).
+        :param prefix: Bytes the wanted lines start with, e.g. b'Gas Level' for
+                       "Gas Level: 512"; None for lines holding just the number.
+        :param buffer_size: Size of the receive buffer in bytes.
+        """
+        self.ser = ser
+        self._buffer = bytearray(buffer_size)
+        self._view = memoryview(self._buffer)
+        self._size = 0  # Bytes currently held, always starting at offset 0
+        self._partial = False  # The buffer starts mid-line, so its first line is incomplete
+        self._prefix = np.frombuffer(prefix or b'', dtype=np.uint8)
+
+        self.bytes_read = 0
+        self.values_read = 0
+        self.discarded_bytes = 0
+
+    def fill(self):
+        """
+        Read whatever the port has buffered, blocking up to the port timeout if nothing is waiting.
+
+        :return: Number of bytes read.
+        """
+        free = len(self._buffer) - self._size
+        if free == 0:
+            # A full buffer with no line ending is noise; keep only the tail in case a line is starting.
+            # The tail starts mid-line, so its first line is dropped rather than parsed truncated.
+            keep = len(self._buffer) // 2
+            self._buffer[:keep] = self._buffer[-keep:]
+            self.discarded_bytes += self._size - keep
+            self._size = keep
+            self._partial = True
+            free = len(self._buffer) - keep
+
+        wanted = min(max(self.ser.in_waiting, 1), free)
+        count = self.ser.readinto(self._view[self._size:self._size + wanted]) or 0
+        self._size += count
+        self.bytes_read += count
+        return count
+
+    def _values(self, data):
+        # Lines are "<prefix><anything but ':'>:<value>" (or just "<value>" without a prefix), where
+        # value is an optional '-' and 1..MAX_DIGITS digits between blanks, and lines end in "\n" or "\r\n".
+        # Anything else, e.g. "Gas Level (PPM): 12.34", is skipped rather than truncated.
+        ends = np.flatnonzero(data == ord('\n'))
+        if len(ends) == 0:
+            return np.empty(0, dtype=np.int32)
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        ends = ends - (data[np.maximum(ends - 1, 0)] == ord('\r')) * (ends > starts)
+
+        valid = np.ones(len(starts), dtype=bool)
+        first = starts
+        if len(self._prefix):
+            valid &= ends - starts > len(self._prefix)
+            for i, byte in enumerate(self._prefix):
+                valid &= data[np.minimum(starts + i, len(data) - 1)] == byte
+            colons = np.flatnonzero((data == ord(':')) | (data == ord('\r')))
+            found = np.searchsorted(colons, starts + len(self._prefix))
+            valid &= found < len(colons)
+            colon = colons[np.minimum(found, len(colons) - 1)] if len(colons) else starts
+            valid &= (colon < ends) & (data[colon] == ord(':'))
+            first = colon + 1
+
+        def count(positions, begin):
+            return np.searchsorted(positions, ends) - np.searchsorted(positions, begin)
+
+        is_digit = (data >= ord('0')) & (data <= ord('9'))
+        is_minus = data == ord('-')
+        digit_at = np.flatnonzero(is_digit)
+        digits = count(digit_at, first)
+        minus = count(np.flatnonzero(is_minus), first)
+        others = count(np.flatnonzero(~(is_digit | is_minus | (data == ord(' ')) | (data == ord('\t')))), first)
+        valid &= (others == 0) & (digits >= 1) & (digits <= MAX_DIGITS) & (minus <= 1)
+
+        # The digits have to be one run, with the '-' (if any) right before it
+        if len(digit_at) == 0:
+            return np.empty(0, dtype=np.int32)
+        first_digit = np.minimum(np.searchsorted(digit_at, first), len(digit_at) - 1)
+        run = digit_at[first_digit]
+        valid &= digit_at[np.clip(first_digit + digits - 1, 0, len(digit_at) - 1)] == run + digits - 1
+        valid &= (minus == 0) | is_minus[np.maximum(run - 1, 0)]
+
+        run, digits, negative = run[valid], digits[valid], minus[valid] == 1
+        if len(run) == 0:
+            return np.empty(0, dtype=np.int32)
+        offsets = np.concatenate(([0], np.cumsum(digits)[:-1]))
+        index = np.arange(digits.sum()) - np.repeat(offsets, digits)
+        place = np.repeat(digits - 1, digits) - index
+        values = np.add.reduceat((data[np.repeat(run, digits) + index] - ord('0')) * POWERS_OF_10[place], offsets)
+        return np.where(negative, -values, values).astype(np.int32)
+
+    def parse(self):
+        """
+        Parse all complete lines currently buffered.
+
+        :return: int32 array of the values, in arrival order.
+        """
+        end = self._buffer.rfind(b'\n', 0, self._size) + 1
+        if end == 0:
+            return np.empty(0, dtype=np.int32)
+
+        start = 0
+        if self._partial:
+            start = self._buffer.find(b'\n', 0, end) + 1
+            self.discarded_bytes += start
+            self._partial = False
+
+        values = self._values(np.frombuffer(self._buffer, dtype=np.uint8, count=end - start, offset=start))
+        # Move the unfinished last line to the front for the next read
+        self._buffer[:self._size - end] = self._buffer[end:self._size]
+        self._size -= end
+
+        self.values_read += len(values)
+        return values
+
+    def read_values(self):
+        """
+        Read from the port and return every complete value received so far.
+
+        :return: int32 array, empty if no complete line arrived before the port timeout.
+        """
+        self.fill()
+        return self.parse()
@@ -0,0 +1,153 @@
+import os
+import re
+import time
+import tty
+
+CTRL_Z = 0x1A
+ESC = 0x1B
+CMGS = re.compile(rb'^AT\+CMGS="([^"]*)"$')
+ATD = re.compile(rb'^ATD([^;]*);?$')
+
+
+class MockSim800:
+    """
+    A SIM800 on the master side of a pseudo-terminal, answering the AT commands the firmware sends.
+
+    The firmware talks to the slave side: firmware_host.py attaches it to a sketch's
+    SoftwareSerial, and port can be opened by anything else. The mock has no clock of
+    its own; service(now_ms) is driven by the caller's, either the sketch's simulated
+    millis() or real time from the command line. Replies are scheduled with the
+    configured delays, so the driver sees the same order and timing as on a real modem.
+    Every SMS and call is recorded with its times.
+    """
+
+    def __init__(self, echo=True, command_ms=20, send_ms=3000, fail_every=0, silent=False):
+        """
+        :param echo: Echo commands back, as the SIM800 does by default (ATE1).
+        :param command_ms: Delay before OK or the '>' prompt.
+        :param send_ms: Delay between Ctrl+Z and +CMGS, i.e. the network's time to take the SMS.
+        :param fail_every: Answer every n-th SMS with +CMS ERROR (0 = never).
+        :param silent: Answer nothing at all, like an unpowered modem.
+        """
+        self.echo = echo
+        self.command_ms = command_ms
+        self.send_ms = send_ms
+        self.fail_every = fail_every
+        self.silent = silent
+
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)  # No echo or newline translation, like a real UART
+        os.set_blocking(self.master, False)
+        os.set_blocking(self.slave, False)
+        self.port = os.ttyname(self.slave)
+
+        self.messages = []  # Dictionaries: phone, text, sent_ms, accepted_ms (None when failed)
+        self.calls = []     # Dictionaries: phone, dialed_ms, hung_up_ms
+        self.commands = 0
+        self._buffer = b''
+        self._prompt = None  # Phone number while the '>' prompt is open
+        self._replies = []   # (due_ms, bytes), in due order
+        self._sms_count = 0
+
+    def _reply(self, now_ms, delay_ms, data):
+        if self.silent:
+            return
+        self._replies.append((now_ms + delay_ms, data))
+        self._replies.sort(key=lambda reply: reply[0])
+
+    def _flush(self, now_ms):
+        while self._replies and self._replies[0][0] <= now_ms:
+            _, data = self._replies.pop(0)
+            os.write(self.master, data)
+
+    def _command(self, now_ms, command):
+        self.commands += 1
+        if self.echo:
+            self._reply(now_ms, 0, command + b'\r\n')
+        match = CMGS.match(command)
+        if match:
+            self._prompt = match.group(1).decode()
+            self._reply(now_ms, self.command_ms, b'\r\n> ')
+            return
+        match = ATD.match(command)
+        if match:
+            self.calls.append({'phone': match.group(1).decode(), 'dialed_ms': now_ms, 'hung_up_ms': None})
+        elif command == b'ATH' and self.calls:
+            self.calls[-1]['hung_up_ms'] = now_ms
+        elif not command.startswith(b'AT'):
+            return
+        self._reply(now_ms, self.command_ms, b'\r\nOK\r\n')
+
+    def _message(self, now_ms, text):
+        self._sms_count += 1
+        failed = self.fail_every and self._sms_count % self.fail_every == 0
+        self.messages.append({'phone': self._prompt, 'text': text.decode(errors='replace'), 'sent_ms': now_ms,
+                              'accepted_ms': None if failed or self.silent else now_ms + self.send_ms})
+        self._prompt = None
+        if failed:
+            self._reply(now_ms, self.send_ms, b'\r\n+CMS ERROR: 500\r\n')
+        else:
+            self._reply(now_ms, self.send_ms, b'\r\n+CMGS: %d\r\n\r\nOK\r\n' % self._sms_count)
+
+    def service(self, now_ms):
+        """
+        Read what the firmware wrote, answer it and send every reply that is due.
+
+        :param now_ms: Current time in milliseconds on the caller's clock.
+        """
+        self._flush(now_ms)
+        try:
+            self._buffer += os.read(self.master, 4096)
+        except BlockingIOError:
+            pass
+
+        while self._buffer:
+            if self._prompt is not None:
+                end = next((i for i, c in enumerate(self._buffer) if c in (CTRL_Z, ESC)), None)
+                if end is None:
+                    break
+                text, cancelled = self._buffer[:end], self._buffer[end] == ESC
+                self._buffer = self._buffer[end + 1:]
+                if cancelled:
+                    self._prompt = None
+                else:
+                    self._message(now_ms, text)
+                continue
+            self._buffer = self._buffer.lstrip(b'\n')
+            end = self._buffer.find(b'\r')
+            if end < 0:
+                break
+            command, self._buffer = self._buffer[:end].strip(), self._buffer[end + 1:]
+            if command:
+                self._command(now_ms, command)
+        self._flush(now_ms)
+
+    def close(self):
+        os.close(self.master)
+        os.close(self.slave)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Mock SIM800 on a pseudo-terminal, answering in real time.")
+    parser.add_argument('--send-ms', type=int, default=3000, help="Delay between Ctrl+Z and +CMGS")
+    parser.add_argument('--fail-every', type=int, default=0, help="Answer every n-th SMS with +CMS ERROR")
+    parser.add_argument('--silent', action='store_true', help="Never answer")
+    args = parser.parse_args()
+
+    modem = MockSim800(send_ms=args.send_ms, fail_every=args.fail_every, silent=args.silent)
+    print(f"SIM800 mock: {modem.port}")
+    start = time.monotonic()
+    seen = 0
+    try:
+        while True:
+            modem.service(int((time.monotonic() - start) * 1000))
+            for message in modem.messages[seen:]:
+                print(f"SMS to {message['phone']}: {message['text']!r}")
+            seen = len(modem.messages)
+            time.sleep(0.005)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        modem.close()
@@ -0,0 +1,190 @@
+import numpy as np
+
+# Frame layout (little-endian), mirrored by arduino_code/telemetry_frame.h:
+#   0xA5 0x5A | length (15) | type u8 | seq u16 | timestamp_ms u32 | raw u16 | ppm x10 u16 |
+#   4 field bytes | CRC-16/CCITT u16
+# The CRC covers the length byte and the payload. The type names the field bytes (FRAME_FIELDS).
+SYNC = b'\xa5\x5a'
+PAYLOAD_LEN = 15
+FRAME_LEN = len(SYNC) + 1 + PAYLOAD_LEN + 2
+
+FRAME_LABELS = 1  # finalcode.ino: its four label codes
+FRAME_RISK = 2    # re_implementation.c: explosion risk in percent (0-100) and gas class (0-2)
+FRAME_FIELDS = {
+    FRAME_LABELS: ('leak_severity', 'fire_risk', 'flammability', 'gas_type'),
+    FRAME_RISK: ('explosion_risk', 'gas_class'),
+}
+LABEL_FIELDS = FRAME_FIELDS[FRAME_LABELS]
+NOT_SENT = 0xFF  # Record value of the fields another frame type carries
+
+FRAME_DTYPE = np.dtype([
+    ('sync', '<u2'), ('length', 'u1'), ('type', 'u1'),
+    ('seq', '<u2'), ('timestamp_ms', '<u4'), ('raw', '<u2'), ('ppm_x10', '<u2'),
+    ('fields', 'u1', 4), ('crc', '<u2'),
+])
+
+RECORD_DTYPE = np.dtype([
+    ('seq', '<u2'), ('timestamp_ms', '<u4'), ('raw', '<u2'), ('ppm', '<f4'), ('type', 'u1'),
+] + [(field, 'u1') for fields in FRAME_FIELDS.values() for field in fields])
+
+
+def _crc_table():
+    table = np.zeros(256, dtype=np.uint16)
+    for byte in range(256):
+        crc = byte << 8
+        for _ in range(8):
+            crc = ((crc << 1) ^ 0x1021) if crc & 0x8000 else (crc << 1)
+        table[byte] = crc & 0xFFFF
+    return table
+
+
+CRC_TABLE = _crc_table()
+
+
+def crc16_ccitt(data):
+    """
+    CRC-16/CCITT-FALSE (polynomial 0x1021, initial value 0xFFFF).
+
+    :param data: Bytes to checksum.
+    :return: CRC as an int.
+    """
+    crc = 0xFFFF
+    for byte in data:
+        crc = ((crc << 8) & 0xFFFF) ^ int(CRC_TABLE[((crc >> 8) ^ byte) & 0xFF])
+    return crc
+
+
+def _frame_fields(frame_type, fields):
+    names = FRAME_FIELDS.get(frame_type)
+    if names is None:
+        raise ValueError(f"Unknown frame type: {frame_type}")
+    unknown = set(fields) - set(names)
+    if unknown:
+        raise ValueError(f"Frame type {frame_type} has no field {', '.join(sorted(unknown))}")
+    return [fields.get(name, 0) for name in names]
+
+
+def encode_frame(seq, timestamp_ms, raw, ppm, frame_type=FRAME_LABELS, **fields):
+    """
+    Build one telemetry frame, exactly as the firmware does.
+
+    :param frame_type: FRAME_LABELS or FRAME_RISK.
+    :param fields: Values of the type's FRAME_FIELDS by name; missing ones are sent as 0.
+    :return: Frame bytes (FRAME_LEN long).
+    """
+    values = _frame_fields(frame_type, fields)
+    frame = np.zeros(1, dtype=FRAME_DTYPE)
+    frame['sync'] = int.from_bytes(SYNC, 'little')
+    frame['length'] = PAYLOAD_LEN
+    frame['type'] = frame_type
+    frame['seq'] = seq & 0xFFFF
+    frame['timestamp_ms'] = timestamp_ms & 0xFFFFFFFF
+    frame['raw'] = raw
+    frame['ppm_x10'] = 0 if ppm <= 0 else min(int(ppm * 10 + 0.5), 0xFFFF)  # Same rounding as telemetryPPMx10
+    for i, value in enumerate(values):
+        frame['fields'][:, i] = value
+    data = bytearray(frame.tobytes())
+    data[-2:] = crc16_ccitt(data[2:-2]).to_bytes(2, 'little')
+    return bytes(data)
+
+
+def encode_frames(seq, timestamp_ms, raw, ppm, frame_type=FRAME_LABELS, **fields):
+    """
+    Build many telemetry frames at once; arguments are arrays (or scalars) of equal length.
+
+    :param frame_type: FRAME_LABELS or FRAME_RISK.
+    :param fields: Values of the type's FRAME_FIELDS by name; missing ones are sent as 0.
+    :return: Concatenated frame bytes, FRAME_LEN per reading.
+    """
+    values = _frame_fields(frame_type, fields)
+    raw = np.asarray(raw)
+    ppm = np.asarray(ppm, dtype=np.float32)
+    frames = np.zeros(len(raw), dtype=FRAME_DTYPE)
+    frames['sync'] = int.from_bytes(SYNC, 'little')
+    frames['length'] = PAYLOAD_LEN
+    frames['type'] = frame_type
+    frames['seq'] = np.asarray(seq) & 0xFFFF
+    frames['timestamp_ms'] = np.asarray(timestamp_ms) & 0xFFFFFFFF
+    frames['raw'] = raw
+    frames['ppm_x10'] = np.where(ppm <= 0, 0, np.minimum(ppm * np.float32(10) + np.float32(0.5), 0xFFFF))
+    for i, value in enumerate(values):
+        frames['fields'][:, i] = value
+
+    data = frames.view(np.uint8).reshape(len(frames), FRAME_LEN)
+    crc = np.full(len(frames), 0xFFFF, dtype=np.uint16)
+    for column in range(len(SYNC), FRAME_LEN - 2):
+        crc = ((crc << 8) & 0xFFFF) ^ CRC_TABLE[((crc >> 8) ^ data[:, column]) & 0xFF]
+    frames['crc'] = crc
+    return frames.tobytes()
+
+
+def decode_frames(buffer):
+    """
+    Decode every valid frame in a byte buffer in one vectorized pass.
+
+    Candidate frames are located at every sync pattern and their CRCs are
+    computed column by column across all candidates at once, so the cost is
+    FRAME_LEN NumPy operations regardless of how many frames the buffer holds.
+    Corrupt frames, frames of an unknown type and stray bytes are skipped.
+
+    :param buffer: bytes, bytearray or memoryview of received data.
+    :return: Tuple of (records, consumed) where records is a RECORD_DTYPE array
+             and consumed is how many leading bytes can be discarded; the rest
+             may hold the start of a frame that has not fully arrived. Each record
+             has the fields of its own type; those of the other types are NOT_SENT.
+    """
+    data = np.frombuffer(buffer, dtype=np.uint8)
+    consumed = max(len(data) - (FRAME_LEN - 1), 0)
+    if len(data) < FRAME_LEN:
+        return np.empty(0, dtype=RECORD_DTYPE), consumed
+
+    starts = np.flatnonzero((data[:-1] == SYNC[0]) & (data[1:] == SYNC[1]))
+    starts = starts[starts + FRAME_LEN <= len(data)]
+    frames = data[starts[:, None] + np.arange(FRAME_LEN)]
+
+    crc = np.full(len(frames), 0xFFFF, dtype=np.uint16)
+    for column in range(len(SYNC), FRAME_LEN - 2):
+        crc = ((crc << 8) & 0xFFFF) ^ CRC_TABLE[((crc >> 8) ^ frames[:, column]) & 0xFF]
+    stored = frames[:, -2].astype(np.uint16) | (frames[:, -1].astype(np.uint16) << 8)
+
+    valid = (frames[:, len(SYNC)] == PAYLOAD_LEN) & np.isin(frames[:, len(SYNC) + 1], list(FRAME_FIELDS)) & (crc == stored)
+    starts, frames = starts[valid], frames[valid]
+
+    # A sync pattern inside a payload that also passes the CRC is vanishingly rare;
+    # drop any frame that overlaps the one before it
+    keep = np.ones(len(starts), dtype=bool)
+    keep[1:] = np.diff(starts) >= FRAME_LEN
+    starts, frames = starts[keep], frames[keep]
+
+    decoded = np.ascontiguousarray(frames).view(FRAME_DTYPE).reshape(-1)
+    records = np.empty(len(decoded), dtype=RECORD_DTYPE)
+    for field in ('seq', 'timestamp_ms', 'raw', 'type'):
+        records[field] = decoded[field]
+    records['ppm'] = decoded['ppm_x10'] / 10.0
+    for frame_type, names in FRAME_FIELDS.items():
+        is_type = decoded['type'] == frame_type
+        for i, name in enumerate(names):
+            records[name] = np.where(is_type, decoded['fields'][:, i], NOT_SENT)
+
+    if len(starts):
+        consumed = max(consumed, int(starts[-1]) + FRAME_LEN)
+    return records, consumed
+
+
+class FrameDecoder:
+    """Carry partial frames across reads and decode whatever has arrived."""
+
+    def __init__(self):
+        self._pending = bytearray()
+
+    def feed(self, data):
+        """
+        Append received bytes and decode all complete frames.
+
+        :param data: Newly received bytes.
+        :return: RECORD_DTYPE array of decoded frames.
+        """
+        self._pending += data
+        records, consumed = decode_frames(self._pending)
+        del self._pending[:consumed]
+        return records
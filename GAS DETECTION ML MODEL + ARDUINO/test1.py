@@ -1,10 +1,28 @@
 import serial
+import argparse
+import numpy as np
 import pandas as pd
+from batch_inference import BatchPredictor, predict_rows
+from serial_reader import SerialValueReader
+from multi_output import train_multi_output
+from model_cache import ModelCache
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 
 
+parser = argparse.ArgumentParser(description="Train MQ2 label models and classify live readings from the Arduino.")
+parser.add_argument('--multi-output', action='store_true',
+                    help="Train one multi-output tree for all four labels instead of one tree per label")
+parser.add_argument('--retrain', action='store_true',
+                    help="Ignore cached models and train again")
+parser.add_argument('--tabulate', action='store_true',
+                    help="Evaluate the models once over every ADC code and predict by table lookup")
+parser.add_argument('--export-table', metavar='PATH',
+                    help="Write the run-length compressed prediction table as an Arduino header and exit")
+args = parser.parse_args()
+
+
 def calibrate_mq2(sensor_value):
     ppm = sensor_value / 100  # Placeholder formula, ned to modify based on new values rudra will say
     return ppm
@@ -29,7 +47,7 @@ data = {
 df = pd.DataFrame(data)
 
 # Features (independent variables) and Labels (dependent variables)
-X = df[['sensor_reading', 'ppm']]  # Input features
+X = df[['sensor_reading', 'ppm']].to_numpy()  # Input features (plain array, so batches skip DataFrame construction)
 
 labels = {
     'leak_severity': df['leak_severity'],
@@ -38,49 +56,76 @@ labels = {
     'gas_type': df['gas_type']
 }
 
-trained_models = {}
-
+cache = ModelCache()
+# Everything the models depend on: retraining happens only when one of these changes
+training_inputs = {'X': X, 'labels': labels, 'features': calibrate_mq2}
 
-for label, y in labels.items():
-    print(f"Training model for {label}...")
-    
-    
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
 
-    model = DecisionTreeClassifier()
-    model.fit(X_train, y_train)
+def train_label_models():
+    trained_models = {}
+    for label, y in labels.items():
+        print(f"Training model for {label}...")
+        
+        
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2)
 
-    
-    y_pred = model.predict(X_test)
+        model = DecisionTreeClassifier()
+        model.fit(X_train, y_train)
 
-    
-    accuracy = accuracy_score(y_test, y_pred)
-    print(f'{label} Model Accuracy: {accuracy:.4f}')
+        
+        y_pred = model.predict(X_test)
 
-    trained_models[label] = model
+        
+        accuracy = accuracy_score(y_test, y_pred)
+        print(f'{label} Model Accuracy: {accuracy:.4f}')
+
+        trained_models[label] = model
+    return trained_models
+
+
+if args.multi_output:
+    multi_output_model = cache.get_or_train('test1-multi-output', lambda: train_multi_output(X, labels),
+                                            {**training_inputs, 'train': train_multi_output}, refresh=args.retrain)
+    predictor = BatchPredictor.from_multi_output(multi_output_model, labels, max_batch_size=16, max_wait=0.5)
+else:
+    trained_models = cache.get_or_train('test1-trees', train_label_models,
+                                        {**training_inputs, 'train': train_label_models}, refresh=args.retrain)
+    predictor = BatchPredictor(trained_models, max_batch_size=16, max_wait=0.5)
+
+def adc_features(raw):
+    return np.column_stack((raw, [calibrate_mq2(int(x)) for x in raw]))
+
+
+if args.tabulate or args.export_table:
+    # Only 1024 possible inputs: evaluate the models on all of them once
+    from prediction_table import PredictionTable, export_header
+    if args.multi_output:
+        table = PredictionTable.from_multi_output(multi_output_model, labels, adc_features)
+    else:
+        table = PredictionTable.from_models(trained_models, adc_features)
+    if args.export_table:
+        size = export_header(table, args.export_table, source='test1.py')
+        print(f"Prediction table written to {args.export_table} ({size} bytes of PROGMEM)")
+        from firmware_parity import check_prediction_table, host_compiler, print_result
+        if host_compiler():
+            # Build the header with host gcc and compare its lookup with the table on every ADC code
+            print_result(check_prediction_table(args.export_table, table))
+        raise SystemExit
+    predictor = BatchPredictor.from_multi_output(table, table.labels, max_batch_size=16, max_wait=0.5)
 
 #serial communication port
 try:
-    ser = serial.Serial('COM3', 9600)  
+    ser = serial.Serial('COM3', 9600, timeout=predictor.max_wait)  # timeout lets a partial batch flush when idle
     print("Successfully connected to the Arduino.")
-    
+    reader = SerialValueReader(ser, prefix=b'Gas Level')
    
     while True:
         
-        line = ser.readline().decode('utf-8').strip()
-        if line.startswith('Gas Level'):
-            sensor_value = int(line.split(':')[1].strip())  # Extracting the sensor reading
-            ppm_value = calibrate_mq2(sensor_value)  # Convert to PPM
-            print(f"Sensor Reading: {sensor_value}, PPM: {ppm_value}")
-            
-            
-            input_data = pd.DataFrame([[sensor_value, ppm_value]], columns=['sensor_reading', 'ppm'])
-
-            # Predicing all parameters
-            for label, model in trained_models.items():
-                prediction = model.predict(input_data)
-                print(f"{label} Prediction: {prediction[0]}")
+        sensor_values = reader.read_values()  # Every complete "Gas Level: <n>" line received so far
+        ppm_values = [calibrate_mq2(int(x)) for x in sensor_values]  # Convert to PPM
+
+        # Predicing all parameters for the buffered batches
+        predict_rows(predictor, np.column_stack((sensor_values, ppm_values)))
         
 except serial.SerialException as e:
     print(f"Error: {e}")
-
@@ -4,6 +4,31 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import accuracy_score
 import serial
 import random
+import argparse
+import joblib
+import numpy as np
+from batch_inference import BatchPredictor, predict_rows
+from multi_output import train_multi_output
+from model_cache import ModelCache
+
+parser = argparse.ArgumentParser(description="Train MQ2 label models and classify live readings from the Arduino.")
+parser.add_argument('--multi-output', action='store_true',
+                    help="Train one multi-output tree for all four labels instead of one tree per label")
+parser.add_argument('--retrain', action='store_true',
+                    help="Ignore cached models and train again")
+parser.add_argument('--tabulate', action='store_true',
+                    help="Evaluate the models once over every ADC code and predict by table lookup")
+parser.add_argument('--export-table', metavar='PATH',
+                    help="Write the run-length compressed prediction table as an Arduino header and exit")
+parser.add_argument('--binary', action='store_true',
+                    help="Decode binary telemetry frames (TELEMETRY_BINARY firmware) instead of text lines")
+parser.add_argument('--save-predictor', metavar='PATH',
+                    help="Save the trained predictor for serial_hub.py and exit")
+parser.add_argument('--export-lite', metavar='PATH',
+                    help="Export the trained models for the NumPy-only lite_runtime (.npz) and exit")
+parser.add_argument('--sklearn', action='store_true',
+                    help="Score with scikit-learn instead of the packed NumPy tree evaluator")
+args = parser.parse_args()
 
 # Function to simulate calibration for MQ2 sensor values
 def calibrate_mq2(sensor_value):
@@ -69,7 +94,7 @@ data = {
 df = pd.DataFrame(data)
 
 # Features (independent variables) and Labels (dependent variables)
-X = df[['sensor_reading', 'ppm']]  # Input features
+X = df[['sensor_reading', 'ppm']].to_numpy()  # Input features (plain array, so batches skip DataFrame construction)
 labels = {
     'leak_severity': df['leak_severity'],
     'fire_risk': df['fire_risk'],
@@ -77,46 +102,123 @@ labels = {
     'gas_type': df['gas_type']
 }
 
-trained_models = {}
-
-# Train DecisionTree models for each parameter
-for label, y in labels.items():
-    print(f"Training model for {label}...")
-
-    # Train-test split
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+cache = ModelCache()
+# Everything the models depend on: retraining happens only when one of these changes
+training_inputs = {
+    'X': X,
+    'labels': labels,
+    'features': [calibrate_mq2, classify_gas, classify_leak_severity, classify_fire_risk, classify_flammability],
+}
 
-    # Train model
-    model = DecisionTreeClassifier()
-    model.fit(X_train, y_train)
 
-    # Evaluate accuracy
-    y_pred = model.predict(X_test)
-    accuracy = accuracy_score(y_test, y_pred)
-    print(f"{label} Model Accuracy: {accuracy:.4f}")
+def train_label_models():
+    # Train DecisionTree models for each parameter
+    trained_models = {}
+    for label, y in labels.items():
+        print(f"Training model for {label}...")
+
+        # Train-test split
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
+
+        # Train model
+        model = DecisionTreeClassifier()
+        model.fit(X_train, y_train)
+
+        # Evaluate accuracy
+        y_pred = model.predict(X_test)
+        accuracy = accuracy_score(y_test, y_pred)
+        print(f"{label} Model Accuracy: {accuracy:.4f}")
+
+        # Store trained model
+        trained_models[label] = model
+    return trained_models
+
+
+def numpy_evaluator(model, outputs=None):
+    # sklearn's input validation dominates the cost of scoring a 16-row batch;
+    # the packed evaluator is used only if it agrees with sklearn on every ADC code
+    if args.sklearn:
+        return model
+    from lite_runtime.parity import count_mismatches
+    from lite_runtime.trees import TreeEnsemble
+    ensemble = TreeEnsemble.from_sklearn(model, outputs=outputs)
+    if count_mismatches(model, ensemble, X):
+        print("NumPy tree evaluator disagrees with scikit-learn; falling back to scikit-learn.")
+        return model
+    return ensemble
+
+
+if args.multi_output:
+    # One tree with a 2-D target over a single shared split
+    multi_output_model = cache.get_or_train(
+        'test2-multi-output', lambda: train_multi_output(X, labels, random_state=42),
+        {**training_inputs, 'train': train_multi_output, 'random_state': 42}, refresh=args.retrain)
+    predictor = BatchPredictor.from_multi_output(numpy_evaluator(multi_output_model, outputs=list(labels)),
+                                                 labels, max_batch_size=16, max_wait=0.5)
+else:
+    trained_models = cache.get_or_train('test2-trees', train_label_models,
+                                        {**training_inputs, 'train': train_label_models}, refresh=args.retrain)
+    predictor = BatchPredictor({label: numpy_evaluator(model) for label, model in trained_models.items()},
+                               max_batch_size=16, max_wait=0.5)
+
+def adc_features(raw):
+    return np.column_stack((raw, [calibrate_mq2(int(x)) for x in raw]))
+
+
+if args.tabulate or args.export_table:
+    # Only 1024 possible inputs: evaluate the models on all of them once
+    from prediction_table import PredictionTable, export_header
+    if args.multi_output:
+        table = PredictionTable.from_multi_output(multi_output_model, labels, adc_features)
+    else:
+        table = PredictionTable.from_models(trained_models, adc_features)
+    if args.export_table:
+        size = export_header(table, args.export_table, source='test2.py')
+        print(f"Prediction table written to {args.export_table} ({size} bytes of PROGMEM)")
+        from firmware_parity import check_prediction_table, host_compiler, print_result
+        if host_compiler():
+            # Build the header with host gcc and compare its lookup with the table on every ADC code
+            print_result(check_prediction_table(args.export_table, table))
+        raise SystemExit
+    predictor = BatchPredictor.from_multi_output(table, table.labels, max_batch_size=16, max_wait=0.5)
+
+if args.export_lite:
+    from lite_runtime.export import export_models
+    if args.multi_output:
+        export_models({'multi_output': multi_output_model}, args.export_lite, outputs={'multi_output': list(labels)})
+    else:
+        export_models(trained_models, args.export_lite)
+    print(f"Models exported to {args.export_lite}")
+    raise SystemExit
 
-    # Store trained model
-    trained_models[label] = model
+if args.save_predictor:
+    joblib.dump(predictor, args.save_predictor)
+    print(f"Predictor saved to {args.save_predictor}")
+    raise SystemExit
 
 # Serial communication for real-time sensor reading
 try:
-    ser = serial.Serial('COM3', 9600)  # Adjust COM port as needed
+    # The read timeout matches max_wait so a partial batch is still flushed when the line goes quiet
+    ser = serial.Serial('COM3', 9600, timeout=predictor.max_wait)  # Adjust COM port as needed
     print("Successfully connected to the Arduino.")
 
+    if args.binary:
+        # Take everything the UART has buffered and decode all complete frames at once
+        from telemetry import FrameDecoder
+        decoder = FrameDecoder()
+        read_raw = lambda: decoder.feed(ser.read(ser.in_waiting or 1))['raw']
+    else:
+        # Drain the port in bulk and parse every "Gas Level: <n>" line in one pass
+        from serial_reader import SerialValueReader
+        reader = SerialValueReader(ser, prefix=b'Gas Level')
+        read_raw = reader.read_values
+
     while True:
-        line = ser.readline().decode('utf-8').strip()
-        if line.startswith('Gas Level'):
-            sensor_value = int(line.split(':')[1].strip())  # Extract sensor reading
-            ppm_value = calibrate_mq2(sensor_value)  # Convert to PPM
-            print(f"Sensor Reading: {sensor_value}, PPM: {ppm_value}")
-
-            # Prepare input data for prediction
-            input_data = pd.DataFrame([[sensor_value, ppm_value]], columns=['sensor_reading', 'ppm'])
-
-            # Predict parameters
-            for label, model in trained_models.items():
-                prediction = model.predict(input_data)
-                print(f"{label} Prediction: {prediction[0]}")
+        raw = read_raw()
+        ppm = [calibrate_mq2(int(x)) for x in raw]  # Convert to PPM
+
+        # Predict parameters for whole micro-batches at once
+        predict_rows(predictor, np.column_stack((raw, ppm)))
 
 except serial.SerialException as e:
     print(f"Error: {e}")
@@ -1,13 +1,46 @@
+import argparse
+import os
+import numpy as np
 import pandas as pd
 import tensorflow as tf
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
 from sklearn.metrics import accuracy_score
 
+parser = argparse.ArgumentParser(description="Train the label networks and convert them to TensorFlow Lite.")
+parser.add_argument('--multi-output', action='store_true',
+                    help="Train one network with a softmax head per label instead of one network per label")
+parser.add_argument('--export-lite', metavar='PATH',
+                    help="Also export the trained networks for the NumPy-only lite_runtime (.npz)")
+parser.add_argument('--int8', action='store_true',
+                    help="Also convert every network to a full-integer int8 .tflite model")
+parser.add_argument('--max-drift', type=float, default=0.02,
+                    help="Keep an int8 model or --export-c header only if it disagrees with Keras "
+                         "on at most this share of readings")
+parser.add_argument('--dataset', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                      'dataset', 'Gas_Sensors_Measurements.csv'),
+                    help="CSV archive streamed as the int8 representative dataset")
+parser.add_argument('--calibration-samples', type=int, default=500,
+                    help="Readings taken from the archive to calibrate int8 ranges")
+parser.add_argument('--export-c', metavar='DIR',
+                    help="Also write every network as a standalone fixed-point C header (no TFLite Micro)")
+parser.add_argument('--c-bits', type=int, choices=(8, 16), default=8,
+                    help="Weight width of the --export-c headers; 8-bit networks over --max-drift fall back to 16")
+parser.add_argument('--export-micro', metavar='DIR',
+                    help="Also embed every .tflite model in a C header for TFLite Micro, with its tensor arena size")
+parser.add_argument('--merge-micro', action='store_true',
+                    help="With --export-micro, write one header whose models share a single tensor arena")
+args = parser.parse_args()
+
 # Your existing sensor readings data
 sensor_readings = [916, 935, 939, 938, 921, 925, 940, 945, 945, 947, 947, 943, 947, 946, 947, 950, 956, 956, 955, 954]
 ppm_values = [x / 100 for x in sensor_readings]  # Placeholder formula for ppm calculation
 
+
+def to_features(raw):
+    # Same features as the training data, for readings streamed from the archive
+    return np.column_stack((raw, raw / 100))
+
 # Example labels for different attributes (change as needed)
 labels_data = {
     'leak_severity': ['Low', 'Low', 'Low', 'Low', 'Moderate', 'Moderate', 'High', 'High', 'High', 'High', 'Low', 'Low', 'Moderate', 'High', 'High', 'High', 'High', 'Moderate', 'Moderate', 'High'],
@@ -39,52 +72,184 @@ labels = {
 
 # Initialize a dictionary to store the trained models
 trained_models = {}
+# Class names per model, so exported networks predict label names rather than indices
+model_classes = {}
+# .tflite file to deploy per model: the int8 one when it was kept, else the float one
+deployed_models = {}
+
+
+def save_and_convert(model, name, y_labelled=None):
+    """
+    Save a trained Keras model as .h5 and convert it to TensorFlow Lite.
+
+    With --int8 the model is also quantized to int8 and compared with Keras;
+    the int8 file is written only if it stays within --max-drift. The same gate
+    applies to the --export-c header, which falls back to 16-bit weights if the
+    8-bit network drifts too far and is not written if neither is close enough.
+
+    :param model: Trained Keras model.
+    :param name: Base name used for the output files.
+    :param y_labelled: Encoded labels of X, used to report int8 accuracy.
+    """
+    # Save the trained model as an .h5 file
+    model.save(f"{name}_model.h5")
+    print(f"Saved {name} model to disk.")
+
+    # Convert the model to TensorFlow Lite
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    tflite_model = converter.convert()
+
+    # Save the TensorFlow Lite model
+    tflite_model_path = f"{name}_model.tflite"
+    with open(tflite_model_path, 'wb') as f:
+        f.write(tflite_model)
+    print(f"Converted {name} model to TensorFlow Lite and saved as {tflite_model_path}")
+    deployed_models[name] = tflite_model_path
+
+    if args.int8:
+        from tflite_quantization import convert_int8, quantization_report, accept_int8, print_report
+        int8_model = convert_int8(model, representative_dataset)
+        report = quantization_report(model, tflite_model, int8_model, archive_readings, X, y_labelled)
+        print_report(name, report)
+        if accept_int8(report, args.max_drift):
+            with open(f"{name}_model_int8.tflite", 'wb') as f:
+                f.write(int8_model)
+            print(f"Saved int8 {name} model as {name}_model_int8.tflite")
+            deployed_models[name] = f"{name}_model_int8.tflite"
+        else:
+            print(f"Discarded int8 {name} model: drift above {args.max_drift:.2%}")
+
+    if args.export_c:
+        from keras_to_c import FixedPointNetwork, export_c_header
+        from firmware_parity import check_network_header, host_compiler, print_result
+        # Ranges cover both the training rows and every reading in the archive
+        readings = np.vstack((X.to_numpy(dtype=np.float32), archive_readings))
+        keras_outputs = model.predict(readings, verbose=0)
+        for bits in sorted({args.c_bits, 16}):
+            network = FixedPointNetwork.from_keras(model, readings, bits=bits, classes=model_classes.get(name))
+            if not isinstance(keras_outputs, dict):
+                keras_outputs = {network.outputs[0]: keras_outputs}
+            keras_codes = np.column_stack([np.argmax(keras_outputs[head], axis=1) for head in network.outputs])
+            agreement = np.mean(np.all(network.predict_codes(readings) == keras_codes, axis=1))
+            if 1 - agreement <= args.max_drift:
+                break
+            print(f"{bits}-bit {name} network agrees with Keras on only {agreement:.2%} of {len(readings)} readings: "
+                  f"drift above {args.max_drift:.2%}")
+        else:
+            print(f"Not writing a C header for {name}")
+            return
+
+        header_path = os.path.join(args.export_c, f"{name}_model.h")
+        memory = export_c_header(network, header_path, name, source='tflite_implement.py')
+        print(f"Wrote {header_path}: {bits}-bit weights, {memory['flash_bytes']} bytes flash, "
+              f"{memory['arena_bytes']} bytes SRAM, agrees with Keras on {agreement:.2%} of {len(readings)} readings")
+        if host_compiler():
+            # Build the header with host gcc and compare it with the emulation on every reading
+            print_result(check_network_header(header_path, network, memory['function'], readings))
+
 
-# Loop to train a model for each label
-for label, y in labels.items():
-    print(f"Training model for {label}...")
+if args.int8 or args.export_c:
+    # Every distinct reading in the archive: int8 drift and fixed-point ranges are measured on these
+    archive_readings = to_features(np.unique(pd.read_csv(args.dataset, usecols=['MQ2'])['MQ2'].to_numpy()))
+if args.int8:
+    # Calibration ranges come from real recordings, streamed rather than loaded whole
+    from tflite_quantization import stream_representative_dataset
+    representative_dataset = stream_representative_dataset(args.dataset, to_features,
+                                                            max_samples=args.calibration_samples)
+
+
+if args.multi_output:
+    print("Training multi-output model for all labels...")
+
+    # Encode every label up front so all heads share one train/test split
+    label_encoders = {label: LabelEncoder().fit(y) for label, y in labels.items()}
+    encoded = [label_encoders[label].transform(y) for label, y in labels.items()]
+    split = train_test_split(X, *encoded, test_size=0.2)
+    X_train, X_test = split[0], split[1]
+    y_train = {label: split[2 + 2 * i] for i, label in enumerate(labels)}
+    y_test = {label: split[3 + 2 * i] for i, label in enumerate(labels)}
+
+    # Shared hidden layers with one softmax head per label
+    inputs = tf.keras.Input(shape=(X.shape[1],))
+    hidden = tf.keras.layers.Dense(64, activation='relu')(inputs)
+    hidden = tf.keras.layers.Dense(32, activation='relu')(hidden)
+    outputs = {
+        label: tf.keras.layers.Dense(len(encoder.classes_), activation='softmax', name=label)(hidden)
+        for label, encoder in label_encoders.items()
+    }
+    model = tf.keras.Model(inputs=inputs, outputs=outputs)
+
+    model.compile(optimizer='adam',
+                  loss={label: 'sparse_categorical_crossentropy' for label in labels},
+                  metrics={label: ['accuracy'] for label in labels})
+    model.fit(X_train, y_train, epochs=10, batch_size=4, verbose=1)
+
+    # Evaluate each head on the shared test split
+    predictions = model.predict(X_test)
+    for label in labels:
+        accuracy = accuracy_score(y_test[label], np.argmax(predictions[label], axis=1))
+        print(f'{label} Model Accuracy: {accuracy:.4f}')
+
+    trained_models['multi_output'] = model
+    model_classes['multi_output'] = {label: encoder.classes_ for label, encoder in label_encoders.items()}
+    save_and_convert(model, 'multi_output', {label: encoder.transform(labels[label])
+                                             for label, encoder in label_encoders.items()})
+
+else:
+    # Loop to train a model for each label
+    for label, y in labels.items():
+        print(f"Training model for {label}...")
     
-    # Encode categorical labels into numeric values for training
-    label_encoder = LabelEncoder()
-    y_encoded = label_encoder.fit_transform(y)
+        # Encode categorical labels into numeric values for training
+        label_encoder = LabelEncoder()
+        y_encoded = label_encoder.fit_transform(y)
     
-    # Split the data into training and testing sets
-    X_train, X_test, y_train, y_test = train_test_split(X, y_encoded, test_size=0.2)
+        # Split the data into training and testing sets
+        X_train, X_test, y_train, y_test = train_test_split(X, y_encoded, test_size=0.2)
     
-    # Build a simple neural network model
-    model = tf.keras.Sequential([
-        tf.keras.layers.InputLayer(input_shape=(X.shape[1],)),
-        tf.keras.layers.Dense(64, activation='relu'),
-        tf.keras.layers.Dense(32, activation='relu'),
-        tf.keras.layers.Dense(len(label_encoder.classes_), activation='softmax')  # Output layer with as many nodes as the number of classes
-    ])
+        # Build a simple neural network model
+        model = tf.keras.Sequential([
+            tf.keras.layers.InputLayer(input_shape=(X.shape[1],)),
+            tf.keras.layers.Dense(64, activation='relu'),
+            tf.keras.layers.Dense(32, activation='relu'),
+            tf.keras.layers.Dense(len(label_encoder.classes_), activation='softmax')  # Output layer with as many nodes as the number of classes
+        ])
     
-    # Compile the model
-    model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
+        # Compile the model
+        model.compile(optimizer='adam', loss='sparse_categorical_crossentropy', metrics=['accuracy'])
     
-    # Train the model
-    model.fit(X_train, y_train, epochs=10, batch_size=4, verbose=1)
+        # Train the model
+        model.fit(X_train, y_train, epochs=10, batch_size=4, verbose=1)
     
-    # Evaluate the model
-    _, accuracy = model.evaluate(X_test, y_test)
-    print(f'{label} Model Accuracy: {accuracy:.4f}')
+        # Evaluate the model
+        _, accuracy = model.evaluate(X_test, y_test)
+        print(f'{label} Model Accuracy: {accuracy:.4f}')
     
-    # Store the trained model
-    trained_models[label] = model
+        # Store the trained model
+        trained_models[label] = model
+        model_classes[label] = label_encoder.classes_
     
-    # Save the trained model as an .h5 file
-    model.save(f"{label}_model.h5")
-    print(f"Saved {label} model to disk.")
+        save_and_convert(model, label, y_encoded)
 
-    # Convert the model to TensorFlow Lite
-    converter = tf.lite.TFLiteConverter.from_keras_model(model)
-    tflite_model = converter.convert()
-    
-    # Save the TensorFlow Lite model
-    tflite_model_path = f"{label}_model.tflite"
-    with open(tflite_model_path, 'wb') as f:
-        f.write(tflite_model)
-    print(f"Converted {label} model to TensorFlow Lite and saved as {tflite_model_path}")
+if args.export_micro:
+    from tflite_micro_export import export_model_header, export_merged_header
+    # Arena sizes come from the tensor lifetimes in each flatbuffer, not a guess
+    if args.merge_micro:
+        result = export_merged_header(deployed_models, os.path.join(args.export_micro, 'gas_models.h'),
+                                      source='tflite_implement.py')
+        print(f"Wrote gas_models.h: shared tensor arena about {result['arena_bytes']} bytes "
+              f"(separate arenas: {result['separate_arena_bytes']} bytes)")
+    else:
+        for name, tflite_path in deployed_models.items():
+            header_path = os.path.join(args.export_micro, f"{name}_model_data.h")
+            budget = export_model_header(tflite_path, header_path, name, source='tflite_implement.py')
+            print(f"Wrote {header_path}: tensor arena about {budget['arena_bytes']} bytes "
+                  f"({budget['activation_bytes']} activations + {budget['persistent_bytes']} estimated bookkeeping)")
+
+if args.export_lite:
+    from lite_runtime.export import export_models
+    export_models(trained_models, args.export_lite, classes=model_classes)
+    print(f"Exported models for lite_runtime to {args.export_lite}")
 
 # Done with training and conversion!
 print("Training and conversion to TFLite completed for all models.")
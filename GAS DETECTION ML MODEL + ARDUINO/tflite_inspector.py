@@ -0,0 +1,249 @@
+import mmap
+import time
+import numpy as np
+from flatbuffers import encode
+from flatbuffers import number_types as N
+from flatbuffers import util
+from flatbuffers.table import Table
+
+# Field offsets from the TensorFlow Lite schema (schema.fbs): 4 + 2 * field id
+MODEL_OPERATOR_CODES, MODEL_SUBGRAPHS, MODEL_BUFFERS = 6, 8, 12
+OPERATOR_CODE_DEPRECATED_BUILTIN, OPERATOR_CODE_CUSTOM, OPERATOR_CODE_BUILTIN = 4, 6, 10
+SUBGRAPH_TENSORS, SUBGRAPH_INPUTS, SUBGRAPH_OUTPUTS, SUBGRAPH_OPERATORS = 4, 6, 8, 10
+TENSOR_SHAPE, TENSOR_TYPE, TENSOR_BUFFER, TENSOR_NAME, TENSOR_IS_VARIABLE = 4, 6, 8, 10, 14
+OPERATOR_OPCODE_INDEX, OPERATOR_INPUTS, OPERATOR_OUTPUTS = 4, 6, 8
+BUFFER_DATA, BUFFER_SIZE = 4, 8
+
+# TensorType: name and size in bytes (INT4 packs two values per byte)
+TENSOR_TYPES = [
+    ('float32', 4), ('float16', 2), ('int32', 4), ('uint8', 1), ('int64', 8), ('string', 0),
+    ('bool', 1), ('int16', 2), ('complex64', 8), ('int8', 1), ('float64', 8), ('complex128', 16),
+    ('uint64', 8), ('resource', 0), ('variant', 0), ('uint32', 4), ('uint16', 2), ('int4', 0.5),
+]
+
+# BuiltinOperator codes 0-126; later codes are reported as BUILTIN_<code>
+BUILTIN_OPERATORS = """
+ADD AVERAGE_POOL_2D CONCATENATION CONV_2D DEPTHWISE_CONV_2D DEPTH_TO_SPACE DEQUANTIZE EMBEDDING_LOOKUP
+FLOOR FULLY_CONNECTED HASHTABLE_LOOKUP L2_NORMALIZATION L2_POOL_2D LOCAL_RESPONSE_NORMALIZATION LOGISTIC
+LSH_PROJECTION LSTM MAX_POOL_2D MUL RELU RELU_N1_TO_1 RELU6 RESHAPE RESIZE_BILINEAR RNN SOFTMAX
+SPACE_TO_DEPTH SVDF TANH CONCAT_EMBEDDINGS SKIP_GRAM CALL CUSTOM EMBEDDING_LOOKUP_SPARSE PAD
+UNIDIRECTIONAL_SEQUENCE_RNN GATHER BATCH_TO_SPACE_ND SPACE_TO_BATCH_ND TRANSPOSE MEAN SUB DIV SQUEEZE
+UNIDIRECTIONAL_SEQUENCE_LSTM STRIDED_SLICE BIDIRECTIONAL_SEQUENCE_RNN EXP TOPK_V2 SPLIT LOG_SOFTMAX DELEGATE
+BIDIRECTIONAL_SEQUENCE_LSTM CAST PRELU MAXIMUM ARG_MAX MINIMUM LESS NEG PADV2 GREATER GREATER_EQUAL
+LESS_EQUAL SELECT SLICE SIN TRANSPOSE_CONV SPARSE_TO_DENSE TILE EXPAND_DIMS EQUAL NOT_EQUAL LOG SUM SQRT
+RSQRT SHAPE POW ARG_MIN FAKE_QUANT REDUCE_PROD REDUCE_MAX PACK LOGICAL_OR ONE_HOT LOGICAL_AND LOGICAL_NOT
+UNPACK REDUCE_MIN FLOOR_DIV REDUCE_ANY SQUARE ZEROS_LIKE FILL FLOOR_MOD RANGE RESIZE_NEAREST_NEIGHBOR
+LEAKY_RELU SQUARED_DIFFERENCE MIRROR_PAD ABS SPLIT_V UNIQUE CEIL REVERSE_V2 ADD_N GATHER_ND COS WHERE RANK
+ELU REVERSE_SEQUENCE MATRIX_DIAG QUANTIZE MATRIX_SET_DIAG ROUND HARD_SWISH IF WHILE NON_MAX_SUPPRESSION_V4
+NON_MAX_SUPPRESSION_V5 SCATTER_ND SELECT_V2 DENSIFY SEGMENT_SUM BATCH_MATMUL
+""".split()
+
+# TFLite Micro aligns every arena allocation to 16 bytes
+ARENA_ALIGNMENT = 16
+
+
+def _vector_table(table, field, index):
+    start = table.Vector(table.Offset(field))
+    return Table(table.Bytes, table.Indirect(start + index * N.UOffsetTFlags.bytewidth))
+
+
+def _vector_len(table, field):
+    offset = table.Offset(field)
+    return table.VectorLen(offset) if offset else 0
+
+
+def _int_vector(table, field):
+    # Read straight out of the mapped file; only the (short) index lists are copied
+    offset = table.Offset(field)
+    if not offset:
+        return []
+    return np.frombuffer(table.Bytes, dtype='<i4', count=table.VectorLen(offset), offset=table.Vector(offset)).tolist()
+
+
+def _scalar(table, field, flags, default=0):
+    offset = table.Offset(field)
+    return table.Get(flags, table.Pos + offset) if offset else default
+
+
+def _operator_name(code_table):
+    builtin = max(_scalar(code_table, OPERATOR_CODE_DEPRECATED_BUILTIN, N.Int8Flags),
+                  _scalar(code_table, OPERATOR_CODE_BUILTIN, N.Int32Flags))
+    if builtin == BUILTIN_OPERATORS.index('CUSTOM'):
+        offset = code_table.Offset(OPERATOR_CODE_CUSTOM)
+        return code_table.String(code_table.Pos + offset).decode() if offset else 'CUSTOM'
+    return BUILTIN_OPERATORS[builtin] if builtin < len(BUILTIN_OPERATORS) else f'BUILTIN_{builtin}'
+
+
+def _buffer_size(buffer):
+    offset = buffer.Offset(BUFFER_DATA)
+    if offset:
+        return buffer.VectorLen(offset)
+    # Models over 2 GB keep their data after the flatbuffer and store only offset/size
+    return _scalar(buffer, BUFFER_SIZE, N.Uint64Flags)
+
+
+def _macs(name, operator, tensors):
+    """Multiply-accumulates of one operator, estimated from its tensor shapes."""
+    inputs = [tensors[i] if i >= 0 else None for i in operator['inputs']]
+    outputs = [tensors[i] for i in operator['outputs'] if i >= 0]
+    if not outputs or not inputs or inputs[0] is None:
+        return 0
+    out_elements = int(np.prod(outputs[0]['shape']))
+    if name == 'FULLY_CONNECTED':
+        return out_elements * inputs[1]['shape'][-1]
+    if name == 'CONV_2D':
+        return out_elements * int(np.prod(inputs[1]['shape'][1:]))
+    if name == 'DEPTHWISE_CONV_2D':
+        return out_elements * int(np.prod(inputs[1]['shape'][1:3]))
+    if name == 'TRANSPOSE_CONV':
+        return int(np.prod(inputs[2]['shape'])) * int(np.prod(inputs[1]['shape'][:3]))
+    if name == 'BATCH_MATMUL':
+        return out_elements * inputs[0]['shape'][-1]
+    if name in ('ADD', 'SUB', 'MUL', 'SQUARED_DIFFERENCE'):
+        return out_elements
+    return 0
+
+
+def plan_arena(sizes, first_use, last_use, alignment=ARENA_ALIGNMENT):
+    """
+    Place tensors in one arena, largest first, at the lowest offset not used
+    by any tensor alive at the same time (the greedy planner of TFLite Micro).
+
+    :param sizes: Bytes per tensor.
+    :param first_use: Index of the operator that produces each tensor.
+    :param last_use: Index of the last operator that reads each tensor.
+    :param alignment: Allocation alignment in bytes.
+    :return: Tuple of (offsets, arena size in bytes).
+    """
+    aligned = [-(-size // alignment) * alignment for size in sizes]
+    offsets = [None] * len(sizes)
+    placed = []
+    for i in sorted(range(len(sizes)), key=lambda i: -aligned[i]):
+        conflicts = sorted((offsets[j], offsets[j] + aligned[j]) for j in placed
+                           if first_use[j] <= last_use[i] and first_use[i] <= last_use[j])
+        offset = 0
+        for start, end in conflicts:
+            if offset + aligned[i] <= start:
+                break
+            offset = max(offset, end)
+        offsets[i] = offset
+        placed.append(i)
+    return offsets, max((offsets[i] + aligned[i] for i in placed), default=0)
+
+
+def inspect_model(path):
+    """
+    Read a .tflite file through a memory map, without TensorFlow.
+
+    Only the main subgraph (the one TFLite Micro runs) is analysed.
+
+    :param path: .tflite file.
+    :return: Dictionary with operators, tensors, parameter_bytes, macs and the
+             arena plan (arena_bytes, peak_live_bytes) of the main subgraph.
+    """
+    with open(path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+        if not util.BufferHasIdentifier(buf, 0, b'TFL3'):
+            raise ValueError(f"{path} is not a TensorFlow Lite model")
+        model = Table(buf, encode.Get(N.UOffsetTFlags.packer_type, buf, 0))
+
+        operator_names = [_operator_name(_vector_table(model, MODEL_OPERATOR_CODES, i))
+                          for i in range(_vector_len(model, MODEL_OPERATOR_CODES))]
+        buffer_sizes = [_buffer_size(_vector_table(model, MODEL_BUFFERS, i))
+                        for i in range(_vector_len(model, MODEL_BUFFERS))]
+        subgraph = _vector_table(model, MODEL_SUBGRAPHS, 0)
+
+        tensors = []
+        for i in range(_vector_len(subgraph, SUBGRAPH_TENSORS)):
+            tensor = _vector_table(subgraph, SUBGRAPH_TENSORS, i)
+            shape = _int_vector(tensor, TENSOR_SHAPE)
+            dtype, itemsize = TENSOR_TYPES[_scalar(tensor, TENSOR_TYPE, N.Int8Flags)]
+            buffer = _scalar(tensor, TENSOR_BUFFER, N.Uint32Flags)
+            name_offset = tensor.Offset(TENSOR_NAME)
+            tensors.append({
+                'name': tensor.String(tensor.Pos + name_offset).decode() if name_offset else '',
+                'shape': shape,
+                'dtype': dtype,
+                'bytes': int(np.ceil(int(np.prod(shape)) * itemsize)),
+                'constant': buffer < len(buffer_sizes) and buffer_sizes[buffer] > 0,
+                'variable': bool(_scalar(tensor, TENSOR_IS_VARIABLE, N.BoolFlags)),
+            })
+
+        operators = []
+        for i in range(_vector_len(subgraph, SUBGRAPH_OPERATORS)):
+            operator = _vector_table(subgraph, SUBGRAPH_OPERATORS, i)
+            operators.append({
+                'name': operator_names[_scalar(operator, OPERATOR_OPCODE_INDEX, N.Uint32Flags)],
+                'inputs': _int_vector(operator, OPERATOR_INPUTS),
+                'outputs': _int_vector(operator, OPERATOR_OUTPUTS),
+            })
+        inputs, outputs = _int_vector(subgraph, SUBGRAPH_INPUTS), _int_vector(subgraph, SUBGRAPH_OUTPUTS)
+        size = len(buf)
+
+    for operator in operators:
+        operator['macs'] = _macs(operator['name'], operator, tensors)
+
+    # Lifetimes of the activations: graph inputs are live from the start, outputs until the end
+    first_use, last_use = {}, {}
+    for t in inputs:
+        first_use[t] = 0
+    for index, operator in enumerate(operators):
+        for t in operator['outputs']:
+            first_use.setdefault(t, index)
+        for t in operator['inputs']:
+            if t >= 0:
+                last_use[t] = index
+    for t in outputs:
+        last_use[t] = len(operators)
+    activations = [t for t in first_use if not tensors[t]['constant'] and not tensors[t]['variable']]
+    first = [first_use[t] for t in activations]
+    last = [last_use.get(t, first_use[t]) for t in activations]
+    offsets, arena_bytes = plan_arena([tensors[t]['bytes'] for t in activations], first, last)
+    for t, offset in zip(activations, offsets):
+        tensors[t]['arena_offset'] = offset
+
+    peak_live = max((sum(tensors[t]['bytes'] for t, f, l in zip(activations, first, last) if f <= step <= l)
+                     for step in range(len(operators) + 1)), default=0)
+    return {
+        'path': path,
+        'file_bytes': size,
+        'operators': operators,
+        'tensors': tensors,
+        'inputs': inputs,
+        'outputs': outputs,
+        'parameter_bytes': sum(buffer_sizes),
+        'macs': sum(operator['macs'] for operator in operators),
+        'arena_bytes': arena_bytes,
+        'peak_live_bytes': peak_live,
+        'variable_bytes': sum(tensor['bytes'] for tensor in tensors if tensor['variable']),
+    }
+
+
+def print_summary(summary, show_tensors=False):
+    ops = {}
+    for operator in summary['operators']:
+        ops[operator['name']] = ops.get(operator['name'], 0) + 1
+    print(f"{summary['path']}: {summary['file_bytes']} bytes")
+    print(f"  operators: {', '.join(f'{name} x{count}' for name, count in ops.items())}")
+    print(f"  parameters: {summary['parameter_bytes']} bytes, {summary['macs']} MACs per inference")
+    print(f"  tensor arena: {summary['arena_bytes']} bytes planned "
+          f"(peak live {summary['peak_live_bytes']} bytes, variables {summary['variable_bytes']} bytes)")
+    if show_tensors:
+        for index, tensor in enumerate(summary['tensors']):
+            kind = 'const' if tensor['constant'] else f"arena@{tensor['arena_offset']}" if 'arena_offset' in tensor else '-'
+            print(f"    {index:3d} {tensor['dtype']:8s} {str(tensor['shape']):16s} {tensor['bytes']:7d} {kind:12s} {tensor['name']}")
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect .tflite models without TensorFlow.")
+    parser.add_argument('models', nargs='+', help=".tflite files")
+    parser.add_argument('--tensors', action='store_true', help="List every tensor of the main subgraph")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summaries = [inspect_model(path) for path in args.models]
+    elapsed = time.perf_counter() - start
+    for summary in summaries:
+        print_summary(summary, args.tensors)
+    print(f"Inspected {len(summaries)} models in {elapsed * 1000:.1f} ms")
@@ -0,0 +1,177 @@
+import os
+import re
+
+from tflite_inspector import ARENA_ALIGNMENT, inspect_model
+
+# TFLite Micro keeps per-tensor and per-operator bookkeeping (eval tensors, node and
+# registration structs, kernel op data) in the persistent tail of the arena. These are
+# unmeasured upper-bound guesses for a 32-bit target, so every arena size that includes
+# them is emitted as *_ARENA_SIZE_ESTIMATE. Replace them with the persistent total that
+# RecordingMicroInterpreter's GetMicroAllocator().PrintAllocations() reports on the board.
+PERSISTENT_BYTES_PER_TENSOR = 16
+PERSISTENT_BYTES_PER_OPERATOR = 96
+PERSISTENT_BYTES_FIXED = 256
+
+
+def _align(size):
+    return -(-size // ARENA_ALIGNMENT) * ARENA_ALIGNMENT
+
+
+def _identifier(name):
+    return ''.join(c if c.isalnum() else '_' for c in name)
+
+
+def arena_budget(summary):
+    """
+    Tensor arena needed by one model.
+
+    :param summary: Result of tflite_inspector.inspect_model.
+    :return: Dictionary with activation_bytes (planned from tensor lifetimes),
+             persistent_bytes (estimated bookkeeping) and arena_bytes (their aligned sum,
+             so also an estimate).
+    """
+    activation = summary['arena_bytes'] + _align(summary['variable_bytes'])
+    persistent = _align(PERSISTENT_BYTES_FIXED + PERSISTENT_BYTES_PER_TENSOR * len(summary['tensors'])
+                        + PERSISTENT_BYTES_PER_OPERATOR * len(summary['operators']))
+    return {'activation_bytes': activation, 'persistent_bytes': persistent, 'arena_bytes': activation + persistent}
+
+
+def _model_array(name, content):
+    symbol = f"g_{_identifier(name)}_model"
+    rows = ",\n".join("  " + ", ".join(f"0x{b:02x}" for b in content[i:i + 12]) for i in range(0, len(content), 12))
+    return f"""alignas({ARENA_ALIGNMENT}) const unsigned char {symbol}[] = {{
+{rows}
+}};
+const unsigned int {symbol}_len = {len(content)};
+"""
+
+
+def _describe(summary):
+    ops = {}
+    for operator in summary['operators']:
+        ops[operator['name']] = ops.get(operator['name'], 0) + 1
+    return ', '.join(f'{name} x{count}' for name, count in ops.items())
+
+
+def _write(path, guard, banner, body):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as file:
+        file.write(f"""/* Generated by {banner} -- do not edit by hand. */
+#ifndef {guard}
+#define {guard}
+
+{body}
+#endif /* {guard} */
+""")
+
+
+def export_model_header(tflite_path, path, name, source='tflite_micro_export.py'):
+    """
+    Write one .tflite model as an aligned C array with its tensor arena size.
+
+    :param tflite_path: .tflite file to embed.
+    :param path: Output header path.
+    :param name: Model name used for the symbols (g_<name>_model, <NAME>_ARENA_SIZE_ESTIMATE).
+    :param source: Script named in the generated-file banner.
+    :return: Result of arena_budget for the model.
+    """
+    summary = inspect_model(tflite_path)
+    budget = arena_budget(summary)
+    with open(tflite_path, 'rb') as file:
+        content = file.read()
+
+    macro = _identifier(name).upper()
+    body = f"""/* {os.path.basename(tflite_path)}: {len(content)} bytes, {_describe(summary)}.
+ * Activations: {budget['activation_bytes']} bytes, planned from tensor lifetimes.
+ * Bookkeeping: {budget['persistent_bytes']} bytes, estimated (not measured with RecordingMicroInterpreter).
+ */
+#define {macro}_ACTIVATION_BYTES {budget['activation_bytes']}
+#define {macro}_ARENA_SIZE_ESTIMATE {budget['arena_bytes']}
+
+{_model_array(name, content)}"""
+    _write(path, f"{macro}_MODEL_DATA_H", source, body)
+    return budget
+
+
+def export_merged_header(tflite_paths, path, name='gas_models', source='tflite_micro_export.py'):
+    """
+    Write several .tflite models into one header sized for a single shared tensor arena.
+
+    The shared size, the largest activation plan plus every model's bookkeeping,
+    holds only if all interpreters are built on one MicroAllocator created once
+    with MicroAllocator::Create(arena, size) and run strictly one at a time: that
+    allocator keeps each interpreter's persistent data side by side in the tail
+    and hands the same head to each for activations. Passing the arena buffer
+    itself to several MicroInterpreter constructors gives each its own allocator
+    owning the whole buffer, so they overwrite each other's persistent data.
+
+    The header only declares the arena (extern); the sketch defines it once, so
+    every file including the header shares it instead of getting its own copy.
+
+    :param tflite_paths: Dictionary mapping model name to .tflite file.
+    :param path: Output header path.
+    :param name: Prefix of the shared arena symbols (<NAME>_ARENA_SIZE_ESTIMATE, g_<name>_arena).
+    :param source: Script named in the generated-file banner.
+    :return: Dictionary with per-model budgets, the shared arena_bytes and the
+             arena_bytes that separate arenas would need in total.
+    """
+    budgets, blocks = {}, []
+    for model_name, tflite_path in tflite_paths.items():
+        summary = inspect_model(tflite_path)
+        budget = budgets[model_name] = arena_budget(summary)
+        with open(tflite_path, 'rb') as file:
+            content = file.read()
+        macro = _identifier(model_name).upper()
+        blocks.append(f"""/* {os.path.basename(tflite_path)}: {len(content)} bytes, {_describe(summary)} */
+#define {macro}_ACTIVATION_BYTES {budget['activation_bytes']}
+#define {macro}_PERSISTENT_BYTES_ESTIMATE {budget['persistent_bytes']}
+{_model_array(model_name, content)}""")
+
+    shared = (max(b['activation_bytes'] for b in budgets.values())
+              + sum(b['persistent_bytes'] for b in budgets.values()))
+    separate = sum(b['arena_bytes'] for b in budgets.values())
+    macro = _identifier(name).upper()
+    arena = f"g_{_identifier(name)}_arena"
+    body = f"""/* {len(budgets)} models sharing one tensor arena: {shared} bytes instead of {separate} for separate arenas.
+ * The bookkeeping part is estimated, not measured with RecordingMicroInterpreter.
+ *
+ * The shared size only holds if every interpreter uses one allocator and they run strictly one at a time:
+ *   tflite::MicroAllocator *allocator = tflite::MicroAllocator::Create({arena}, {macro}_ARENA_SIZE_ESTIMATE);
+ *   tflite::MicroInterpreter interpreter(model, resolver, allocator);   // the same allocator for each model
+ * Passing {arena} itself to several MicroInterpreters gives each an allocator owning the whole buffer,
+ * and they overwrite each other's persistent data.
+ *
+ * Define the arena in exactly one source file of the sketch:
+ *   alignas({ARENA_ALIGNMENT}) unsigned char {arena}[{macro}_ARENA_SIZE_ESTIMATE];
+ */
+#define {macro}_ARENA_SIZE_ESTIMATE {shared}
+
+extern unsigned char {arena}[];
+
+{chr(10).join(blocks)}"""
+    _write(path, f"{macro}_DATA_H", source, body)
+    return {'models': budgets, 'arena_bytes': shared, 'separate_arena_bytes': separate}
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Embed .tflite models as C arrays with measured tensor arena sizes.")
+    parser.add_argument('models', nargs='+',
+                        help=".tflite files; the model name is the file name without _model[_int8].tflite")
+    parser.add_argument('--output-dir', default='.', help="Directory for the headers")
+    parser.add_argument('--merge', metavar='NAME', help="Write one header NAME.h whose models share an arena")
+    args = parser.parse_args()
+
+    names = {re.sub(r'(_model(_int8)?)?\.tflite$', '', os.path.basename(p)): p for p in args.models}
+    if args.merge:
+        result = export_merged_header(names, os.path.join(args.output_dir, f"{args.merge}.h"), args.merge)
+        print(f"Wrote {args.merge}.h: shared arena about {result['arena_bytes']} bytes "
+              f"(separate arenas: {result['separate_arena_bytes']} bytes)")
+    else:
+        for model_name, tflite_path in names.items():
+            budget = export_model_header(tflite_path, os.path.join(args.output_dir, f"{model_name}_model_data.h"), model_name)
+            print(f"Wrote {model_name}_model_data.h: arena about {budget['arena_bytes']} bytes "
+                  f"({budget['activation_bytes']} activations + {budget['persistent_bytes']} estimated bookkeeping)")
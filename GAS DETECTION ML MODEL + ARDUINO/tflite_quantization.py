@@ -0,0 +1,193 @@
+import time
+import numpy as np
+import pandas as pd
+
+
+def stream_representative_dataset(path, to_features, column='MQ2', max_samples=500, chunksize=1000):
+    """
+    Build a representative dataset that streams calibration samples from a CSV archive.
+
+    The file is read chunk by chunk and every chunk contributes evenly spaced
+    readings, so the whole range of a long recording is covered without loading it.
+
+    :param path: CSV file with a column of raw analog readings (e.g. Gas_Sensors_Measurements.csv).
+    :param to_features: Callable turning an array of raw readings into the 2-D feature array.
+    :param column: Name of the raw reading column.
+    :param max_samples: Upper bound on the samples yielded.
+    :param chunksize: Rows read per chunk.
+    :return: Callable for TFLiteConverter.representative_dataset.
+    """
+    with open(path) as file:
+        rows = sum(1 for _ in file) - 1
+    stride = max(1, -(-rows // max_samples))
+
+    def representative_dataset():
+        yielded = 0
+        for chunk in pd.read_csv(path, usecols=[column], chunksize=chunksize):
+            start = (-chunk.index[0]) % stride  # Keep the stride across chunk boundaries
+            features = to_features(chunk[column].to_numpy()[start::stride]).astype(np.float32)
+            for row in features:
+                if yielded == max_samples:
+                    return
+                yielded += 1
+                yield [row[None, :]]
+
+    return representative_dataset
+
+
+def convert_int8(model, representative_dataset):
+    """
+    Convert a Keras model to a full-integer TensorFlow Lite model.
+
+    Weights, activations, input and output are all int8, so the model runs on
+    integer-only kernels (TFLite Micro on AVR or Cortex-M0).
+
+    :param model: Trained Keras model.
+    :param representative_dataset: Callable yielding calibration samples (see stream_representative_dataset).
+    :return: Serialized .tflite model.
+    """
+    import tensorflow as tf
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    converter.inference_input_type = tf.int8
+    converter.inference_output_type = tf.int8
+    return converter.convert()
+
+
+class TFLiteModel:
+    """
+    Run a float or int8 .tflite model on float features, one row per invoke as on the device.
+
+    Inputs are quantized and outputs dequantized with the tensors' own scale and
+    zero point, so float and int8 models return comparable probabilities.
+    """
+
+    def __init__(self, model_content):
+        """
+        :param model_content: Serialized .tflite model.
+        """
+        import tensorflow as tf
+
+        self.size = len(model_content)
+        self._interpreter = tf.lite.Interpreter(model_content=model_content)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        # Signature outputs are named after the Keras outputs (the label heads)
+        signature = self._interpreter.get_signature_list()['serving_default']
+        runner = self._interpreter.get_signature_runner()
+        output_details = runner.get_output_details()
+        self.outputs = list(signature['outputs'])
+        self._outputs = [(name, output_details[name]['index'], output_details[name]['quantization'])
+                         for name in self.outputs]
+
+    def _quantize(self, X):
+        scale, zero_point = self._input['quantization']
+        if self._input['dtype'] == np.float32:
+            return X.astype(np.float32)
+        info = np.iinfo(self._input['dtype'])
+        return np.clip(np.rint(X / scale + zero_point), info.min, info.max).astype(self._input['dtype'])
+
+    def _invoke(self, row):
+        self._interpreter.set_tensor(self._input['index'], row)
+        self._interpreter.invoke()
+        results = {}
+        for name, index, (scale, zero_point) in self._outputs:
+            output = self._interpreter.get_tensor(index)[0]
+            results[name] = output if scale == 0 else (output.astype(np.float32) - zero_point) * scale
+        return results
+
+    def predict_proba(self, X):
+        """
+        :param X: 2-D array of samples.
+        :return: Dictionary mapping output name to an (n_samples, n_classes) array.
+        """
+        rows = self._quantize(np.asarray(X, dtype=np.float32))
+        results = [self._invoke(row[None, :]) for row in rows]
+        return {name: np.stack([result[name] for result in results]) for name in self.outputs}
+
+    def latency(self, X, repeat=1000):
+        """
+        :param X: 2-D array of samples; the first row is invoked repeatedly.
+        :param repeat: Invokes timed.
+        :return: Mean time per invoke in milliseconds.
+        """
+        row = self._quantize(np.asarray(X[:1], dtype=np.float32))
+        start = time.perf_counter()
+        for _ in range(repeat):
+            self._invoke(row)
+        return (time.perf_counter() - start) / repeat * 1000
+
+
+def _keras_outputs(model, X, names):
+    predictions = model.predict(np.asarray(X, dtype=np.float32), verbose=0)
+    # Sequential models return one array; multi-head models a dictionary keyed like the TFLite outputs
+    return predictions if isinstance(predictions, dict) else {names[0]: predictions}
+
+
+def quantization_report(model, float_content, int8_content, X_drift, X_labelled=None, y_labelled=None):
+    """
+    Compare an int8 model with its Keras model and float TensorFlow Lite conversion.
+
+    :param model: Trained Keras model.
+    :param float_content: Float .tflite conversion of the model.
+    :param int8_content: Full-integer .tflite conversion of the model.
+    :param X_drift: Unlabelled samples on which int8 predictions are compared with Keras.
+    :param X_labelled: Optional labelled samples for accuracy.
+    :param y_labelled: Encoded labels for X_labelled, a dictionary keyed by output name or one array.
+    :return: Dictionary with per-output agreement/accuracy, sizes (bytes) and latencies (ms per row).
+    """
+    float_model, int8_model = TFLiteModel(float_content), TFLiteModel(int8_content)
+    keras_proba = _keras_outputs(model, X_drift, int8_model.outputs)
+    int8_proba = int8_model.predict_proba(X_drift)
+    if X_labelled is not None:
+        keras_labelled = _keras_outputs(model, X_labelled, int8_model.outputs)
+        int8_labelled = int8_model.predict_proba(X_labelled)
+
+    outputs = {}
+    for name in int8_model.outputs:
+        result = {'agreement': float(np.mean(np.argmax(keras_proba[name], axis=1) == np.argmax(int8_proba[name], axis=1))),
+                  'max_proba_diff': float(np.abs(keras_proba[name] - int8_proba[name]).max())}
+        if X_labelled is not None:
+            y = y_labelled[name] if isinstance(y_labelled, dict) else y_labelled
+            result['keras_accuracy'] = float(np.mean(np.argmax(keras_labelled[name], axis=1) == y))
+            result['int8_accuracy'] = float(np.mean(np.argmax(int8_labelled[name], axis=1) == y))
+        outputs[name] = result
+
+    return {
+        'outputs': outputs,
+        'float_bytes': float_model.size,
+        'int8_bytes': int8_model.size,
+        'float_ms': float_model.latency(X_drift),
+        'int8_ms': int8_model.latency(X_drift),
+    }
+
+
+def accept_int8(report, max_drift):
+    """
+    Decide whether a quantized model is good enough to keep.
+
+    :param report: Result of quantization_report.
+    :param max_drift: Largest tolerated share of readings where int8 and Keras disagree,
+                      and largest tolerated accuracy drop on the labelled samples.
+    :return: True if every output stays within max_drift.
+    """
+    for result in report['outputs'].values():
+        if 1 - result['agreement'] > max_drift:
+            return False
+        if result.get('keras_accuracy', 0) - result.get('int8_accuracy', 0) > max_drift:
+            return False
+    return True
+
+
+def print_report(name, report):
+    print(f"{name}: {report['float_bytes']} -> {report['int8_bytes']} bytes "
+          f"({report['int8_bytes'] / report['float_bytes']:.0%}), "
+          f"{report['float_ms']:.4f} -> {report['int8_ms']:.4f} ms per row")
+    for output, result in report['outputs'].items():
+        line = f"  {output}: int8 agrees with Keras on {result['agreement']:.2%} of readings"
+        if 'keras_accuracy' in result:
+            line += f", accuracy {result['keras_accuracy']:.4f} -> {result['int8_accuracy']:.4f}"
+        print(line)